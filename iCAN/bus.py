@@ -1,32 +1,330 @@
 from __future__ import annotations
-import time
-from typing import Dict, Optional
+import os, threading, time
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
 from PySide6.QtCore import QObject, Signal, Slot, QThread, QTimer, Qt
 import can
 import cantools
+import numpy as np
+
+from .rules import RuleEngine
+from .registry import SignalRegistry, RECORD_DTYPE
+from .derived import DerivedEngine, DERIVED_BUS, DERIVED_MSG
+from .signal_index import SignalIndex
+from .timing import TimingStats
+
+# One raw frame as delivered by sig_raw_batch; bytes past `dlc` are zero
+RAW_DTYPE = np.dtype([('bus', 'u1'), ('id', '<u4'), ('dlc', 'u1'), ('data', 'u1', (64,)), ('t', '<f8')])
+
+
+def _extractor(msg, sig):
+    """(name, big_endian, shift, mask, sign_bit, scale, offset) for a plain integer signal, else None."""
+    if getattr(sig, 'is_float', False) or sig.multiplexer_ids or sig.is_multiplexer:
+        return None
+    length = int(msg.length or 8)
+    if sig.byte_order == 'little_endian':
+        big, shift = False, sig.start
+    else:
+        # cantools numbers big-endian start bits MSB-first within each byte
+        pos = 8 * (sig.start // 8) + (7 - sig.start % 8)
+        big, shift = True, 8 * length - pos - sig.length
+    if shift < 0:
+        return None
+    sign = (1 << (sig.length - 1)) if sig.is_signed else 0
+    return (sig.name, big, shift, (1 << sig.length) - 1, sign, float(sig.scale), float(sig.offset))
 
 
 class FrameBus(QObject):
-    """Thread-safe hub that receives frames from N buses and emits decoded signal updates."""
+    """Thread-safe hub that receives frames from N buses and emits decoded signal updates.
+
+    Each bus decodes with its own database when one was assigned with
+    set_bus_dbc() (several files are merged), otherwise with the global `dbc`.
+    Databases are cached by path, so buses sharing a file share one parsed copy.
+
+    Only signals somebody needs are decoded and emitted: pairs registered with
+    subscribe() (panels), rule inputs and derived-signal inputs. Messages switched to
+    full decode with set_full_decode() (e.g. an expanded table row) emit every signal.
+
+    Decoded values are delivered in batches: sig_batch carries a RECORD_DTYPE array
+    of (handle, value, ts, chg) records, flushed every `batch_ms`. Handles come from
+    `registry`; consumers resolve names to handles once (see registry.Selection).
+    Derived signals are computed from each batch at flush and appended to it.
+    The array is only valid during the slot call. Raw frames are batched the same
+    way (sig_raw_batch, RAW_DTYPE) while some owner has asked for them with
+    set_raw_batch(); `bus` indexes `bus_names`.
+
+    A frame whose payload equals the previous one on the same (bus, id) is not
+    decoded again; its cached values are re-sent with chg False so plots still get
+    the new timestamp while value displays can ignore it.
+    """
     sig_raw = Signal(str, int, bytes, float)  # bus_name, can_id, data, ts
-    sig_signal = Signal(str, int, str, str, float, float)  # bus_name, can_id, msg_name, sig_name, value, ts
+    sig_batch = Signal(object)  # np.ndarray of RECORD_DTYPE
+    sig_raw_batch = Signal(object)  # np.ndarray of RAW_DTYPE
 
     def __init__(self):
         super().__init__()
-        self.dbc: Optional[cantools.database.Database] = None
+        self.dbc: Optional[cantools.database.Database] = None   # global database, for buses without their own
         self._msg_by_id: Dict[int, cantools.database.Message] = {}
+        self.bus_dbc: Dict[str, cantools.database.Database] = {}          # bus -> own (possibly merged) database
+        self._bus_msgs: Dict[str, Dict[int, cantools.database.Message]] = {}
+        self._db_cache: Dict[Tuple[str, ...], cantools.database.Database] = {}  # abs paths -> database
+        self.dbc_version = 0  # bumped whenever any database changes
+        self.registry = SignalRegistry()
+        self.rules = RuleEngine(self, self.registry)
+        self.derived = DerivedEngine(self.registry)
+        self.index = SignalIndex()  # search index for the signal pickers, rebuilt by load_dbc
+        # Panels store histories as compact float32/uint32 samples when set (ui.compact_history)
+        self.compact_history = False
+        self._subs: Dict[Hashable, Set[Tuple[str, str]]] = {}   # owner -> {(msg, sig)}
+        self._full: Dict[Hashable, Set[int]] = {}               # owner -> {can_id}
+        # Per-bus dispatch tables, built on a bus's first frame after any change:
+        # bus -> can_id -> (msg, extractors or None for msg.decode, names decoded, their handles)
+        self._plans: Dict[str, Dict[int, Tuple[Any, Optional[List[tuple]], Tuple[str, ...], np.ndarray]]] = {}
+        self.rules.sig_changed.connect(self._invalidate_plan)
+        self._derived_h: Dict[str, int] = {}
+        # (bus, id) -> (payload, decoded dict, handles, values) of the last decode
+        self._last: Dict[Tuple[str, int], Tuple[bytes, Dict[str, float], np.ndarray, np.ndarray]] = {}
+        self._batch = np.empty(4096, dtype=RECORD_DTYPE)
+        self._n = 0
+        self.batch_timer = QTimer(self); self.batch_timer.setInterval(10); self.batch_timer.timeout.connect(self.flush)
+        self.batch_timer.start()
+        self.capture = None  # CaptureEngine (config `capture:`), fed every raw frame
+        self.shm = None      # ShmPublisher for external readers (config `shm:`), see set_shm()
+        self.n_decoded = 0   # frames decoded / skipped as repeats since the last take_dedup_stats()
+        self.n_repeated = 0
+        self.received: Dict[str, int] = {}  # frames delivered to on_frame per bus (see BusReader.emitted)
+        self._raw_owners: Set[Hashable] = set()
+        self._raw_frames: List[Tuple[int, int, bytes, float]] = []  # packed into RAW_DTYPE at flush
+        self.bus_names: List[str] = []
+        self._bus_idx: Dict[str, int] = {}
+        # Per-bus cycle-time statistics, fed by the BusReader threads (config `timing:`)
+        self.timing: Dict[str, TimingStats] = {}
+        self.timing_tolerance = 0.2
+        self.timing_max_ids = 4096
+
+    def _load(self, paths: Iterable[str]) -> cantools.database.Database:
+        """Parse (or reuse) the database for these files; several files are merged in order."""
+        key = tuple(os.path.abspath(p) for p in paths)
+        db = self._db_cache.get(key)
+        if db is None:
+            if len(key) == 1:
+                db = cantools.database.load_file(key[0])
+            else:
+                parts = [self._load([p]) for p in key]
+                by_id = {m.frame_id: m for part in parts for m in part.messages}  # later files win
+                db = cantools.database.Database(messages=list(by_id.values()), nodes=[n for part in parts for n in part.nodes])
+            self._db_cache[key] = db
+        return db
+
+    def _databases_changed(self):
+        self.dbc_version += 1
+        self.index.build(*self.databases())
+        for bus_name, stats in self.timing.items():
+            stats.set_expected(self.cycle_times(bus_name))
+        self._invalidate_plan()
 
     def load_dbc(self, path: str):
-        self.dbc = cantools.database.load_file(path)
+        """Set the global database, used by every bus without one of its own."""
+        self.dbc = self._load([path])
         self._msg_by_id = {m.frame_id: m for m in self.dbc.messages}
+        for bus in self.registry.buses():
+            if bus not in self.bus_dbc:
+                self.registry.register_bus(bus, self.dbc)
+        self._databases_changed()
+
+    def set_bus_dbc(self, bus_name: str, paths: Iterable[str]):
+        """Give a bus its own database (merged from `paths`); no paths reverts it to the global one."""
+        paths = [p for p in paths if p]
+        if paths:
+            db = self.bus_dbc[bus_name] = self._load(paths)
+            self._bus_msgs[bus_name] = {m.frame_id: m for m in db.messages}
+        else:
+            self.bus_dbc.pop(bus_name, None); self._bus_msgs.pop(bus_name, None)
+        self.registry.register_bus(bus_name, self.dbc_for(bus_name))
+        self._databases_changed()
+
+    def dbc_for(self, bus_name: str) -> Optional[cantools.database.Database]:
+        return self.bus_dbc.get(bus_name, self.dbc)
+
+    def msg_map(self, bus_name: str) -> Dict[int, cantools.database.Message]:
+        """can_id -> message in the database `bus_name` decodes with."""
+        return self._bus_msgs.get(bus_name, self._msg_by_id)
+
+    def cycle_times(self, bus_name: str) -> Dict[int, float]:
+        """can_id -> expected period in seconds, from the DBC `cycle_time` of the bus's messages."""
+        return {cid: m.cycle_time / 1000.0 for cid, m in self.msg_map(bus_name).items() if getattr(m, 'cycle_time', None)}
+
+    def bus_index(self, bus_name: str) -> Optional[int]:
+        """Index of `bus_name` in the `bus` column of raw batches, None before its first frame."""
+        return self._bus_idx.get(bus_name)
+
+    def databases(self) -> List[cantools.database.Database]:
+        """Every database in use, global first, without duplicates."""
+        out = [self.dbc] if self.dbc else []
+        for db in self.bus_dbc.values():
+            if all(db is not d for d in out): out.append(db)
+        return out
+
+    def any_dbc(self) -> Optional[cantools.database.Database]:
+        dbs = self.databases()
+        return dbs[0] if dbs else None
+
+    def find_message(self, msg_name: str):
+        """The first database message with this name, or None."""
+        for db in self.databases():
+            try:
+                return db.get_message_by_name(msg_name)
+            except KeyError:
+                continue
+        return None
+
+    def add_bus(self, bus_name: str):
+        """Assign signal handles for a bus that is starting."""
+        self.registry.register_bus(bus_name, self.dbc_for(bus_name))
+        self.received[bus_name] = 0
+        stats = self.timing.get(bus_name)
+        if stats is None: stats = self.timing[bus_name] = TimingStats(self.timing_tolerance, self.timing_max_ids)
+        else: stats.restart()
+        stats.set_expected(self.cycle_times(bus_name))
+
+    def define_derived(self, defs: List[Tuple[str, str, str]]):
+        """Install derived signals as (name, expr, units); raises ValueError on a bad expression."""
+        self.derived.define(defs)
+        self.index.set_virtual(DERIVED_MSG, [(n, u) for n, _, u in defs])
+        self._derived_h = {n: self.registry.handle(DERIVED_BUS, DERIVED_MSG, n) for n, _, _ in defs}
+        self._invalidate_plan()
+
+    def set_shm(self, publisher):
+        """Publish the publisher's signals to shared memory (None to stop)."""
+        if self.shm is not None:
+            self.unsubscribe("shm"); self.shm.close()
+        self.shm = publisher
+        if publisher is not None:
+            self.subscribe("shm", publisher.pairs())
+
+    # -- subscriptions --
+    def subscribe(self, owner: Hashable, pairs: Iterable[Tuple[str, str]]):
+        """Set the (msg_name, sig_name) pairs `owner` needs, replacing its previous set.
+
+        A sig_name of None stands for every signal of the message.
+        """
+        pairs = {(m, s or None) for m, s in pairs if m}
+        if pairs: self._subs[owner] = pairs
+        else: self._subs.pop(owner, None)
+        self._invalidate_plan()
+
+    def set_full_decode(self, owner: Hashable, can_id: int, on: bool):
+        ids = self._full.setdefault(owner, set())
+        if on: ids.add(can_id)
+        else: ids.discard(can_id)
+        if not ids: self._full.pop(owner, None)
+        self._invalidate_plan()
+
+    def set_raw_batch(self, owner: Hashable, on: bool):
+        """Collect raw frames into sig_raw_batch arrays while any owner wants them."""
+        if on: self._raw_owners.add(owner)
+        else: self._raw_owners.discard(owner)
+
+    def unsubscribe(self, owner: Hashable):
+        """Drop everything `owner` subscribed to."""
+        self._raw_owners.discard(owner)
+        if self._subs.pop(owner, None) is not None or self._full.pop(owner, None) is not None:
+            self._invalidate_plan()
+
+    def needed(self) -> Set[Tuple[str, str]]:
+        out: Set[Tuple[str, str]] = set()
+        for pairs in self._subs.values(): out |= pairs
+        out |= set(self.rules.signals())
+        out |= {(m, s) for _, m, s in self.derived.inputs()}
+        return out
+
+    def take_dedup_stats(self) -> Tuple[int, int]:
+        """(decoded, repeated) frame counts since the previous call."""
+        out = (self.n_decoded, self.n_repeated)
+        self.n_decoded = self.n_repeated = 0
+        return out
+
+    @Slot()
+    def _invalidate_plan(self):
+        self._plans.clear()
+        self._last.clear()  # cached decodes may lack newly needed signals
+
+    def _build_plan(self, bus_name: str) -> Dict[int, tuple]:
+        plan = {}
+        need = self.needed()
+        full = set().union(*self._full.values()) if self._full else set()
+        for can_id, msg in self.msg_map(bus_name).items():
+            whole = can_id in full or (msg.name, None) in need
+            names = tuple(sig.name for sig in msg.signals if whole or (msg.name, sig.name) in need)
+            if not names:
+                continue
+            ex = [_extractor(msg, sig) for sig in msg.signals if sig.name in names]
+            hs = np.asarray([self.registry.handle(bus_name, msg.name, n, can_id) for n in names], dtype=np.int32)
+            plan[can_id] = (msg, None if (None in ex or msg.is_multiplexed()) else ex, names, hs)
+        self._plans[bus_name] = plan
+        return plan
+
+    def _emit(self, hs: np.ndarray, vals: np.ndarray, ts: float, chg):
+        n, k = self._n, len(hs)
+        if n + k > len(self._batch):
+            grown = np.empty(max(2 * len(self._batch), n + k), dtype=RECORD_DTYPE)
+            grown[:n] = self._batch[:n]; self._batch = grown
+        b = self._batch[n:n + k]
+        b['h'] = hs; b['v'] = vals; b['t'] = ts; b['chg'] = chg
+        self._n = n + k
+
+    def _push_raw(self, bus_name: str, can_id: int, data: bytes, ts: float):
+        b = self._bus_idx.get(bus_name)
+        if b is None:
+            b = self._bus_idx[bus_name] = len(self.bus_names); self.bus_names.append(bus_name)
+        self._raw_frames.append((b, can_id, data, ts))
+
+    def _pack_raw(self) -> np.ndarray:
+        frames, self._raw_frames = self._raw_frames, []
+        bus, ids, datas, tss = zip(*frames)
+        raw = np.zeros(len(frames), dtype=RAW_DTYPE)
+        n = len(frames)
+        raw['bus'] = np.fromiter(bus, np.uint8, n); raw['id'] = np.fromiter(ids, np.uint32, n); raw['t'] = np.fromiter(tss, np.float64, n)
+        dlc = np.fromiter(map(len, datas), dtype=np.int64, count=n).clip(0, 64)
+        raw['dlc'] = dlc
+        w = max(8, int(dlc.max()))
+        blob = b"".join(d[:w].ljust(w, b"\0") for d in datas)
+        raw['data'][:, :w] = np.frombuffer(blob, dtype=np.uint8).reshape(n, w)
+        return raw
+
+    @Slot()
+    def flush(self):
+        """Deliver the records (and raw frames) collected since the last flush."""
+        if self._raw_frames:
+            self.sig_raw_batch.emit(self._pack_raw())
+        if not self._n:
+            return
+        self._publish_derived(self.derived.feed_batch(self._batch[:self._n]))
+        batch = self._batch[:self._n]
+        self._n = 0
+        self.rules.feed_batch(batch)
+        self.sig_batch.emit(batch)
 
     @Slot(str, int, bytes, float)
     def on_frame(self, bus_name: str, can_id: int, data: bytes, ts: float):
+        self.received[bus_name] = self.received.get(bus_name, 0) + 1
         self.sig_raw.emit(bus_name, can_id, data, ts)
-        if not self.dbc:
-            return
-        msg = self._msg_by_id.get(can_id)
-        if not msg:
+        if self._raw_owners:
+            self._push_raw(bus_name, can_id, data, ts)
+        if self.capture is not None:
+            self.capture.push(bus_name, can_id, data, ts)
+        plan = self._plans.get(bus_name)
+        if plan is None:
+            plan = self._build_plan(bus_name)
+        entry = plan.get(can_id)
+        if entry is None:
+            return  # no database, unknown id, or nothing subscribed from this message
+        msg, extractors, names, hs = entry
+        key = (bus_name, can_id)
+        last = self._last.get(key)
+        if last is not None and last[0] == data:
+            self.n_repeated += 1
+            self._emit(last[2], last[3], ts, False)
+            if self.shm is not None: self.shm.update(msg.name, last[1], ts)
             return
         try:
             d = data
@@ -38,32 +336,63 @@ class FrameBus(QObject):
                     d = d[:exp_len]
             except Exception:
                 pass
-            decoded = msg.decode(d, decode_choices=False, scaling=True)
-            for sig_name, val in decoded.items():
-                self.sig_signal.emit(bus_name, can_id, msg.name, sig_name, float(val), ts)
+            if extractors is not None:
+                le = int.from_bytes(d, 'little'); be = int.from_bytes(d, 'big')
+                decoded = {}
+                for name, big, shift, mask, sign, scale, offset in extractors:
+                    raw = ((be if big else le) >> shift) & mask
+                    if sign and raw & sign: raw -= sign << 1
+                    decoded[name] = raw * scale + offset
+            else:
+                decoded = msg.decode(d, decode_choices=False, scaling=True)
+                if len(decoded) != len(names) or any(n not in decoded for n in names):
+                    # Multiplexed: only the signals of the active mux value are present
+                    present = np.asarray([n in decoded for n in names])
+                    hs = hs[present]; names = tuple(n for n in names if n in decoded)
+            vals = np.fromiter((decoded[n] for n in names), dtype=np.float64, count=len(names))
+            decoded = dict(zip(names, vals.tolist()))
+            self._last[key] = (data, decoded, hs, vals)
+            self.n_decoded += 1
+            same = last is not None and len(last[2]) == len(hs) and bool((last[2] == hs).all())
+            self._emit(hs, vals, ts, (vals != last[3]) if same else True)
+            if self.shm is not None: self.shm.update(msg.name, decoded, ts)
         except Exception as e:
             print(f"[DBC decode error] bus={bus_name} id=0x{can_id:X} dlc={len(data)} -> {e}")
 
+    def _publish_derived(self, out: List[Tuple[str, np.ndarray, np.ndarray]]):
+        """Append the derived values computed from a batch to it (and to shared memory)."""
+        for name, ts, vals in out:
+            self._emit(np.full(len(vals), self._derived_h[name], dtype=np.int32), vals, ts, True)
+            if self.shm is not None:
+                self.shm.update(DERIVED_MSG, {name: float(vals[-1])}, float(ts[-1]))
+
 
 class BusReader(QThread):
     """Reader thread for a single python-can Bus."""
     sig_frame = Signal(str, int, bytes, float)  # bus_name, can_id, data, ts
     sig_stat = Signal(str, int, bool)  # bus_name, dlc, is_error
 
-    def __init__(self, bus_name: str, bus: can.BusABC):
+    def __init__(self, bus_name: str, bus: can.BusABC, timing: Optional[TimingStats] = None):
         super().__init__()
         self.bus_name = bus_name
         self.bus = bus
+        self.timing = timing  # cycle-time statistics, updated here rather than on the GUI thread
         self.running = True
+        self.emitted = 0  # frames handed to the GUI thread; minus FrameBus.received = queue depth
 
     def run(self):
+        # Named so the sampling profiler and stall reports can tell the readers apart
+        threading.current_thread().name = f"BusReader {self.bus_name}"
         while self.running:
             try:
                 msg = self.bus.recv(timeout=0.01)
                 if msg is None:
                     continue
                 ts = time.monotonic()
+                if self.timing is not None and not msg.is_error_frame:
+                    self.timing.push(msg.arbitration_id, msg.timestamp or ts, ts)
                 self.sig_frame.emit(self.bus_name, msg.arbitration_id, bytes(msg.data), ts)
+                self.emitted += 1
                 try:
                     is_err = bool(getattr(msg, 'is_error_frame', False))
                 except Exception:
@@ -0,0 +1,240 @@
+from __future__ import annotations
+import operator, os, time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from PySide6.QtCore import QObject, QThread, QTimer, Signal, Slot
+
+from .models import CaptureConf, TriggerConf
+from .registry import Selection
+
+_OPS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le, '==': operator.eq}
+
+
+class FrameRing:
+    """Fixed-size ring of raw frames in preallocated NumPy columns.
+
+    push() writes one row in place (no allocation), push_batch() a whole batch with
+    slice copies; snapshot() copies out the rows of a time window in arrival order.
+    """
+
+    def __init__(self, capacity: int, width: int = 8):
+        self.capacity = max(1024, int(capacity))
+        self.width = min(64, max(8, int(width)))
+        self.ts = np.zeros(self.capacity, dtype=np.float64)
+        self.bus = np.zeros(self.capacity, dtype=np.uint8)
+        self.ids = np.zeros(self.capacity, dtype=np.uint32)
+        self.dlc = np.zeros(self.capacity, dtype=np.uint8)
+        self.data = np.zeros((self.capacity, self.width), dtype=np.uint8)
+        self.n = 0  # frames pushed so far
+
+    def push(self, bus: int, can_id: int, data: bytes, ts: float):
+        i = self.n % self.capacity
+        k = min(len(data), self.width)
+        self.ts[i] = ts; self.bus[i] = bus; self.ids[i] = can_id; self.dlc[i] = k
+        self.data[i, :k] = np.frombuffer(data, dtype=np.uint8, count=k)
+        self.n += 1
+
+    def push_batch(self, raw: np.ndarray):
+        """Write a RAW_DTYPE batch (FrameBus.sig_raw_batch) with slice copies; `bus` keeps the hub's bus index."""
+        n = len(raw)
+        if n > self.capacity:
+            self.n += n - self.capacity; raw = raw[-self.capacity:]; n = self.capacity
+        i = self.n % self.capacity
+        k = min(n, self.capacity - i)
+        for dst, src in ((slice(i, i + k), slice(0, k)), (slice(0, n - k), slice(k, n))):
+            part = raw[src]
+            self.ts[dst] = part['t']; self.bus[dst] = part['bus']; self.ids[dst] = part['id']
+            self.dlc[dst] = np.minimum(part['dlc'], self.width); self.data[dst] = part['data'][:, :self.width]
+        self.n += n
+
+    def seqs(self) -> np.ndarray:
+        """Sequence numbers of the frames still in the ring, oldest first (slot = seq % capacity)."""
+        return np.arange(max(0, self.n - self.capacity), self.n)
+
+    @property
+    def nbytes(self) -> int:
+        return self.ts.nbytes + self.bus.nbytes + self.ids.nbytes + self.dlc.nbytes + self.data.nbytes
+
+    def frozen(self) -> "FrameRing":
+        """A copy that no longer changes (for scrolling back through a paused trace)."""
+        out = FrameRing.__new__(FrameRing)
+        out.capacity, out.width, out.n = self.capacity, self.width, self.n
+        out.ts, out.bus, out.ids, out.dlc, out.data = self.ts.copy(), self.bus.copy(), self.ids.copy(), self.dlc.copy(), self.data.copy()
+        return out
+
+    def oldest_ts(self) -> Optional[float]:
+        if not self.n:
+            return None
+        return float(self.ts[self.n % self.capacity if self.n > self.capacity else 0])
+
+    def snapshot(self, t0: float, t1: float) -> Dict[str, np.ndarray]:
+        start = max(0, self.n - self.capacity)
+        order = np.arange(start, self.n) % self.capacity
+        order = order[(self.ts[order] >= t0) & (self.ts[order] <= t1)]
+        return {'ts': self.ts[order], 'bus': self.bus[order], 'ids': self.ids[order],
+                'dlc': self.dlc[order], 'data': self.data[order]}
+
+
+class CaptureWriter(QThread):
+    """Writes a frozen capture window as a candump-style log (``(ts) bus id#data``)."""
+    sig_done = Signal(str, str)  # path, error message ("" on success)
+
+    def __init__(self, frames: Dict[str, np.ndarray], bus_names: List[str], path: str, wall_offset: float, header: str = ""):
+        super().__init__()
+        self.frames = frames
+        self.bus_names = list(bus_names)
+        self.path = path
+        self.wall_offset = wall_offset
+        self.header = header
+
+    def run(self):
+        try:
+            f = self.frames
+            with open(self.path, "w") as out:
+                if self.header:
+                    out.write(f"# {self.header}\n")
+                for i in range(0, len(f['ts']), 8192):
+                    rows = []
+                    for ts, b, cid, k, d in zip((f['ts'][i:i + 8192] + self.wall_offset).tolist(), f['bus'][i:i + 8192].tolist(),
+                                                f['ids'][i:i + 8192].tolist(), f['dlc'][i:i + 8192].tolist(), f['data'][i:i + 8192]):
+                        ident = f"{cid:08X}" if cid > 0x7FF else f"{cid:03X}"
+                        rows.append(f"({ts:.6f}) {self.bus_names[b]} {ident}#{d[:k].tobytes().hex().upper()}\n")
+                    out.write("".join(rows))
+                    time.sleep(0)
+            self.sig_done.emit(self.path, "")
+        except Exception as e:
+            self.sig_done.emit(self.path, str(e))
+
+
+def _hex(s: str) -> bytes:
+    return bytes.fromhex(s.replace(" ", "").replace(":", "")) if s else b""
+
+
+class CaptureEngine(QObject):
+    """Pre/post-trigger capture of raw frames, fed by FrameBus for every received frame.
+
+    Frame triggers (id / payload pattern) are checked in push(); signal triggers
+    watch the decoded record batches. On a trigger the ring keeps running until
+    `post_s` has passed, then the window [trigger - pre_s, trigger + post_s] is
+    copied out and written on a CaptureWriter thread. Further triggers are ignored
+    until the file is written (and for good unless `rearm`).
+    """
+    sig_state = Signal(str)          # "armed" | "triggered" | "writing" | "idle"
+    sig_saved = Signal(str, str)     # path, error message
+
+    def __init__(self, hub, conf: CaptureConf):
+        super().__init__(hub)
+        self.hub = hub
+        self.conf = conf
+        self.ring = FrameRing(conf.capacity, conf.width)
+        self.bus_names: List[str] = []
+        self._bus_idx: Dict[str, int] = {}
+        self._exact: Dict[int, List[Tuple[TriggerConf, bytes, bytes]]] = {}  # id -> frame triggers on that id
+        self._other: List[Tuple[TriggerConf, bytes, bytes]] = []     # masked-id and payload-only triggers
+        self._sig: List[Tuple[TriggerConf, Selection, bool]] = []    # signal triggers and last condition
+        for t in conf.triggers:
+            if t.signal and '.' in t.signal:
+                msg, sig = t.signal.split('.', 1)
+                self._sig.append((t, Selection(hub.registry, [(t.bus_name, msg, sig)]), False))
+            elif t.id is not None or t.data:
+                data = _hex(t.data); mask = _hex(t.mask) or bytes([0xFF] * len(data))
+                if t.id is not None and t.id_mask == 0x1FFFFFFF: self._exact.setdefault(t.id, []).append((t, data, mask))
+                else: self._other.append((t, data, mask))
+        self.state = "armed"
+        self.trigger_ts: Optional[float] = None
+        self.trigger_name = ""
+        self.saved: List[str] = []
+        self._writer: Optional[CaptureWriter] = None
+        self.timer = QTimer(self); self.timer.setInterval(100); self.timer.timeout.connect(self._check_post)
+        if self._sig:
+            hub.subscribe(self, [tuple(t.signal.split('.', 1)) for t, _, _ in self._sig])
+            hub.sig_batch.connect(self.on_batch)
+
+    def shutdown(self):
+        self.timer.stop()
+        try: self.hub.sig_batch.disconnect(self.on_batch)
+        except Exception: pass
+        self.hub.unsubscribe(self)
+        if self._writer is not None:
+            self._writer.wait(5000)
+
+    # -- feeding --
+    def push(self, bus_name: str, can_id: int, data: bytes, ts: float):
+        b = self._bus_idx.get(bus_name)
+        if b is None:
+            b = self._bus_idx[bus_name] = len(self.bus_names); self.bus_names.append(bus_name)
+        self.ring.push(b, can_id, data, ts)
+        if self.state != "armed":
+            return
+        for t, pat, mask in self._exact.get(can_id, ()):
+            if self._frame_match(t, bus_name, data, pat, mask):
+                self.fire(t.name or f"id 0x{can_id:X}", ts); return
+        for t, pat, mask in self._other:
+            if (t.id is None or (can_id & t.id_mask) == (t.id & t.id_mask)) and self._frame_match(t, bus_name, data, pat, mask):
+                self.fire(t.name or f"id 0x{can_id:X}", ts); return
+
+    @staticmethod
+    def _frame_match(t: TriggerConf, bus_name: str, data: bytes, pat: bytes, mask: bytes) -> bool:
+        if t.bus_name and t.bus_name != bus_name:
+            return False
+        if not pat:
+            return True
+        if len(data) < len(pat):
+            return False
+        return all((d & m) == (p & m) for d, p, m in zip(data, pat, mask))
+
+    @Slot(object)
+    def on_batch(self, batch):
+        for k, (t, sel, prev) in enumerate(self._sig):
+            rec = batch[sel.mask(batch['h'])]
+            if not len(rec):
+                continue
+            cond = _OPS.get(t.op, operator.gt)(rec['v'], t.value)
+            before = np.concatenate(([prev], cond[:-1]))
+            rising = np.flatnonzero(cond & ~before)
+            self._sig[k] = (t, sel, bool(cond[-1]))
+            if len(rising) and self.state == "armed":
+                self.fire(t.name or f"{t.signal} {t.op} {t.value:g}", float(rec['t'][rising[0]]))
+
+    # -- triggering --
+    def fire(self, name: str = "manual", ts: Optional[float] = None):
+        if self.state != "armed":
+            return
+        self.trigger_ts = time.monotonic() if ts is None else ts
+        self.trigger_name = name
+        self.state = "triggered"; self.sig_state.emit(self.state)
+        self.timer.start()
+
+    def rearm(self):
+        if self.state == "idle":
+            self.state = "armed"; self.sig_state.emit(self.state)
+
+    def _check_post(self):
+        if self.state != "triggered" or time.monotonic() < self.trigger_ts + self.conf.post_s:
+            return
+        self.timer.stop()
+        t0 = self.trigger_ts - self.conf.pre_s
+        oldest = self.ring.oldest_ts()
+        frames = self.ring.snapshot(t0, self.trigger_ts + self.conf.post_s)
+        note = ""
+        if self.ring.n > self.ring.capacity and oldest is not None and oldest > t0:
+            note = f"; ring too small, pre-trigger window starts {oldest - t0:.2f} s late"
+            print(f"[Capture] {self.trigger_name}{note}")
+        os.makedirs(self.conf.dir or ".", exist_ok=True)
+        wall = time.time() - time.monotonic()
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(self.trigger_ts + wall))
+        safe = "".join(c if c.isalnum() else "_" for c in self.trigger_name)[:40]
+        path = os.path.join(self.conf.dir or ".", f"capture_{stamp}_{safe}.log")
+        header = f"trigger {self.trigger_name} at {self.trigger_ts + wall:.6f}, pre {self.conf.pre_s:g} s, post {self.conf.post_s:g} s, {len(frames['ts'])} frames{note}"
+        self._writer = CaptureWriter(frames, self.bus_names, path, wall, header)
+        self._writer.sig_done.connect(self._on_written)
+        self.state = "writing"; self.sig_state.emit(self.state)
+        self._writer.start()
+
+    def _on_written(self, path: str, err: str):
+        self._writer = None
+        if not err: self.saved.append(path)
+        self.sig_saved.emit(path, err)
+        self.state = "idle"; self.sig_state.emit(self.state)
+        if self.conf.rearm:
+            self.rearm()
@@ -8,7 +8,7 @@ def _find_config_path() -> Optional[str]:
     if env and os.path.isfile(env):
         return env
 
-    for name in ("config.yaml"): 
+    for name in ("config.yaml",):
         p = os.path.join(os.getcwd(), name)
         if os.path.isfile(p):
             return p
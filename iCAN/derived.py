@@ -0,0 +1,266 @@
+from __future__ import annotations
+import ast
+from typing import Dict, List, Optional, Tuple, Any
+import numpy as np
+
+from .registry import SignalRegistry
+
+# Derived values are published through FrameBus under this bus/message name
+DERIVED_BUS = "DERIVED"
+DERIVED_MSG = "DERIVED"
+
+# Pure functions usable in expressions; all accept scalars or NumPy arrays
+FUNCS = {
+    'abs': np.abs, 'sqrt': np.sqrt, 'exp': np.exp, 'log': np.log, 'log10': np.log10,
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan, 'atan2': np.arctan2, 'hypot': np.hypot,
+    'min': np.minimum, 'max': np.maximum, 'clip': np.clip, 'where': np.where,
+    'floor': np.floor, 'ceil': np.ceil, 'round': np.round, 'sign': np.sign,
+}
+
+_ALLOWED = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp, ast.Call,
+    ast.Name, ast.Attribute, ast.Constant, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.USub, ast.UAdd,
+    ast.Gt, ast.GtE, ast.Lt, ast.LtE, ast.Eq, ast.NotEq, ast.And, ast.Or,
+)
+
+Ref = Tuple[Optional[str], str, str]  # (bus or None for any, message, signal)
+
+
+class MovingAverage:
+    """mavg(x, n): mean of the last n samples, carried across calls."""
+
+    def __init__(self):
+        self.hist = np.zeros(0)
+
+    def __call__(self, x, n):
+        n = max(1, int(n))
+        xs = np.atleast_1d(np.asarray(x, dtype=float))
+        buf = np.concatenate([self.hist, xs])
+        c = np.cumsum(np.concatenate([[0.0], buf]))
+        lo = np.maximum(np.arange(len(self.hist) + 1, len(buf) + 1) - n, 0)
+        hi = np.arange(len(self.hist) + 1, len(buf) + 1)
+        out = (c[hi] - c[lo]) / (hi - lo)
+        self.hist = buf[-(n - 1):] if n > 1 else np.zeros(0)
+        return out if np.ndim(x) else float(out[0])
+
+
+class Ema:
+    """ema(x, alpha): exponential moving average, carried across calls."""
+
+    def __init__(self):
+        self.y: Optional[float] = None
+
+    def __call__(self, x, alpha):
+        a = float(alpha)
+        xs = np.atleast_1d(np.asarray(x, dtype=float))
+        out = np.empty_like(xs)
+        y = self.y
+        for i, v in enumerate(xs):
+            y = v if y is None else y + a * (v - y)
+            out[i] = y
+        self.y = y
+        return out if np.ndim(x) else float(out[0])
+
+
+STATEFUL = {'mavg': MovingAverage, 'ema': Ema}
+
+
+class DerivedSignal:
+    """One expression parsed once and compiled to a code object over its inputs.
+
+    Signal references are ``Msg.Sig``, ``BUS.Msg.Sig`` or the bare name of another
+    derived signal. Each reference becomes a slot in the input vector ``_v``.
+    """
+
+    def __init__(self, name: str, expr: str, units: str = "", known_derived: Optional[List[str]] = None):
+        self.name = name
+        self.expr = expr
+        self.units = units
+        self.inputs: List[Ref] = []
+        self._states: List[Any] = []
+        known = set(known_derived or [])
+        tree = ast.parse(expr, mode='eval')
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED):
+                raise ValueError(f"{name}: unsupported syntax {type(node).__name__}")
+        outer = self
+
+        class _Rewrite(ast.NodeTransformer):
+            def _slot(self, ref: Ref, node):
+                if ref not in outer.inputs:
+                    outer.inputs.append(ref)
+                sub = ast.Subscript(value=ast.Name(id='_v', ctx=ast.Load()), slice=ast.Constant(outer.inputs.index(ref)), ctx=ast.Load())
+                return ast.copy_location(sub, node)
+
+            def visit_Attribute(self, node):
+                parts = []
+                cur = node
+                while isinstance(cur, ast.Attribute):
+                    parts.insert(0, cur.attr); cur = cur.value
+                if not isinstance(cur, ast.Name):
+                    raise ValueError(f"{outer.name}: bad signal reference")
+                parts.insert(0, cur.id)
+                if len(parts) == 2: return self._slot((None, parts[0], parts[1]), node)
+                if len(parts) == 3: return self._slot((parts[0], parts[1], parts[2]), node)
+                raise ValueError(f"{outer.name}: bad signal reference {'.'.join(parts)}")
+
+            def visit_Call(self, node):
+                if not isinstance(node.func, ast.Name):
+                    raise ValueError(f"{outer.name}: bad function call")
+                fn = node.func.id
+                node.args = [self.visit(a) for a in node.args]
+                if node.keywords:
+                    raise ValueError(f"{outer.name}: keyword arguments are not supported")
+                if fn in STATEFUL:
+                    # Each call site gets its own state object
+                    outer._states.append(STATEFUL[fn]())
+                    node.func = ast.Subscript(value=ast.Name(id='_st', ctx=ast.Load()), slice=ast.Constant(len(outer._states) - 1), ctx=ast.Load())
+                elif fn not in FUNCS:
+                    raise ValueError(f"{outer.name}: unknown function {fn}")
+                return node
+
+            def visit_Name(self, node):
+                if node.id in known:
+                    return self._slot((DERIVED_BUS, DERIVED_MSG, node.id), node)
+                raise ValueError(f"{outer.name}: unknown name {node.id}")
+
+        tree = ast.fix_missing_locations(_Rewrite().visit(tree))
+        self._code = compile(tree, f"<derived {name}>", 'eval')
+        self._globals = {'__builtins__': {}, '_st': self._states, **FUNCS}
+
+    def evaluate(self, values: List[Any]):
+        """Evaluate with one entry per input; entries may be scalars or equal-length arrays."""
+        return eval(self._code, self._globals, {'_v': values})
+
+
+class DerivedEngine:
+    """Holds all derived signals and evaluates them over each flushed record batch.
+
+    FrameBus hands every batch to feed_batch(). Records of the same frame (same
+    message and timestamp) form one row; every input is held at its latest value
+    across rows and batches, and each derived signal is evaluated once per batch
+    with NumPy arrays over the rows where one of its inputs changed.
+    """
+
+    def __init__(self, registry: Optional[SignalRegistry] = None):
+        self.registry = registry if registry is not None else SignalRegistry()
+        self.signals: Dict[str, DerivedSignal] = {}
+        self._order: List[DerivedSignal] = []
+        self._refs: List[Ref] = []  # inputs carried by frames (not other derived signals)
+        self._latest: Dict[Ref, float] = {}
+        # handle -> index into _refs for the bus-scoped and the any-bus reference, and a
+        # frame key; rebuilt when the definitions or the registry change
+        self._lut_bus = np.zeros(0, dtype=np.int32)
+        self._lut_any = np.zeros(0, dtype=np.int32)
+        self._lut_msg = np.zeros(0, dtype=np.int32)
+        self._lut_ver = -1
+
+    def names(self) -> List[str]:
+        return [d.name for d in self._order]
+
+    def inputs(self) -> List[Ref]:
+        """Every (bus, msg, sig) referenced by some derived signal, excluding derived ones."""
+        return list(self._refs)
+
+    def define(self, defs: List[Tuple[str, str, str]]):
+        """Replace all definitions with (name, expr, units) triples. Raises ValueError on bad input."""
+        names = [n for n, _, _ in defs]
+        sigs = {n: DerivedSignal(n, e, u, known_derived=names) for n, e, u in defs}
+        # Topological order so chained derived signals update in one pass
+        order: List[DerivedSignal] = []
+        state: Dict[str, int] = {}
+
+        def visit(n: str):
+            if state.get(n) == 2: return
+            if state.get(n) == 1: raise ValueError(f"derived signal cycle through {n}")
+            state[n] = 1
+            for r in sigs[n].inputs:
+                if r[1] == DERIVED_MSG: visit(r[2])
+            state[n] = 2; order.append(sigs[n])
+        for n in names: visit(n)
+        self.signals = sigs
+        self._order = order
+        self._refs = list(dict.fromkeys(r for d in order for r in d.inputs if r[1] != DERIVED_MSG))
+        self._latest = {}
+        self._lut_ver = -1
+
+    def _sync(self):
+        reg = self.registry
+        if self._lut_ver == reg.version:
+            return
+        idx = {r: i for i, r in enumerate(self._refs)}
+        n = len(reg)
+        self._lut_bus = np.full(n, -1, dtype=np.int32); self._lut_any = np.full(n, -1, dtype=np.int32)
+        self._lut_msg = np.zeros(n, dtype=np.int32)
+        frames: Dict[Tuple[str, str], int] = {}
+        for h, (bus, msg, sig) in enumerate(reg.keys):
+            if bus == DERIVED_BUS:
+                continue  # derived outputs are chained inside feed_batch
+            self._lut_bus[h] = idx.get((bus, msg, sig), -1)
+            self._lut_any[h] = idx.get((None, msg, sig), -1)
+            self._lut_msg[h] = frames.setdefault((bus, msg), len(frames))
+        self._lut_ver = reg.version
+
+    @staticmethod
+    def _hold(vals: np.ndarray, present: np.ndarray, prev: Optional[float]) -> Tuple[np.ndarray, np.ndarray]:
+        """(value held at each row, whether any value is known there yet)."""
+        last = np.where(present, np.arange(len(present)), -1)
+        np.maximum.accumulate(last, out=last)
+        known = last >= 0
+        held = vals[np.maximum(last, 0)]
+        if prev is not None:
+            held[~known] = prev; known[:] = True
+        return held, known
+
+    def feed_batch(self, batch: np.ndarray) -> List[Tuple[str, np.ndarray, np.ndarray]]:
+        """Evaluate over a batch of RECORD_DTYPE records.
+
+        Returns [(derived name, times, values)] for every derived signal that could be
+        computed at some row; rows where an input has never been seen are skipped.
+        """
+        if not self._refs or not len(batch):
+            return []
+        self._sync()
+        hs = batch['h']
+        rb, ra = self._lut_bus[hs], self._lut_any[hs]
+        sel = (rb >= 0) | (ra >= 0)
+        if not sel.any():
+            return []
+        rb, ra, v, t, key = rb[sel], ra[sel], batch['v'][sel], batch['t'][sel], self._lut_msg[hs[sel]]
+        new = np.ones(len(t), dtype=bool)
+        new[1:] = (t[1:] != t[:-1]) | (key[1:] != key[:-1])
+        row = np.cumsum(new) - 1
+        t_row = t[new]
+        n = len(t_row)
+        cols: Dict[Ref, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}  # ref -> (held, known, updated)
+        for i, ref in enumerate(self._refs):
+            m = (rb == i) | (ra == i)
+            present = np.zeros(n, dtype=bool); vals = np.zeros(n)
+            present[row[m]] = True; vals[row[m]] = v[m]
+            cols[ref] = (*self._hold(vals, present, self._latest.get(ref)), present)
+        out: List[Tuple[str, np.ndarray, np.ndarray]] = []
+        for d in self._order:
+            upd = np.zeros(n, dtype=bool); known = np.ones(n, dtype=bool)
+            for r in d.inputs:
+                if r not in cols:  # derived input that did not run in this batch
+                    prev = self._latest.get(r)
+                    cols[r] = (np.full(n, prev if prev is not None else 0.0), np.full(n, prev is not None), np.zeros(n, dtype=bool))
+                _, k, u = cols[r]
+                upd |= u; known &= k
+            due = upd & known
+            rows = np.flatnonzero(due)
+            if not len(rows):
+                continue
+            try:
+                res = np.broadcast_to(np.asarray(d.evaluate([cols[r][0][rows] for r in d.inputs]), dtype=float), rows.shape)
+            except Exception as e:
+                print(f"[Derived] {d.name}: {e}")
+                continue
+            out.append((d.name, t_row[rows], res))
+            vals = np.zeros(n); vals[rows] = res
+            ref = (DERIVED_BUS, DERIVED_MSG, d.name)
+            cols[ref] = (*self._hold(vals, due, self._latest.get(ref)), due)
+        for ref, (held, known, _) in cols.items():
+            if known[-1]: self._latest[ref] = float(held[-1])
+        return out
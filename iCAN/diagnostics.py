@@ -0,0 +1,156 @@
+from __future__ import annotations
+import json, os, sys, threading, time, traceback
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional, Tuple
+from PySide6.QtCore import QObject, QTimer
+
+
+def _thread_names() -> Dict[int, str]:
+    names = {t.ident: t.name for t in threading.enumerate() if t.ident is not None}
+    names[threading.main_thread().ident] = "GUI"
+    return names
+
+
+def _frame_key(f) -> str:
+    co = f.f_code
+    return f"{co.co_name} ({os.path.basename(co.co_filename)}:{co.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples the Python stacks of every thread (GUI, BusReaders, ...) at a fixed rate.
+
+    Runs on its own daemon thread using sys._current_frames(), so nothing is
+    instrumented and the cost is one stack walk per thread per sample. Results are
+    written as collapsed stacks (``thread;outer;...;inner count``, flamegraph.pl /
+    speedscope input) or as a speedscope JSON profile.
+    """
+
+    def __init__(self, interval_ms: float = 5.0):
+        self.interval_s = max(0.001, float(interval_ms) / 1000.0)
+        self.stacks: Counter = Counter()   # (thread name, frame keys outer->inner) -> samples
+        self.samples = 0
+        self.started = 0.0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.stacks.clear(); self.samples = 0
+        self._stop.clear()
+        self.started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="SamplingProfiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set(); self._thread.join(1.0); self._thread = None
+        self.elapsed = time.monotonic() - self.started
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            names = _thread_names()
+            for ident, frame in sys._current_frames().items():
+                tname = names.get(ident, f"thread-{ident}")
+                if ident == me or tname == "StallWatchdog":
+                    continue
+                keys = []
+                while frame is not None:
+                    keys.append(_frame_key(frame)); frame = frame.f_back
+                keys.reverse()
+                self.stacks[(tname, tuple(keys))] += 1
+            self.samples += 1
+
+    def write(self, path: str):
+        """Write speedscope JSON for ``*.json`` paths, collapsed stacks otherwise."""
+        if path.lower().endswith(".json"):
+            with open(path, "w") as f:
+                json.dump(self._speedscope(), f)
+        else:
+            with open(path, "w") as f:
+                for (tname, keys), n in self.stacks.most_common():
+                    f.write(";".join((tname,) + keys).replace(" ", "_") + f" {n}\n")
+
+    def _speedscope(self) -> dict:
+        frames: List[dict] = []
+        index: Dict[str, int] = {}
+        by_thread: Dict[str, Tuple[List[List[int]], List[float]]] = {}
+        for (tname, keys), n in self.stacks.items():
+            ids = []
+            for k in keys:
+                if k not in index:
+                    index[k] = len(frames); frames.append({"name": k})
+                ids.append(index[k])
+            samples, weights = by_thread.setdefault(tname, ([], []))
+            samples.append(ids); weights.append(n * self.interval_s * 1000.0)
+        profiles = [{"type": "sampled", "name": tname, "unit": "milliseconds", "startValue": 0,
+                     "endValue": sum(w), "samples": s, "weights": w} for tname, (s, w) in sorted(by_thread.items())]
+        return {"$schema": "https://www.speedscope.app/file-format-schema.json", "exporter": "iCAN",
+                "shared": {"frames": frames}, "profiles": profiles}
+
+
+class StallWatchdog(QObject):
+    """Measures Qt event-loop latency and captures the GUI stack when it blocks.
+
+    A GUI-thread timer records a heartbeat every `interval_ms`; its lateness is the
+    event-loop lag. A monitor thread checks the heartbeat and, once the GUI thread
+    has been silent for `threshold_ms`, snapshots the GUI thread's stack (the slot
+    that is blocking) and logs it. Each stall is reported once.
+    """
+    MAX_REPORTS = 50
+
+    def __init__(self, parent: Optional[QObject] = None, threshold_ms: float = 250.0, interval_ms: int = 50):
+        super().__init__(parent)
+        self.threshold_s = max(0.02, float(threshold_ms) / 1000.0)
+        self.interval_s = interval_ms / 1000.0
+        self.lag_ms = 0.0       # EMA of heartbeat lateness
+        self.max_lag_ms = 0.0
+        self.reports: Deque[str] = deque(maxlen=self.MAX_REPORTS)
+        self._gui_ident = threading.get_ident()
+        self._beat = time.monotonic()
+        self._reported = False  # current stall already logged
+        self._lock = threading.Lock()
+        self.timer = QTimer(self); self.timer.setInterval(interval_ms); self.timer.timeout.connect(self._heartbeat)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._monitor, name="StallWatchdog", daemon=True)
+
+    def start(self):
+        self._beat = time.monotonic()
+        self.timer.start(); self._thread.start()
+
+    def stop(self):
+        self.timer.stop(); self._stop.set()
+
+    def _heartbeat(self):
+        now = time.monotonic()
+        with self._lock:
+            gap = now - self._beat
+            self._beat = now
+            stalled, self._reported = self._reported, False
+        lag = max(0.0, (gap - self.interval_s) * 1000.0)
+        self.lag_ms += 0.1 * (lag - self.lag_ms)
+        self.max_lag_ms = max(self.max_lag_ms, lag)
+        if stalled:
+            self._log(f"[Stall] GUI thread resumed after {gap * 1000.0:.0f} ms")
+
+    def _monitor(self):
+        while not self._stop.wait(self.threshold_s / 4):
+            with self._lock:
+                silent = time.monotonic() - self._beat
+                if silent < self.threshold_s or self._reported:
+                    continue
+                self._reported = True
+            frame = sys._current_frames().get(self._gui_ident)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "(no Python frame)\n"
+            self._log(f"[Stall] {time.strftime('%H:%M:%S')} GUI thread blocked > {silent * 1000.0:.0f} ms in:\n{stack}")
+
+    def _log(self, text: str):
+        self.reports.append(text)
+        print(text, file=sys.stderr, flush=True)
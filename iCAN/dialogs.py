@@ -1,31 +1,97 @@
 from __future__ import annotations
+import os
 from typing import Dict, Optional, Any, List
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QFormLayout, QComboBox, QLineEdit, QDoubleSpinBox, QSpinBox,
     QCheckBox, QLabel, QWidget, QHBoxLayout, QDialogButtonBox, QGroupBox, QColorDialog, QPushButton,
-    QPlainTextEdit
+    QPlainTextEdit, QListWidget, QListWidgetItem, QFileDialog
 )
+from PySide6.QtCore import Qt, QTimer, Signal
+from PySide6.QtGui import QStandardItemModel, QStandardItem
+from PySide6.QtWidgets import QCompleter
 import cantools
 
-from .models import PanelConf, BusConf
+from .models import PanelConf, BusConf, DerivedConf
 from .bus import FrameBus
+from .signal_index import SignalIndex
+from .overload import PRIORITIES
 
 
-PANEL_TYPES = ["plot", "multiplot", "gauge", "value", "led", "table"]
+PANEL_TYPES = ["plot", "multiplot", "stats", "bytemap", "timing", "trace", "gauge", "value", "led", "table", "alarm"]
+
+
+class SignalPicker(QLineEdit):
+    """Type-to-filter signal chooser backed by a prebuilt SignalIndex.
+
+    The completion popup is filled from index searches as the user types (at most
+    `limit` rows), so nothing is populated up front regardless of DBC size. The
+    chosen signal is shown as ``Msg.Sig``.
+    """
+    selection_changed = Signal(str, str)  # msg_name, sig_name
+
+    def __init__(self, index: SignalIndex, parent=None, limit: int = 200):
+        super().__init__(parent)
+        self.index = index
+        self.limit = limit
+        self.setPlaceholderText("Type to search messages, signals, units, comments…")
+        self._model = QStandardItemModel(self)
+        self._completer = QCompleter(self._model, self)
+        self._completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self._completer.setCompletionRole(Qt.UserRole)
+        self._completer.setMaxVisibleItems(15)
+        self.setCompleter(self._completer)
+        self._completer.activated[str].connect(self._on_chosen)
+        self._debounce = QTimer(self); self._debounce.setSingleShot(True); self._debounce.setInterval(120)
+        self._debounce.timeout.connect(self._update_results)
+        self.textEdited.connect(lambda _: self._debounce.start())
+        self.editingFinished.connect(lambda: self.selection_changed.emit(*self.selection()))
+
+    def _update_results(self):
+        self._model.clear()
+        for e in self.index.search(self.text(), self.limit):
+            extra = " ".join(x for x in (f"[{e.unit}]" if e.unit else "", e.comment[:60]) if x)
+            it = QStandardItem(f"{e.ref}  {extra}".rstrip())
+            it.setData(e.ref, Qt.UserRole)
+            self._model.appendRow(it)
+        self._completer.complete()
+
+    def _on_chosen(self, ref: str):
+        self.setText(ref)
+        self.selection_changed.emit(*self.selection())
+
+    def mousePressEvent(self, ev):
+        super().mousePressEvent(ev)
+        if self.isEnabled() and not self._completer.popup().isVisible():
+            self._update_results()
+
+    def set_selection(self, msg_name: Optional[str], sig_name: Optional[str]):
+        self.setText(f"{msg_name}.{sig_name}" if msg_name and sig_name else "")
+
+    def selection(self) -> tuple:
+        """(msg_name, sig_name) of a valid choice, else (None, None)."""
+        text = self.text().strip()
+        if '.' in text:
+            msg, sig = text.split('.', 1)
+            if self.index.lookup(msg, sig):
+                return msg, sig
+        return None, None
 
 
 class PanelConfigDialog(QDialog):
-    def __init__(self, parent, buses: Dict[str, Any], dbc: Optional[cantools.database.Database], default_type="value", existing: Optional[PanelConf]=None):
+    def __init__(self, parent, buses: Dict[str, Any], dbc: Optional[cantools.database.Database], default_type="value", existing: Optional[PanelConf]=None, index: Optional[SignalIndex]=None):
         super().__init__(parent)
         self.setWindowTitle("Add Panel")
         self.dbc = dbc
         self.buses = buses
+        if index is None:
+            index = SignalIndex(); index.build(dbc)
+        self.index = index
         self.type_cb = QComboBox(); self.type_cb.addItems(PANEL_TYPES); self.type_cb.setCurrentText(default_type)
         self.title_le = QLineEdit(default_type.title())
         self.bus_cb = QComboBox(); self.bus_cb.addItem("(any)")
         for bname in buses.keys(): self.bus_cb.addItem(bname)
         self.use_dbc_chk = QCheckBox("Bind to DBC signal"); self.use_dbc_chk.setChecked(True if dbc else False); self.use_dbc_chk.setEnabled(bool(dbc))
-        self.msg_cb = QComboBox(); self.sig_cb = QComboBox()
+        self.sig_pick = SignalPicker(self.index)
         self.units_le = QLineEdit("")
         self.color_le = QLineEdit("")
         self.color_btn = QPushButton("Pick…"); self.color_btn.clicked.connect(self._pick_color)
@@ -33,6 +99,16 @@ class PanelConfigDialog(QDialog):
         self.min_d = QDoubleSpinBox(); self.min_d.setRange(-1e12, 1e12); self.min_d.setValue(0.0)
         self.max_d = QDoubleSpinBox(); self.max_d.setRange(-1e12, 1e12); self.max_d.setValue(100.0)
         self.plot_win = QDoubleSpinBox(); self.plot_win.setRange(0.5, 300.0); self.plot_win.setValue(10.0)
+        self.rate_d = QDoubleSpinBox(); self.rate_d.setRange(0.1, 30.0); self.rate_d.setSuffix(" Hz"); self.rate_d.setValue(2.0)
+        self.bins_s = QSpinBox(); self.bins_s.setRange(5, 1000); self.bins_s.setValue(50)
+        self.fft_cb = QComboBox(); self.fft_cb.addItems([str(1 << k) for k in range(7, 15)]); self.fft_cb.setCurrentText("1024")
+        self.heat_mode_cb = QComboBox(); self.heat_mode_cb.addItems(["changes", "bytes", "bits"])
+        self.heat_id_le = QLineEdit(""); self.heat_id_le.setPlaceholderText("CAN ID for bits mode, e.g. 0x123")
+        self.trace_n = QSpinBox(); self.trace_n.setRange(10000, 5000000); self.trace_n.setSingleStep(50000); self.trace_n.setValue(200000)
+        self.hyst_d = QDoubleSpinBox(); self.hyst_d.setRange(0.0, 1e9); self.hyst_d.setDecimals(3); self.hyst_d.setValue(0.0)
+        self.debounce_d = QDoubleSpinBox(); self.debounce_d.setRange(0.0, 60000.0); self.debounce_d.setSuffix(" ms"); self.debounce_d.setValue(0.0)
+        self._trace_filters = ("", "")  # edited in the trace panel itself; kept across edits
+        self.prio_cb = QComboBox(); self.prio_cb.addItems(PRIORITIES); self.prio_cb.setCurrentText("normal")
         form = QFormLayout()
 
         # Keep references to labels/fields to toggle visibility by type
@@ -49,8 +125,7 @@ class PanelConfigDialog(QDialog):
         # DBC bind checkbox as standalone row
         form.addRow(self.use_dbc_chk)
         self._rows["use_dbc"] = (self.use_dbc_chk, self.use_dbc_chk)
-        add_row("msg", "Message:", self.msg_cb)
-        add_row("sig", "Signal:", self.sig_cb)
+        add_row("sig", "Signal:", self.sig_pick)
         add_row("units", "Units:", self.units_le)
         _rowc = QHBoxLayout(); _wrapc = QWidget(); _wrapc.setLayout(_rowc)
         _rowc.addWidget(self.color_le); _rowc.addWidget(self.color_btn)
@@ -62,16 +137,24 @@ class PanelConfigDialog(QDialog):
         add_row("min", "Min:", self.min_d)
         add_row("max", "Max:", self.max_d)
         add_row("plotwin", "Plot Window (s):", self.plot_win)
+        add_row("rate", "Update Rate:", self.rate_d)
+        add_row("bins", "Histogram Bins:", self.bins_s)
+        add_row("fft", "FFT Segment:", self.fft_cb)
+        add_row("heat_mode", "Map:", self.heat_mode_cb)
+        add_row("heat_id", "CAN ID:", self.heat_id_le)
+        add_row("trace_n", "Frames Kept:", self.trace_n)
         add_row("led_rules", "LED Rules:", self.led_rules)
+        add_row("hyst", "Hysteresis:", self.hyst_d)
+        add_row("debounce", "Debounce:", self.debounce_d)
+        add_row("priority", "Priority:", self.prio_cb)
         v = QVBoxLayout(self)
         v.addLayout(form)
         btns = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         v.addWidget(btns)
         btns.accepted.connect(self.accept); btns.rejected.connect(self.reject)
-        self.use_dbc_chk.toggled.connect(self._refresh_msg_sig)
+        self.use_dbc_chk.toggled.connect(self.sig_pick.setEnabled)
         self.type_cb.currentTextChanged.connect(self._type_changed)
-        self._populate_dbc()
-        self._refresh_msg_sig(True if self.dbc else False)
+        self.sig_pick.setEnabled(bool(self.dbc))
         self._sync_visibility()
         if existing:
             self._apply_existing(existing)
@@ -80,22 +163,6 @@ class PanelConfigDialog(QDialog):
     def _type_changed(self, _):
         self._sync_visibility()
 
-    def _populate_dbc(self):
-        self.msg_cb.clear(); self.sig_cb.clear()
-        if not self.dbc:
-            return
-        names = [m.name for m in self.dbc.messages]
-        self.msg_cb.addItems(["(choose)"] + names)
-
-    def _refresh_msg_sig(self, on: bool):
-        self.msg_cb.setEnabled(on); self.sig_cb.setEnabled(on)
-        if on and self.dbc:
-            self.sig_cb.clear(); msg_name = self.msg_cb.currentText()
-            if msg_name and msg_name != "(choose)":
-                msg = self.dbc.get_message_by_name(msg_name)
-                self.sig_cb.addItems([s.name for s in msg.signals])
-        self.msg_cb.currentTextChanged.connect(lambda _: self._refresh_msg_sig(True))
-
 
     def _pick_color(self):
         col = QColorDialog.getColor()
@@ -112,27 +179,35 @@ class PanelConfigDialog(QDialog):
     def _sync_visibility(self):
         t = self.type_cb.currentText()
         # Which sections apply
-        is_plot = (t == "plot")
+        is_plot = t in ("plot", "stats")
         is_led = (t == "led")
-        is_rx = t in ("value", "gauge", "plot", "led", "table")
+        is_stats = (t == "stats")
+        is_rx = t in ("value", "gauge", "plot", "stats", "led", "table", "bytemap", "timing", "trace")
         is_tx = False
         uses_minmax = t in ("slider", "gauge", "value", "plot")
-        uses_units = t in ("slider", "gauge", "value", "plot")
-        uses_plotwin = t in ("plot",)
+        uses_units = t in ("slider", "gauge", "value", "plot", "stats")
+        uses_plotwin = t in ("plot", "stats")
         # DBC bind visibility for rx widgets except table; requires a global DBC
-        show_dbc = (t in ("value", "gauge", "plot", "led")) and bool(self.dbc)
+        show_dbc = (t in ("value", "gauge", "plot", "stats", "led")) and bool(self.dbc)
         # Apply row visibility
         self._set_row_visible("units", uses_units)
         self._set_row_visible("min", uses_minmax)
         self._set_row_visible("max", uses_minmax)
         self._set_row_visible("plotwin", uses_plotwin)
         self._set_row_visible("color", is_plot)
+        self._set_row_visible("rate", is_stats or t == "timing")
+        self._set_row_visible("bins", is_stats)
+        self._set_row_visible("fft", is_stats)
+        self._set_row_visible("heat_mode", t == "bytemap")
+        self._set_row_visible("heat_id", t == "bytemap")
+        self._set_row_visible("trace_n", t == "trace")
         self._set_row_visible("led_rules", is_led)
+        self._set_row_visible("hyst", is_led)
+        self._set_row_visible("debounce", is_led)
         # Bus always relevant
         self._set_row_visible("bus", True)
         # DBC rows
         self.use_dbc_chk.setVisible(show_dbc)
-        self._set_row_visible("msg", show_dbc)
         self._set_row_visible("sig", show_dbc)
         # No TX group
 
@@ -143,19 +218,20 @@ class PanelConfigDialog(QDialog):
             self.bus_cb.setCurrentText(conf.bus_name or "(any)")
             self.use_dbc_chk.setChecked(conf.use_dbc)
             if conf.use_dbc and conf.msg_name:
-                # Ensure messages list is from the global DBC
-                if self.dbc:
-                    self.msg_cb.clear(); self.msg_cb.addItems(["(choose)"] + [m.name for m in self.dbc.messages])
-                self.msg_cb.setCurrentText(conf.msg_name)
-                self._refresh_msg_sig(True)
-                if conf.sig_name:
-                    self.sig_cb.setCurrentText(conf.sig_name)
+                self.sig_pick.set_selection(conf.msg_name, conf.sig_name)
             self.units_le.setText(conf.units or "")
             self.min_d.setValue(conf.min_val); self.max_d.setValue(conf.max_val)
             self.plot_win.setValue(conf.plot_window_s)
+            self.rate_d.setValue(conf.stats_rate_hz); self.bins_s.setValue(conf.stats_bins); self.fft_cb.setCurrentText(str(conf.fft_size))
             if conf.color: self.color_le.setText(conf.color)
+            self.heat_mode_cb.setCurrentText(conf.heat_mode or "changes")
+            if conf.heat_id is not None: self.heat_id_le.setText(f"0x{conf.heat_id:X}")
+            self.trace_n.setValue(conf.trace_frames)
+            self._trace_filters = (conf.trace_ids, conf.trace_data)
+            self.prio_cb.setCurrentText(conf.priority or "normal")
             try:
                 self.led_rules.setPlainText("\n".join(conf.led_rules or []))
+                self.hyst_d.setValue(conf.rule_hysteresis); self.debounce_d.setValue(conf.rule_debounce_ms)
             except Exception:
                 pass
         except Exception:
@@ -163,17 +239,18 @@ class PanelConfigDialog(QDialog):
 
     def get_panel_conf(self, panel_id: str) -> Optional[PanelConf]:
         t = self.type_cb.currentText()
-        # Special case: table panel doesn't bind to one message/signal
-        if t == 'table':
+        # Special case: table/alarm panels don't bind to one message/signal
+        if t in ('table', 'alarm', 'bytemap', 'timing', 'trace'):
             use_dbc = False
             msg_name = None
             sig_name = None
         else:
             use_dbc = self.use_dbc_chk.isChecked() and bool(self.dbc)
-            msg_name = self.msg_cb.currentText() if use_dbc and self.msg_cb.currentText() != "(choose)" else None
-            sig_name = self.sig_cb.currentText() if use_dbc and self.sig_cb.currentText() else None
+            msg_name, sig_name = self.sig_pick.selection() if use_dbc else (None, None)
         bus_name = self.bus_cb.currentText();
         if bus_name == "(any)": bus_name = None
+        try: heat_id = int(self.heat_id_le.text().strip(), 0) if self.heat_id_le.text().strip() else None
+        except ValueError: heat_id = None
         conf = PanelConf(
             panel_id=panel_id,
             panel_type=t,
@@ -187,30 +264,47 @@ class PanelConfigDialog(QDialog):
             min_val=self.min_d.value(),
             max_val=self.max_d.value(),
             plot_window_s=self.plot_win.value(),
-            tx=None,
-            led_rules=[ln.strip() for ln in self.led_rules.toPlainText().splitlines() if ln.strip()]
+            stats_rate_hz=self.rate_d.value(),
+            stats_bins=self.bins_s.value(),
+            fft_size=int(self.fft_cb.currentText()),
+            heat_mode=self.heat_mode_cb.currentText(),
+            heat_id=heat_id,
+            trace_frames=self.trace_n.value(),
+            trace_ids=self._trace_filters[0],
+            trace_data=self._trace_filters[1],
+            led_rules=[ln.strip() for ln in self.led_rules.toPlainText().splitlines() if ln.strip()],
+            rule_hysteresis=self.hyst_d.value(),
+            rule_debounce_ms=self.debounce_d.value(),
+            priority=self.prio_cb.currentText(),
         )
         # No transmit binding
         return conf
 
 
 class MultiPlotConfigDialog(QDialog):
-    def __init__(self, parent, buses: Dict[str, Any], dbc: Optional[cantools.database.Database], existing: Optional[PanelConf]=None):
+    def __init__(self, parent, buses: Dict[str, Any], dbc: Optional[cantools.database.Database], existing: Optional[PanelConf]=None, index: Optional[SignalIndex]=None):
         super().__init__(parent)
         self.setWindowTitle("Add Multi-Plot Panel")
         self.buses = buses
         self.dbc = dbc
+        if index is None:
+            index = SignalIndex(); index.build(dbc)
+        self.index = index
         self.rows: List[Dict[str, Any]] = []
         v = QVBoxLayout(self)
         self.title_le = QLineEdit("MultiPlot")
         self.plot_win = QDoubleSpinBox(); self.plot_win.setRange(0.5, 300.0); self.plot_win.setValue(10.0)
-        form = QFormLayout(); form.addRow("Title:", self.title_le); form.addRow("Plot Window (s):", self.plot_win)
+        self.prio_cb = QComboBox(); self.prio_cb.addItems(PRIORITIES); self.prio_cb.setCurrentText("normal")
+        form = QFormLayout(); form.addRow("Title:", self.title_le); form.addRow("Plot Window (s):", self.plot_win); form.addRow("Priority:", self.prio_cb)
         v.addLayout(form)
         self.rows_box = QVBoxLayout(); v.addLayout(self.rows_box)
         btn_row = QHBoxLayout(); self.btn_add = QPushButton("Add Signal"); self.btn_add.clicked.connect(self._add_row)
         btn_row.addWidget(self.btn_add); v.addLayout(btn_row)
         btns = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel); v.addWidget(btns)
         btns.accepted.connect(self.accept); btns.rejected.connect(self.reject)
+        if existing:
+            self.title_le.setText(existing.title); self.plot_win.setValue(existing.plot_window_s)
+            self.prio_cb.setCurrentText(existing.priority or "normal")
         if existing and existing.multi_signals:
             for it in existing.multi_signals:
                 self._add_row_prefill(it)
@@ -221,28 +315,19 @@ class MultiPlotConfigDialog(QDialog):
         roww = QWidget(); row = QHBoxLayout(roww)
         bus_cb = QComboBox(); bus_cb.addItem("(any)");
         for bname in self.buses.keys(): bus_cb.addItem(bname)
-        msg_cb = QComboBox(); sig_cb = QComboBox(); color_le = QLineEdit(""); color_btn = QPushButton("Pick…")
+        sig_pick = SignalPicker(self.index); sig_pick.setMinimumWidth(260); sig_pick.setEnabled(bool(self.dbc))
+        color_le = QLineEdit(""); color_btn = QPushButton("Pick…")
         def pick():
             col = QColorDialog.getColor();
             if col.isValid(): color_le.setText(col.name())
         color_btn.clicked.connect(pick)
-        if self.dbc:
-            names = [m.name for m in self.dbc.messages]
-            msg_cb.addItems(["(choose)"] + names)
-            def on_msg_change(_):
-                sig_cb.clear(); name = msg_cb.currentText()
-                if name and name != "(choose)":
-                    msg = self.dbc.get_message_by_name(name)
-                    sig_cb.addItems([s.name for s in msg.signals])
-            msg_cb.currentTextChanged.connect(on_msg_change); on_msg_change("")
         rm_btn = QPushButton("Remove")
         row.addWidget(QLabel("Bus:")); row.addWidget(bus_cb)
-        row.addWidget(QLabel("Msg:")); row.addWidget(msg_cb)
-        row.addWidget(QLabel("Sig:")); row.addWidget(sig_cb)
+        row.addWidget(QLabel("Signal:")); row.addWidget(sig_pick, 1)
         row.addWidget(QLabel("Color:")); row.addWidget(color_le); row.addWidget(color_btn)
         row.addWidget(rm_btn)
         self.rows_box.addWidget(roww)
-        rec = {'bus': bus_cb, 'msg': msg_cb, 'sig': sig_cb, 'color': color_le, 'roww': roww}
+        rec = {'bus': bus_cb, 'sig': sig_pick, 'color': color_le, 'roww': roww}
         self.rows.append(rec)
         def remove():
             try:
@@ -255,14 +340,7 @@ class MultiPlotConfigDialog(QDialog):
         self._add_row(); rec = self.rows[-1]
         try:
             rec['bus'].setCurrentText(item.get('bus_name') or "(any)")
-            if self.dbc and item.get('msg_name'):
-                rec['msg'].setCurrentText(item['msg_name'])
-                try:
-                    rec['msg'].currentTextChanged.emit(rec['msg'].currentText())
-                except Exception:
-                    pass
-            if item.get('sig_name'):
-                rec['sig'].setCurrentText(item['sig_name'])
+            rec['sig'].set_selection(item.get('msg_name'), item.get('sig_name'))
             rec['color'].setText(item.get('color') or "")
         except Exception:
             pass
@@ -271,8 +349,7 @@ class MultiPlotConfigDialog(QDialog):
         items: List[Dict[str, str]] = []
         for r in self.rows:
             bus = r['bus'].currentText(); bus = None if bus == "(any)" else bus
-            msg = r['msg'].currentText() if r['msg'].currentText() != "(choose)" else None
-            sig = r['sig'].currentText() or None
+            msg, sig = r['sig'].selection()
             if not msg or not sig: continue
             items.append({'bus_name': bus or '', 'msg_name': msg, 'sig_name': sig, 'color': r['color'].text().strip()})
         if not items:
@@ -280,7 +357,8 @@ class MultiPlotConfigDialog(QDialog):
         norm_items = []
         for it in items:
             norm_items.append({'bus_name': it['bus_name'] or None, 'msg_name': it['msg_name'], 'sig_name': it['sig_name'], 'color': it['color'] or None})
-        return PanelConf(panel_id=panel_id, panel_type='multiplot', title=self.title_le.text().strip() or 'MultiPlot', use_dbc=True, plot_window_s=self.plot_win.value(), multi_signals=norm_items)
+        return PanelConf(panel_id=panel_id, panel_type='multiplot', title=self.title_le.text().strip() or 'MultiPlot', use_dbc=True, plot_window_s=self.plot_win.value(), multi_signals=norm_items,
+                         priority=self.prio_cb.currentText())
 
 
 class BusConfigDialog(QDialog):
@@ -295,13 +373,89 @@ class BusConfigDialog(QDialog):
             iface = QComboBox(); iface.addItems(["virtual", "pcan"]); iface.setCurrentText(buses[key].interface)
             chan = QLineEdit(buses[key].channel)
             rate = QComboBox(); rate.addItems(["125000","250000","500000","800000","1000000"]); rate.setCurrentText(str(buses[key].bitrate))
-            form.addRow(enabled); form.addRow("Interface:", iface); form.addRow("Channel:", chan); form.addRow("Bitrate:", rate)
-            v.addWidget(group); self.widgets[key] = dict(enabled=enabled, iface=iface, chan=chan, rate=rate)
+            dbc = QLineEdit("; ".join(buses[key].dbc)); dbc.setPlaceholderText("(global DBC)")
+            browse = QPushButton("Browse…"); browse.clicked.connect(lambda _, le=dbc: self._browse_dbc(le))
+            dbc_row = QWidget(); hl = QHBoxLayout(dbc_row); hl.setContentsMargins(0, 0, 0, 0); hl.addWidget(dbc, 1); hl.addWidget(browse)
+            form.addRow(enabled); form.addRow("Interface:", iface); form.addRow("Channel:", chan); form.addRow("Bitrate:", rate); form.addRow("DBC:", dbc_row)
+            v.addWidget(group); self.widgets[key] = dict(enabled=enabled, iface=iface, chan=chan, rate=rate, dbc=dbc)
         btns = QDialogButtonBox(QDialogButtonBox.Ok|QDialogButtonBox.Cancel); v.addWidget(btns)
         btns.accepted.connect(self.accept); btns.rejected.connect(self.reject)
 
+    def _browse_dbc(self, le: QLineEdit):
+        paths, _ = QFileDialog.getOpenFileNames(self, "DBC Files for Bus (merged in order)", "", "DBC Files (*.dbc)")
+        if paths: le.setText("; ".join(paths))
+
     def result_buses(self) -> Dict[str, BusConf]:
         out: Dict[str, BusConf] = {}
         for key, w in self.widgets.items():
-            out[key] = BusConf(enabled=w['enabled'].isChecked(), interface=w['iface'].currentText(), channel=w['chan'].text().strip(), bitrate=int(w['rate'].currentText()), name=key)
+            dbc = [p.strip() for p in w['dbc'].text().split(';') if p.strip()]
+            out[key] = BusConf(enabled=w['enabled'].isChecked(), interface=w['iface'].currentText(), channel=w['chan'].text().strip(), bitrate=int(w['rate'].currentText()), name=key, dbc=dbc)
+        return out
+
+
+class DerivedSignalsDialog(QDialog):
+    """Edit derived signals as text, one `name = expression  # units` per line."""
+
+    def __init__(self, parent, derived: List[DerivedConf]):
+        super().__init__(parent)
+        self.setWindowTitle("Derived Signals")
+        v = QVBoxLayout(self)
+        v.addWidget(QLabel("One signal per line: name = expression  # units\n"
+                           "Inputs: Msg.Sig or BUS.Msg.Sig; other derived signals by name.\n"
+                           "Functions: abs, min, max, sqrt, clip, where, …, mavg(x, n), ema(x, alpha)"))
+        self.text = QPlainTextEdit()
+        self.text.setPlaceholderText("power = Battery.Voltage * Battery.Current  # W\nwheel_speed_avg = (Wheels.FL + Wheels.FR + Wheels.RL + Wheels.RR) / 4")
+        self.text.setPlainText("\n".join(f"{d.name} = {d.expr}" + (f"  # {d.units}" if d.units else "") for d in derived))
+        v.addWidget(self.text)
+        btns = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel); v.addWidget(btns)
+        btns.accepted.connect(self.accept); btns.rejected.connect(self.reject)
+        self.resize(640, 320)
+
+    def result_derived(self) -> List[DerivedConf]:
+        out: List[DerivedConf] = []
+        for ln in self.text.toPlainText().splitlines():
+            ln = ln.strip()
+            if not ln or ln.startswith('#'): continue
+            units = ""
+            if '#' in ln:
+                ln, units = ln.split('#', 1); units = units.strip()
+            if '=' not in ln:
+                raise ValueError(f"missing '=' in: {ln}")
+            name, expr = ln.split('=', 1)
+            out.append(DerivedConf(name=name.strip(), expr=expr.strip(), units=units))
         return out
+
+
+class ExportDialog(QDialog):
+    """Choose which signals to export, the format and the output file."""
+
+    def __init__(self, parent, names: List[str], formats: List[str], filters: Dict[str, str]):
+        super().__init__(parent)
+        self.setWindowTitle("Export History")
+        self.filters = filters
+        v = QVBoxLayout(self)
+        self.sig_list = QListWidget()
+        for n in names:
+            it = QListWidgetItem(n); it.setFlags(it.flags() | Qt.ItemIsUserCheckable); it.setCheckState(Qt.Checked)
+            self.sig_list.addItem(it)
+        self.fmt_cb = QComboBox(); self.fmt_cb.addItems(formats)
+        self.path_le = QLineEdit("")
+        browse = QPushButton("Browse…"); browse.clicked.connect(self._browse)
+        _row = QHBoxLayout(); _wrap = QWidget(); _wrap.setLayout(_row); _row.addWidget(self.path_le); _row.addWidget(browse)
+        form = QFormLayout(); form.addRow("Format:", self.fmt_cb); form.addRow("File:", _wrap)
+        v.addWidget(QLabel("Signals:")); v.addWidget(self.sig_list); v.addLayout(form)
+        btns = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel); v.addWidget(btns)
+        btns.accepted.connect(self.accept); btns.rejected.connect(self.reject)
+
+    def _browse(self):
+        fmt = self.fmt_cb.currentText()
+        fn, _ = QFileDialog.getSaveFileName(self, "Export History", f"history.{fmt}", self.filters.get(fmt, ""))
+        if fn: self.path_le.setText(fn)
+
+    def selected(self) -> List[str]:
+        return [self.sig_list.item(i).text() for i in range(self.sig_list.count()) if self.sig_list.item(i).checkState() == Qt.Checked]
+
+    def export_choice(self) -> tuple:
+        fmt = self.fmt_cb.currentText(); path = self.path_le.text().strip()
+        if path and not os.path.splitext(path)[1]: path += f".{fmt}"
+        return fmt, path
@@ -0,0 +1,124 @@
+from __future__ import annotations
+import os, time, zipfile
+from typing import List, Sequence, Tuple
+import numpy as np
+from PySide6.QtCore import QThread, Signal
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.ipc  # type: ignore
+    import pyarrow.parquet  # type: ignore
+except Exception:
+    pa = None
+
+_ARROW_SCHEMA = pa.schema([("signal", pa.dictionary(pa.int32(), pa.string())), ("time_s", pa.float64()), ("value", pa.float64())]) if pa is not None else None
+
+# (signal name, time offsets, values, time base); time_s = offset + base
+Series = Tuple[str, Sequence[float], Sequence[float], float]
+
+
+def columnar_formats() -> List[str]:
+    """Binary formats available here, best first."""
+    return (["parquet", "arrow"] if pa is not None else []) + ["npz"]
+
+
+FORMAT_FILTERS = {
+    "csv": "CSV (*.csv)",
+    "parquet": "Parquet (*.parquet)",
+    "arrow": "Arrow IPC (*.arrow)",
+    "npz": "NumPy archive (*.npz)",
+}
+
+
+class HistoryExporter(QThread):
+    """Writes a snapshot of signal histories to disk in chunks on a background thread.
+
+    Output is long format (signal, time_s, value) for CSV/Parquet/Arrow, and one
+    ``<signal>.t`` / ``<signal>.v`` array pair per signal for npz. Only one chunk is
+    converted at a time, and the thread yields between chunks so the GUI and
+    acquisition keep running.
+    """
+    sig_progress = Signal(int, int)  # rows written, total rows
+    sig_done = Signal(str, str)      # path, error message ("" on success)
+
+    def __init__(self, series: List[Series], path: str, fmt: str, chunk_rows: int = 65536):
+        super().__init__()
+        self.series = series
+        self.path = path
+        self.fmt = fmt
+        self.chunk_rows = max(1024, int(chunk_rows))
+        self.total = sum(len(s[1]) for s in series)
+        self.written = 0
+        self._cancel = False
+        base = [s[3] + s[1][0] for s in series if len(s[1])]
+        self.t_base = min(base) if base else 0.0
+
+    def cancel(self):
+        self._cancel = True
+
+    def _chunks(self):
+        for name, xs, ys, ts0 in self.series:
+            off = ts0 - self.t_base
+            for i in range(0, len(xs), self.chunk_rows):
+                if self._cancel:
+                    raise RuntimeError("export cancelled")
+                x = np.asarray(xs[i:i + self.chunk_rows], dtype=np.float64) + off
+                y = np.asarray(ys[i:i + self.chunk_rows], dtype=np.float64)
+                yield name, x, y
+                self.written += len(x)
+                self.sig_progress.emit(self.written, self.total)
+                time.sleep(0)  # release the GIL between chunks
+
+    def run(self):
+        try:
+            getattr(self, f"_write_{self.fmt}")()
+            self.sig_done.emit(self.path, "")
+        except Exception as e:
+            try:
+                os.remove(self.path)
+            except Exception:
+                pass
+            self.sig_done.emit(self.path, str(e))
+
+    def _write_csv(self):
+        with open(self.path, "w", newline="") as f:
+            f.write("signal,time_s,value\n")
+            for name, x, y in self._chunks():
+                f.write("".join(f"{name},{a:.6f},{b!r}\n" for a, b in zip(x.tolist(), y.tolist())))
+
+    def _arrow_batches(self):
+        # One shared dictionary of signal names (IPC files allow a single dictionary per field)
+        names = [s[0] for s in self.series]
+        dictionary = pa.array(names, type=pa.string())
+        for name, x, y in self._chunks():
+            codes = pa.array(np.full(len(x), names.index(name), dtype=np.int32))
+            yield pa.record_batch([pa.DictionaryArray.from_arrays(codes, dictionary), pa.array(x), pa.array(y)],
+                                  schema=_ARROW_SCHEMA)
+
+    def _write_parquet(self):
+        with pa.parquet.ParquetWriter(self.path, _ARROW_SCHEMA) as w:
+            for b in self._arrow_batches():
+                w.write_batch(b)
+
+    def _write_arrow(self):
+        with pa.OSFile(self.path, "wb") as sink, pa.ipc.new_file(sink, _ARROW_SCHEMA) as w:
+            for b in self._arrow_batches():
+                w.write_batch(b)
+
+    def _write_npz(self):
+        # np.savez needs whole arrays; instead stream each .npy member: header, then chunks
+        fmt = np.lib.format
+        with zipfile.ZipFile(self.path, "w", allowZip64=True) as zf:
+            for name, xs, ys, ts0 in self.series:
+                n = len(xs)
+                for suffix, src, off in ((".t", xs, ts0 - self.t_base), (".v", ys, 0.0)):
+                    with zf.open(name + suffix + ".npy", "w", force_zip64=True) as f:
+                        fmt.write_array_header_2_0(f, {"descr": fmt.dtype_to_descr(np.dtype(np.float64)), "fortran_order": False, "shape": (n,)})
+                        for i in range(0, n, self.chunk_rows):
+                            if self._cancel:
+                                raise RuntimeError("export cancelled")
+                            f.write((np.asarray(src[i:i + self.chunk_rows], dtype=np.float64) + off).tobytes())
+                            if suffix == ".v":
+                                self.written += min(self.chunk_rows, n - i)
+                                self.sig_progress.emit(self.written, self.total)
+                            time.sleep(0)
@@ -2,19 +2,26 @@ from __future__ import annotations
 import time, json, base64, random
 from typing import Dict, Optional, List
 import os
-from PySide6.QtCore import QTimer, QByteArray, Qt
-from PySide6.QtWidgets import QMainWindow, QLabel, QFileDialog, QMessageBox, QToolBar, QTabBar, QDockWidget, QDialog
+from PySide6.QtCore import QTimer, QByteArray, Qt, QEvent
+from PySide6.QtWidgets import QMainWindow, QLabel, QFileDialog, QMessageBox, QToolBar, QTabBar, QDialog
 from PySide6.QtGui import QAction
 import can
 import pyqtgraph as pg
 
-from .models import APP_TITLE, DEFAULT_LAYOUT_FILE, BusConf, LayoutState, PanelConf
+from .models import APP_TITLE, DEFAULT_LAYOUT_FILE, BusConf, LayoutState, PanelConf, AlarmConf, DerivedConf, CaptureConf, TriggerConf
 from .bus import FrameBus, BusReader
 from .panels import (
-    BasePanel, ValuePanel, GaugePanel, PlotPanel, MultiPlotPanel, TablePanel,
-    LedPanel,
+    BasePanel, ValuePanel, GaugePanel, PlotPanel, MultiPlotPanel, StatsPanel, ByteMapPanel, TimingPanel, TracePanel, TablePanel,
+    LedPanel, AlarmPanel, ALARM_PREFIX,
 )
-from .dialogs import PanelConfigDialog, MultiPlotConfigDialog, BusConfigDialog
+from .render import RenderScheduler
+from .diagnostics import SamplingProfiler, StallWatchdog
+from .shm import ShmPublisher
+from .capture import CaptureEngine
+from .timing import write_report
+from .overload import OverloadController, MAX_LEVEL, shed_for
+from .dialogs import PanelConfigDialog, MultiPlotConfigDialog, BusConfigDialog, DerivedSignalsDialog, ExportDialog
+from .export import HistoryExporter, columnar_formats, FORMAT_FILTERS
 from .config import load_config
 
 
@@ -33,7 +40,14 @@ class Main(QMainWindow):
         }
         self.bus_objs: Dict[str, can.BusABC] = {}
         self.readers: List[BusReader] = []
+        # Dashboard tabs are keyed by an id stored in the tab data (indices shift when tabs move).
+        # Live tabs keep their panels in _dash_panels; evicted/unbuilt ones only have a LayoutState.
         self._dash_states: Dict[int, Optional[LayoutState]] = {0: None}
+        self._dash_panels: Dict[Optional[int], List[BasePanel]] = {0: []}
+        self._dash_dock: Dict[int, QByteArray] = {}
+        self._tab_lru: List[int] = [0]
+        self._next_tab_key = 1
+        self._current_tab_key: Optional[int] = 0
 
         self.hint = QLabel("Use File → Load DBC, Buses → Configure/Start, and View/Receive → Add Panel.\nDock, save layout, and go!")
         self.hint.setAlignment(Qt.AlignCenter)
@@ -51,6 +65,7 @@ class Main(QMainWindow):
         self.hub.sig_raw.connect(lambda *_: None)
 
         self._dbc_path: Optional[str] = None
+        self.derived_confs: List[DerivedConf] = []
 
         # Load YAML config if present
         self._cfg = load_config()
@@ -68,6 +83,7 @@ class Main(QMainWindow):
                             channel=str(b.get('channel', 'PCAN_USBBUS1')),
                             bitrate=int(b.get('bitrate', 500000)),
                             name=name,
+                            dbc=[str(x) for x in ([b['dbc']] if isinstance(b.get('dbc'), str) else (b.get('dbc') or []))],
                         )
                     except Exception:
                         continue
@@ -82,11 +98,52 @@ class Main(QMainWindow):
                     self._dbc_path = dbc_path
                 except Exception:
                     pass
+            self._apply_bus_dbcs()
+            # Derived (computed) signals
+            derived = self._cfg.get('derived')
+            if isinstance(derived, list) and derived:
+                try:
+                    self.set_derived([DerivedConf(**d) for d in derived])
+                except Exception as e:
+                    print(f"[Derived] Invalid derived signals in config: {e}")
+            # Alarm rules, evaluated centrally by hub.rules
+            for a in (self._cfg.get('alarms') or []):
+                try:
+                    ac = AlarmConf(**a)
+                    self.hub.rules.add_rule_set(ALARM_PREFIX + ac.name, ac.bus_name, ac.msg_name, ac.sig_name, ac.rules, hysteresis=ac.hysteresis, debounce_ms=ac.debounce_ms)
+                except Exception as e:
+                    print(f"[Alarms] Invalid alarm {a!r}: {e}")
+            # Latest-value table in shared memory for external tools
+            shm = self._cfg.get('shm')
+            if isinstance(shm, dict) and shm.get('signals'):
+                try:
+                    self.hub.set_shm(ShmPublisher(str(shm.get('name') or 'ican_latest'), [str(x) for x in shm['signals']]))
+                except Exception as e:
+                    print(f"[SHM] Could not create shared-memory table: {e}")
+            # Pre/post-trigger raw frame capture
+            cap = self._cfg.get('capture')
+            if isinstance(cap, dict):
+                try:
+                    cc = CaptureConf(**{k: v for k, v in cap.items() if k != 'triggers'})
+                    cc.triggers = [TriggerConf(**t) for t in (cap.get('triggers') or [])]
+                    self.hub.capture = CaptureEngine(self.hub, cc)
+                    self.hub.capture.sig_saved.connect(self._on_capture_saved)
+                except Exception as e:
+                    print(f"[Capture] Invalid capture config: {e}")
+            # Per-ID cycle-time statistics (timing panel, File > Export Timing Statistics)
+            tm = self._cfg.get('timing')
+            if isinstance(tm, dict):
+                try:
+                    self.hub.timing_tolerance = float(tm.get('tolerance', self.hub.timing_tolerance))
+                    self.hub.timing_max_ids = int(tm.get('max_ids', self.hub.timing_max_ids))
+                except Exception as e:
+                    print(f"[Timing] Invalid timing config: {e}")
 
         # Status bar
         self.status_lbl = QLabel("")
         self.statusBar().addPermanentWidget(self.status_lbl, 1)
         self._bus_stats: Dict[str, Dict[str, float]] = {}
+        self._exports: List[HistoryExporter] = []
 
         # Status interval from config if available
         _status_interval_ms = 1000
@@ -95,6 +152,64 @@ class Main(QMainWindow):
                 _status_interval_ms = int(self._cfg['ui'].get('status_interval_ms', 1000))
         except Exception:
             pass
+        # Memory cap for suspended (inactive) dashboard tabs
+        self._tab_cache_mb = 256.0
+        try:
+            if self._cfg and isinstance(self._cfg.get('ui'), dict):
+                self._tab_cache_mb = float(self._cfg['ui'].get('tab_cache_mb', 256))
+        except Exception:
+            pass
+
+        # Global memory budget for all panel histories (all dashboard tabs)
+        self._history_budget_mb = 512.0
+        try:
+            if self._cfg and isinstance(self._cfg.get('ui'), dict):
+                self._history_budget_mb = float(self._cfg['ui'].get('history_memory_mb', 512))
+        except Exception:
+            pass
+
+        try:
+            if self._cfg and isinstance(self._cfg.get('ui'), dict):
+                self.hub.compact_history = bool(self._cfg['ui'].get('compact_history', False))
+        except Exception:
+            pass
+
+        # One display-rate scheduler redraws all panels (replaces per-panel timers)
+        _fps, _budget = 0.0, 0.0
+        try:
+            if self._cfg and isinstance(self._cfg.get('ui'), dict):
+                _fps = float(self._cfg['ui'].get('render_fps', 0) or 0)
+                _budget = float(self._cfg['ui'].get('render_budget_ms', 0) or 0)
+        except Exception:
+            pass
+        self.render_sched = RenderScheduler(self, fps=_fps, budget_ms=_budget)
+        try:
+            if self._cfg and isinstance(self._cfg.get('ui'), dict) and self._cfg['ui'].get('batch_ms'):
+                self.hub.batch_timer.setInterval(max(1, int(self._cfg['ui']['batch_ms'])))
+        except Exception:
+            pass
+
+        # Always-on event-loop stall detection; the sampling profiler runs on demand
+        _stall_ms = 250.0
+        try:
+            if self._cfg and isinstance(self._cfg.get('ui'), dict):
+                _stall_ms = float(self._cfg['ui'].get('stall_threshold_ms', 250) or 250)
+        except Exception:
+            pass
+        self.watchdog = StallWatchdog(self, threshold_ms=_stall_ms); self.watchdog.start()
+        self.profiler = SamplingProfiler()
+
+        # Priority-based load shedding while the event loop lags or frames queue up
+        _lag_ms, _queue = 50.0, 2000
+        try:
+            if self._cfg and isinstance(self._cfg.get('ui'), dict):
+                _lag_ms = float(self._cfg['ui'].get('overload_lag_ms', 50) or 50)
+                _queue = int(self._cfg['ui'].get('overload_queue', 2000) or 2000)
+        except Exception:
+            pass
+        self.overload = OverloadController(self, lambda: self.watchdog.lag_ms, self._queue_depth, target_lag_ms=_lag_ms, queue_limit=_queue)
+        self.overload.sig_level.connect(self._apply_shed)
+
         self._status_timer = QTimer(self); self._status_timer.setInterval(_status_interval_ms)
         self._status_timer.timeout.connect(self._refresh_status); self._status_timer.start()
 
@@ -113,8 +228,20 @@ class Main(QMainWindow):
         state = self.saveState()
         return LayoutState(buses=list(self.buses_conf.values()), panels=self._collect_panels(), dock_state_b64=base64.b64encode(bytes(state)).decode("ascii"))
 
+    def _tab_key(self, idx: int) -> Optional[int]:
+        key = self.tabbar.tabData(idx)
+        return key if isinstance(key, int) else None
+
+    def _current_panels(self) -> List[BasePanel]:
+        return self._dash_panels.setdefault(self._current_tab_key, [])
+
+    def _clear_dashboard(self, key: Optional[int]):
+        for p in self._dash_panels.pop(key, []):
+            self._destroy_panel(p)
+        self._dash_dock.pop(key, None)
+
     def _apply_layout_state(self, layout: Optional[LayoutState]):
-        for dw in self.findChildren(QDockWidget): dw.setParent(None)
+        self._clear_dashboard(self._current_tab_key)
         if layout is None:
             try:
                 if self.hint: self.hint.show()
@@ -122,27 +249,101 @@ class Main(QMainWindow):
                 pass
             return
         self.buses_conf = {b.name: b for b in layout.buses}
-        for p in layout.panels: self._add_panel_from_conf(p)
-        if layout.dock_state_b64:
-            try:
-                ba = QByteArray(base64.b64decode(layout.dock_state_b64)); self.restoreState(ba)
+        self._build_dashboard(layout.panels, layout.dock_state_b64)
+
+    def _build_dashboard(self, confs: List[PanelConf], dock_state_b64: str = ""):
+        """Bulk-add panels with window updates suspended and a single relayout at the end."""
+        t0 = time.perf_counter()
+        self.setUpdatesEnabled(False)
+        try:
+            for conf in confs: self._add_panel_from_conf(conf, distribute=False)
+            restored = False
+            if dock_state_b64:
+                try:
+                    restored = bool(self.restoreState(QByteArray(base64.b64decode(dock_state_b64))))
+                except Exception: pass
+            if not restored:
+                try: self._distribute_right_docks()
+                except Exception: pass
+        finally:
+            self.setUpdatesEnabled(True)
+        ms = (time.perf_counter() - t0) * 1000.0
+        print(f"[Layout] Built {len(confs)} panels in {ms:.0f} ms")
+        self.statusBar().showMessage(f"Loaded {len(confs)} panels in {ms:.0f} ms", 5000)
+
+    def _suspend_dashboard(self, key: int):
+        """Take a tab's panels out of the window but keep them (and their history) alive."""
+        panels = self._dash_panels.get(key, [])
+        self._dash_dock[key] = self.saveState()
+        for p in panels:
+            p.set_suspended(True)
+            self.removeDockWidget(p)
+
+    def _resume_dashboard(self, key: int):
+        panels = self._dash_panels.get(key)
+        if panels is None:
+            # Never built, or evicted by the tab cache: rebuild from its saved layout
+            self._dash_panels[key] = []
+            self._apply_layout_state(self._dash_states.get(key))
+            self._dash_states[key] = None
+            return
+        for p in panels:
+            self.addDockWidget(Qt.RightDockWidgetArea, p); p.show()
+        state = self._dash_dock.get(key)
+        if state is not None:
+            try: self.restoreState(state)
             except Exception: pass
+        for p in panels: p.set_suspended(False)
+        try:
+            self.hint.setVisible(not panels)
+        except Exception:
+            pass
+
+    def _evict_dashboard(self, key: int):
+        """Drop a suspended tab's panels, keeping only its configuration for a later rebuild."""
+        panels = self._dash_panels.get(key, [])
+        state = self._dash_dock.get(key, QByteArray())
+        self._dash_states[key] = LayoutState(buses=list(self.buses_conf.values()), panels=[p.conf for p in panels], dock_state_b64=base64.b64encode(bytes(state)).decode("ascii")) if panels else None
+        self._clear_dashboard(key)
+
+    def _enforce_tab_cache(self):
+        """Keep suspended tabs under the configured memory cap, evicting least recently used first."""
+        cap = self._tab_cache_mb * 1024 * 1024
+        inactive = [k for k in self._tab_lru if k != self._current_tab_key and k in self._dash_panels]
+        used = {k: sum(p.history_bytes() for p in self._dash_panels[k]) for k in inactive}
+        total = sum(used.values())
+        for k in inactive:
+            if total <= cap: break
+            total -= used[k]
+            self._evict_dashboard(k)
 
     def _on_tab_changed(self, idx: int):
-        prev = getattr(self, '_current_tab_idx', 0)
-        if prev in self._dash_states:
-            self._dash_states[prev] = self._capture_layout_state()
-        self._apply_layout_state(self._dash_states.get(idx))
-        self._current_tab_idx = idx
+        key = self._tab_key(idx)
+        prev = self._current_tab_key
+        if key is None or key == prev: return
+        if prev is not None and prev in self._dash_panels:
+            self._suspend_dashboard(prev)
+        self._current_tab_key = key
+        if key in self._tab_lru: self._tab_lru.remove(key)
+        self._tab_lru.append(key)
+        self._resume_dashboard(key)
+        self._enforce_tab_cache()
 
     def _add_tab(self):
+        key = self._next_tab_key; self._next_tab_key += 1
         idx = self.tabbar.addTab(f"Dashboard {self.tabbar.count()+1}")
-        self._dash_states[idx] = None
+        self.tabbar.setTabData(idx, key)
+        self._dash_states[key] = None
         self.tabbar.setCurrentIndex(idx)
 
     def _on_tab_close(self, idx: int):
         if self.tabbar.count() == 1: return
-        self._dash_states.pop(idx, None); self.tabbar.removeTab(idx)
+        key = self._tab_key(idx)
+        self._clear_dashboard(key)
+        self._dash_states.pop(key, None)
+        if key in self._tab_lru: self._tab_lru.remove(key)
+        if key == self._current_tab_key: self._current_tab_key = None
+        self.tabbar.removeTab(idx)
 
     def _rename_current_tab(self):
         from PySide6.QtWidgets import QInputDialog
@@ -157,8 +358,10 @@ class Main(QMainWindow):
         act_load_dbc = QAction("Load &DBC…", self); act_load_dbc.triggered.connect(self.load_dbc)
         act_save_layout = QAction("&Save Layout", self); act_save_layout.triggered.connect(self.save_layout)
         act_load_layout = QAction("&Load Layout", self); act_load_layout.triggered.connect(self.load_layout)
+        act_export = QAction("&Export Dashboard History…", self); act_export.triggered.connect(lambda: self._export_panels(self._current_panels()))
+        act_timing = QAction("Export &Timing Statistics…", self); act_timing.triggered.connect(self.export_timing)
         act_quit = QAction("&Quit", self); act_quit.triggered.connect(self.close)
-        m_file.addAction(act_load_dbc); m_file.addSeparator(); m_file.addAction(act_save_layout); m_file.addAction(act_load_layout); m_file.addSeparator(); m_file.addAction(act_quit)
+        m_file.addAction(act_load_dbc); m_file.addSeparator(); m_file.addAction(act_save_layout); m_file.addAction(act_load_layout); m_file.addSeparator(); m_file.addAction(act_export); m_file.addAction(act_timing); m_file.addSeparator(); m_file.addAction(act_quit)
 
         m_bus = self.menuBar().addMenu("&Buses")
         act_cfg = QAction("&Configure…", self); act_cfg.triggered.connect(self.configure_buses)
@@ -167,16 +370,20 @@ class Main(QMainWindow):
         m_bus.addAction(act_cfg); m_bus.addAction(act_start); m_bus.addAction(act_stop)
 
         m_rx = self.menuBar().addMenu("&Receive")
-        for t in ["value", "gauge", "plot", "multiplot", "led", "table"]:
+        for t in ["value", "gauge", "plot", "multiplot", "stats", "led", "table", "bytemap", "timing", "trace", "alarm"]:
             ac = QAction(f"Add {t.title()} Panel…", self); ac.triggered.connect(lambda _, tt=t: self.add_panel(tt)); m_rx.addAction(ac)
+        m_rx.addSeparator()
+        act_derived = QAction("&Derived Signals…", self); act_derived.triggered.connect(self.edit_derived); m_rx.addAction(act_derived)
+        act_capture = QAction("&Trigger Capture Now", self); act_capture.setShortcut("Ctrl+T")
+        act_capture.triggered.connect(self.trigger_capture); m_rx.addAction(act_capture)
 
         self.tabbar = QTabBar(movable=True, tabsClosable=True)
         self.tabbar.setExpanding(False)
         self.tabbar.addTab("Dashboard 1")
-        self._current_tab_idx = 0
+        self.tabbar.setTabData(0, 0)
         self.tabbar.currentChanged.connect(self._on_tab_changed)
         self.tabbar.tabCloseRequested.connect(self._on_tab_close)
-        tb = QToolBar("Dashboards"); tb.addWidget(QLabel(" Dashboards: "))
+        tb = QToolBar("Dashboards"); tb.setObjectName("dashboards_toolbar"); tb.addWidget(QLabel(" Dashboards: "))
         tb.addWidget(self.tabbar); self.addToolBar(tb)
 
         m_dash = self.menuBar().addMenu("&Dashboards")
@@ -185,7 +392,60 @@ class Main(QMainWindow):
         act_del_tab = QAction("&Delete Current Tab", self); act_del_tab.triggered.connect(lambda: self._on_tab_close(self.tabbar.currentIndex()))
         m_dash.addAction(act_add_tab); m_dash.addAction(act_rename_tab); m_dash.addAction(act_del_tab)
 
+        m_diag = self.menuBar().addMenu("D&iagnostics")
+        act_render = QAction("&Render Statistics…", self); act_render.triggered.connect(self.show_render_stats)
+        self.act_profile = QAction("Start Sampling &Profiler", self); self.act_profile.triggered.connect(self.toggle_profiler)
+        act_stalls = QAction("&Event Loop Stalls…", self); act_stalls.triggered.connect(self.show_stalls)
+        m_diag.addAction(act_render); m_diag.addSeparator(); m_diag.addAction(self.act_profile); m_diag.addAction(act_stalls)
+
+    # Diagnostics
+    def show_render_stats(self):
+        rs = self.render_sched
+        lines = [f"Frame rate: {rs.fps:.1f} fps (target {1000.0 / rs.interval_ms:.0f}, budget {rs.budget_s * 1000.0:.1f} ms)",
+                 f"Ticks over budget: {rs.overrun_pct:.1f}%", ""]
+        rows = rs.panel_costs()
+        if not rows: lines.append("No panels rendered yet.")
+        for pid, title, cost_ms, rate in rows[:20]:
+            lines.append(f"{title} [{pid}]: {cost_ms:.2f} ms/render, {rate:.1f} renders/s")
+        QMessageBox.information(self, "Render Statistics", "\n".join(lines))
+
+    def toggle_profiler(self):
+        prof = self.profiler
+        if not prof.running:
+            prof.start(); self.act_profile.setText("Stop Sampling &Profiler…")
+            self.statusBar().showMessage("Sampling profiler running…")
+            return
+        prof.stop(); self.act_profile.setText("Start Sampling &Profiler")
+        self.statusBar().clearMessage()
+        path, _ = QFileDialog.getSaveFileName(self, "Save Profile", "profile.speedscope.json",
+                                              "Speedscope (*.speedscope.json);;Collapsed stacks (*.folded *.txt)")
+        if not path: return
+        try:
+            prof.write(path)
+            QMessageBox.information(self, "Profiler", f"{prof.samples} samples over {prof.elapsed:.1f} s written to:\n{path}")
+        except Exception as e:
+            QMessageBox.critical(self, "Profiler", f"Failed to write profile:\n{e}")
+
+    def show_stalls(self):
+        wd = self.watchdog
+        head = (f"Event loop lag: {wd.lag_ms:.1f} ms average, {wd.max_lag_ms:.0f} ms max\n"
+                f"Stall threshold: {wd.threshold_s * 1000.0:.0f} ms\n\n")
+        box = QMessageBox(QMessageBox.Information, "Event Loop Stalls",
+                          head + (f"{len(wd.reports)} stall(s) recorded; stacks are in the details." if wd.reports else "No stalls recorded."), parent=self)
+        if wd.reports: box.setDetailedText("\n".join(wd.reports))
+        box.exec()
+
     # DBC
+    def _apply_bus_dbcs(self):
+        """Hand each bus its own DBC files from buses_conf (empty: the global DBC)."""
+        for bc in self.buses_conf.values():
+            if not bc.dbc and bc.name not in self.hub.bus_dbc:
+                continue
+            try:
+                self.hub.set_bus_dbc(bc.name, bc.dbc)
+            except Exception as e:
+                print(f"[DBC] {bc.name}: could not load {', '.join(bc.dbc)}: {e}")
+
     def load_dbc(self):
         path, _ = QFileDialog.getOpenFileName(self, "Open DBC", "", "DBC Files (*.dbc)")
         if not path: return
@@ -195,24 +455,48 @@ class Main(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "DBC Error", f"Failed to load DBC:\n{e}")
 
+    # Derived signals
+    def set_derived(self, confs: List[DerivedConf]):
+        """Compile and install derived signal definitions (raises ValueError on a bad expression)."""
+        self.hub.define_derived([(c.name, c.expr, c.units) for c in confs])
+        self.derived_confs = list(confs)
+
+    def edit_derived(self):
+        dlg = DerivedSignalsDialog(self, self.derived_confs)
+        try:
+            while dlg.exec() == QDialog.Accepted:
+                try:
+                    self.set_derived(dlg.result_derived()); return
+                except Exception as e:
+                    QMessageBox.critical(self, "Derived Signals", f"Invalid definition:\n{e}")
+        finally:
+            dlg.deleteLater()  # parented to the window: would otherwise live until exit
+
     # Buses
     def configure_buses(self):
         dlg = BusConfigDialog(self, self.buses_conf)
         if dlg.exec() == QDialog.Accepted:
             self.buses_conf = dlg.result_buses()
+            self._apply_bus_dbcs()
+        dlg.deleteLater()
+
+    def _start_bus(self, bc: BusConf):
+        """Open one bus and start its reader thread; raises on failure."""
+        if bc.interface == "virtual": bus = can.Bus(interface="virtual", channel=bc.channel, bitrate=bc.bitrate)
+        else: bus = can.Bus(interface="pcan", channel=bc.channel, bitrate=bc.bitrate)
+        self.bus_objs[bc.name] = bus
+        self.hub.add_bus(bc.name)
+        reader = BusReader(bc.name, bus, self.hub.timing.get(bc.name))
+        reader.sig_frame.connect(self.hub.on_frame)
+        reader.sig_stat.connect(self._on_stat_frame)
+        reader.start(); self.readers.append(reader)
 
     def start_buses(self):
         self.stop_buses(); errs = []
         for key, bc in self.buses_conf.items():
             if not bc.enabled: continue
             try:
-                if bc.interface == "virtual": bus = can.Bus(interface="virtual", channel=bc.channel, bitrate=bc.bitrate)
-                else: bus = can.Bus(interface="pcan", channel=bc.channel, bitrate=bc.bitrate)
-                self.bus_objs[bc.name] = bus
-                reader = BusReader(bc.name, bus)
-                reader.sig_frame.connect(self.hub.on_frame)
-                reader.sig_stat.connect(self._on_stat_frame)
-                reader.start(); self.readers.append(reader)
+                self._start_bus(bc)
             except Exception as e:
                 errs.append(f"{bc.name}: {e}")
         if errs:
@@ -238,7 +522,7 @@ class Main(QMainWindow):
                     ch = f"PCAN_USBBUS{i}"
                     try:
                         test_bus = can.Bus(interface="pcan", channel=ch, bitrate=b1.bitrate); test_bus.shutdown()
-                        self.buses_conf["BUS1"] = BusConf(enabled=True, interface="pcan", channel=ch, bitrate=b1.bitrate, name="BUS1")
+                        self.buses_conf["BUS1"] = BusConf(enabled=True, interface="pcan", channel=ch, bitrate=b1.bitrate, name="BUS1", dbc=b1.dbc)
                         print(f"[Buses] Auto-selected available PCAN channel for BUS1: {ch}"); break
                     except Exception: continue
         self.start_buses()
@@ -247,20 +531,24 @@ class Main(QMainWindow):
 
     # Panels
     def add_panel(self, panel_type: str):
-        if panel_type == "multiplot": dlg = MultiPlotConfigDialog(self, self.bus_objs, self.hub.dbc)
-        else: dlg = PanelConfigDialog(self, self.bus_objs, self.hub.dbc, panel_type)
-        if dlg.exec() != QDialog.Accepted: return
-        pid = f"{panel_type}_{int(time.time()*1000)%1_000_000}"; conf = dlg.get_panel_conf(pid)
+        if panel_type == "multiplot": dlg = MultiPlotConfigDialog(self, self.bus_objs, self.hub.any_dbc(), index=self.hub.index)
+        else: dlg = PanelConfigDialog(self, self.bus_objs, self.hub.any_dbc(), panel_type, index=self.hub.index)
+        ok = dlg.exec() == QDialog.Accepted
+        pid = f"{panel_type}_{int(time.time()*1000)%1_000_000}"; conf = dlg.get_panel_conf(pid) if ok else None
+        dlg.deleteLater()
         if not conf: return
         self._add_panel_from_conf(conf)
 
-    def _add_panel_from_conf(self, conf: PanelConf):
+    def _add_panel_from_conf(self, conf: PanelConf, distribute: bool = True):
         panel = self._create_panel(conf)
         if not panel: return
         try:
             if self.hint and self.hint.isVisible(): self.hint.hide()
         except Exception: pass
+        self._current_panels().append(panel)
+        self.render_sched.register(panel)
         self.addDockWidget(Qt.RightDockWidgetArea, panel)
+        if not distribute: return
         # Try to distribute all right-area docks evenly horizontally
         try:
             self._distribute_right_docks()
@@ -268,46 +556,100 @@ class Main(QMainWindow):
             pass
 
     def _create_panel(self, conf: PanelConf) -> Optional[BasePanel]:
+        panel = self._build_panel(conf)
+        if panel is not None and self.overload.level:
+            panel.set_shed(shed_for(self.overload.level, conf.priority))
+        return panel
+
+    def _build_panel(self, conf: PanelConf) -> Optional[BasePanel]:
         try:
             if conf.panel_type == "value": return ValuePanel(conf, self.hub)
             if conf.panel_type == "gauge": return GaugePanel(conf, self.hub)
             if conf.panel_type == "plot": return PlotPanel(conf, self.hub)
             if conf.panel_type == "multiplot": return MultiPlotPanel(conf, self.hub)
+            if conf.panel_type == "stats": return StatsPanel(conf, self.hub)
+            if conf.panel_type == "bytemap": return ByteMapPanel(conf, self.hub)
+            if conf.panel_type == "timing": return TimingPanel(conf, self.hub)
+            if conf.panel_type == "trace": return TracePanel(conf, self.hub)
             if conf.panel_type == "table": return TablePanel(conf, self.hub)
             if conf.panel_type == "led": return LedPanel(conf, self.hub)
+            if conf.panel_type == "alarm": return AlarmPanel(conf, self.hub)
         except Exception:
             import traceback; traceback.print_exc(); QMessageBox.critical(self, "Panel Error", "Failed to create panel; see console.")
         return None
 
     def _edit_panel(self, panel: BasePanel):
         conf = panel.conf
-        if conf.panel_type == 'multiplot': dlg = MultiPlotConfigDialog(self, self.bus_objs, self.hub.dbc, existing=conf)
-        else: dlg = PanelConfigDialog(self, self.bus_objs, self.hub.dbc, conf.panel_type, existing=conf)
-        if dlg.exec() != QDialog.Accepted: return
-        new_conf = dlg.get_panel_conf(conf.panel_id)
-        if not new_conf: return
+        if conf.panel_type == 'multiplot': dlg = MultiPlotConfigDialog(self, self.bus_objs, self.hub.any_dbc(), existing=conf, index=self.hub.index)
+        else: dlg = PanelConfigDialog(self, self.bus_objs, self.hub.any_dbc(), conf.panel_type, existing=conf, index=self.hub.index)
+        ok = dlg.exec() == QDialog.Accepted
+        new_conf = dlg.get_panel_conf(conf.panel_id) if ok else None
+        dlg.deleteLater()
+        if new_conf: self._replace_panel(panel, new_conf)
+
+    def _replace_panel(self, panel: BasePanel, new_conf: PanelConf):
+        """Swap a panel for one built from new_conf, in the same place."""
         area = self.dockWidgetArea(panel)
-        try: panel.setParent(None)
-        except Exception: pass
+        panels = self._current_panels()
+        pos = panels.index(panel) if panel in panels else len(panels)
+        self._remove_panel(panel)
         new_panel = self._create_panel(new_conf)
-        if new_panel: self.addDockWidget(area, new_panel)
+        if new_panel:
+            panels.insert(pos, new_panel); self.render_sched.register(new_panel); self.addDockWidget(area, new_panel)
         try:
             self._distribute_right_docks()
         except Exception:
             pass
 
+    def _destroy_panel(self, panel: BasePanel):
+        self.render_sched.unregister(panel)
+        panel.shutdown()
+        try:
+            self.removeDockWidget(panel); panel.setParent(None); panel.deleteLater()
+        except Exception:
+            pass
+
+    def _remove_panel(self, panel: BasePanel):
+        for panels in self._dash_panels.values():
+            if panel in panels: panels.remove(panel)
+        self._destroy_panel(panel)
+
+    # Export
+    def _export_panels(self, panels: List[BasePanel]):
+        series, seen = [], {}
+        for p in panels:
+            if not p.EXPORTABLE: continue
+            for name, xs, ys, ts0 in p.export_series():
+                # The same signal may be plotted by several panels
+                seen[name] = seen.get(name, 0) + 1
+                series.append((name if seen[name] == 1 else f"{name}#{seen[name]}", xs, ys, ts0))
+        if not series:
+            QMessageBox.information(self, "Export", "No plot history to export."); return
+        dlg = ExportDialog(self, [s[0] for s in series], ["csv"] + columnar_formats(), FORMAT_FILTERS)
+        ok = dlg.exec() == QDialog.Accepted
+        fmt, path = dlg.export_choice(); keep = set(dlg.selected())
+        dlg.deleteLater()
+        if not ok: return
+        series = [s for s in series if s[0] in keep]
+        if not path or not series: return
+        job = HistoryExporter(series, path, fmt)
+        job.sig_progress.connect(lambda n, total: self.statusBar().showMessage(f"Exporting {os.path.basename(path)}: {n}/{total} samples"))
+        job.sig_done.connect(self._on_export_done)
+        job.finished.connect(lambda j=job: self._exports.remove(j) if j in self._exports else None)
+        self._exports.append(job); job.start()
+
+    def _on_export_done(self, path: str, err: str):
+        if err: QMessageBox.warning(self, "Export", f"Export to {path} failed:\n{err}")
+        else: self.statusBar().showMessage(f"Exported {path}", 5000)
+
     # Layout save/load
     def _collect_panels(self) -> List[PanelConf]:
-        out: List[PanelConf] = []
-        for dw in self.findChildren(QDockWidget):
-            if not isinstance(dw, BasePanel): continue
-            out.append(dw.conf)
-        return out
+        return [p.conf for p in self._current_panels()]
 
     def _distribute_right_docks(self):
         """Resize all right-area docks to share horizontal space evenly."""
         docks = []
-        for dw in self.findChildren(QDockWidget):
+        for dw in self._current_panels():
             if self.dockWidgetArea(dw) == Qt.RightDockWidgetArea:
                 docks.append(dw)
         if len(docks) >= 2:
@@ -319,7 +661,7 @@ class Main(QMainWindow):
         fn, _ = QFileDialog.getSaveFileName(self, "Save Layout", DEFAULT_LAYOUT_FILE, "JSON (*.json)")
         if not fn: return
         state = self.saveState()
-        layout = LayoutState(buses=list(self.buses_conf.values()), panels=self._collect_panels(), dock_state_b64=base64.b64encode(bytes(state)).decode("ascii"))
+        layout = LayoutState(buses=list(self.buses_conf.values()), panels=self._collect_panels(), dock_state_b64=base64.b64encode(bytes(state)).decode("ascii"), derived=self.derived_confs)
         with open(fn, "w") as f: json.dump(asdict(layout), f, indent=2)
         QMessageBox.information(self, "Layout", f"Saved to {fn}")
 
@@ -329,10 +671,11 @@ class Main(QMainWindow):
         try:
             with open(fn, "r") as f: obj = json.load(f)
             self.buses_conf = {b['name']: BusConf(**b) for b in obj['buses']}
-            for dw in self.findChildren(QDockWidget): dw.setParent(None)
-            for p in obj['panels']:
-                conf = PanelConf(**p); self._add_panel_from_conf(conf)
-            ba = QByteArray(base64.b64decode(obj.get('dock_state_b64', ""))); self.restoreState(ba)
+            self._apply_bus_dbcs()
+            if obj.get('derived'):
+                self.set_derived([DerivedConf(**d) for d in obj['derived']])
+            self._clear_dashboard(self._current_tab_key)
+            self._build_dashboard([PanelConf(**p) for p in obj['panels']], obj.get('dock_state_b64', ""))
             QMessageBox.information(self, "Layout", f"Loaded from {fn}")
         except Exception as e:
             QMessageBox.critical(self, "Layout Error", f"Failed to load:\n{e}")
@@ -343,6 +686,44 @@ class Main(QMainWindow):
         st['frames'] += 1; st['bytes'] += max(0, int(dlc));
         if is_error: st['errors'] += 1
 
+    def _all_panels(self) -> List[BasePanel]:
+        return [p for panels in self._dash_panels.values() for p in panels]
+
+    def _queue_depth(self) -> int:
+        """Frames emitted by the readers that on_frame has not handled yet."""
+        return sum(max(0, r.emitted - self.hub.received.get(r.bus_name, 0)) for r in self.readers)
+
+    def _apply_shed(self, level: int):
+        for p in self._all_panels():
+            p.set_shed(shed_for(level, p.conf.priority))
+        print(f"[Overload] shed level {level}/{MAX_LEVEL} (lag {self.overload.last_lag:.0f} ms, queue {self.overload.last_depth})")
+
+    def _enforce_history_budget(self) -> Dict[BasePanel, int]:
+        """Downsample histories until they fit ui.history_memory_mb.
+
+        Hidden panels go first, least recently viewed first; visible panels are only
+        touched when hidden ones cannot free enough. Returns per-panel usage.
+        """
+        panels = self._all_panels()
+        usage = {p: p.history_bytes() for p in panels}
+        budget = self._history_budget_mb * 1024 * 1024
+        total = sum(usage.values())
+        if total <= budget:
+            return usage
+        for visible in (False, True):
+            # Exhaust one tier (repeated halvings) before touching the next
+            order = sorted((p for p in panels if p.on_screen == visible), key=lambda p: p.last_viewed)
+            progress = True
+            while total > budget and progress:
+                progress = False
+                for p in order:
+                    if total <= budget: break
+                    if usage[p] <= 0: continue
+                    freed = p.shrink_history()
+                    if freed > 0:
+                        usage[p] -= freed; total -= freed; progress = True
+        return usage
+
     def _refresh_status(self):
         parts = []
         for bname in sorted(self.bus_objs.keys()):
@@ -359,9 +740,57 @@ class Main(QMainWindow):
             elif load_pct < 5.0 and fps < 10: status = 'LIGHT'
             else: status = 'MOD'
             parts.append(f"{bname}: {status} | FPS {fps:.0f} | Load~{load_pct:.1f}% | Err/s {float(errors):.0f}")
-        self.status_lbl.setText('   |   '.join(parts) if parts else 'No buses running')
+        text = '   |   '.join(parts) if parts else 'No buses running'
+        if self.hub.capture is not None:
+            text += f"   |   Capture {self.hub.capture.state}"
+        decoded, repeated = self.hub.take_dedup_stats()
+        if decoded + repeated:
+            text += f"   |   Decode skipped {100.0 * repeated / (decoded + repeated):.0f}% ({repeated} repeated frames)"
+        if self.overload.level:
+            text += f"   |   Shed {self.overload.level}/{MAX_LEVEL}"
+        usage = self._enforce_history_budget()
+        mb = sum(usage.values()) / (1024 * 1024)
+        self.status_lbl.setText(f"{text}   |   Render {self.render_sched.fps:.0f} fps   |   History {mb:.1f}/{self._history_budget_mb:.0f} MB")
+        top = sorted(usage.items(), key=lambda kv: kv[1], reverse=True)[:15]
+        self.status_lbl.setToolTip("History memory per panel:\n" + "\n".join(
+            f"{p.conf.title} [{p.conf.panel_id}]: {b / (1024 * 1024):.1f} MB{'' if p.on_screen else ' (hidden)'}" for p, b in top if b > 0))
+
+    def trigger_capture(self):
+        cap = self.hub.capture
+        if cap is None:
+            self.statusBar().showMessage("Capture is not configured (see `capture:` in config.yaml)", 5000); return
+        if cap.state != "armed":
+            self.statusBar().showMessage(f"Capture busy ({cap.state})", 3000); return
+        cap.fire("manual")
+
+    def export_timing(self):
+        if not self.hub.timing:
+            QMessageBox.information(self, "Export Timing", "No bus has been started yet."); return
+        path, _ = QFileDialog.getSaveFileName(self, "Export Timing Statistics", "timing.json", "JSON (*.json)")
+        if not path: return
+        try:
+            write_report(self.hub, path)
+            self.statusBar().showMessage(f"Timing statistics written to {path}", 5000)
+        except Exception as e:
+            QMessageBox.critical(self, "Export Timing", f"Failed to write timing statistics:\n{e}")
+
+    def _on_capture_saved(self, path: str, err: str):
+        if err: self.statusBar().showMessage(f"Capture failed: {err}", 10000)
+        else: self.statusBar().showMessage(f"Capture saved: {path}", 10000)
+
+    def changeEvent(self, ev):
+        super().changeEvent(ev)
+        if ev.type() == QEvent.WindowStateChange:
+            # Minimizing hides every panel without Qt emitting visibilityChanged on the docks
+            for p in self._current_panels():
+                p._update_visibility()
 
     def closeEvent(self, ev):
         try: self.stop_buses()
         except Exception: pass
+        for job in list(self._exports):
+            job.cancel(); job.wait(2000)
+        self.profiler.stop(); self.watchdog.stop(); self.overload.timer.stop()
+        self.hub.set_shm(None)
+        if self.hub.capture is not None: self.hub.capture.shutdown()
         ev.accept()
@@ -13,12 +13,14 @@ class BusConf:
     channel: str = "vcan0"       # e.g. PCAN_USBBUS1 or vcan0
     bitrate: int = 500000
     name: str = "BUS1"           # Friendly name
+    # DBC files for this bus (merged in order); empty = the global DBC (`db.path`)
+    dbc: List[str] = field(default_factory=list)
 
 
 @dataclass
 class PanelConf:
     panel_id: str
-    panel_type: str  # "plot"|"multiplot"|"gauge"|"value"|"table"|"led"
+    panel_type: str  # "plot"|"multiplot"|"stats"|"bytemap"|"timing"|"trace"|"gauge"|"value"|"table"|"led"|"alarm"
     title: str
     # Subscription (for reading/display):
     bus_name: Optional[str] = None
@@ -33,10 +35,69 @@ class PanelConf:
     max_val: float = 100.0
     # Plot options:
     plot_window_s: float = 10.0
+    # Stats panel: recompute rate (also the timing panel's refresh rate), histogram bins, Welch segment length
+    stats_rate_hz: float = 2.0
+    stats_bins: int = 50
+    fft_size: int = 1024
+    # Byte map panel: "changes"|"bytes" (ID x byte) or "bits" (frames x bit of heat_id)
+    heat_mode: str = "changes"
+    heat_id: Optional[int] = None
+    # Trace panel: frames kept, hex id ranges ("100-1FF, 7E8") and payload pattern ("03 7F ?? 1x")
+    trace_frames: int = 200000
+    trace_ids: str = ""
+    trace_data: str = ""
     # Multi-plot selections: list of {bus_name,msg_name,sig_name,color}
     multi_signals: List[Dict[str, str]] = field(default_factory=list)
     # LED rules (only for LED panel)
     led_rules: List[str] = field(default_factory=list)
+    rule_hysteresis: float = 0.0
+    rule_debounce_ms: float = 0.0
+    # "low"|"normal"|"high": under overload, low-priority panels are throttled first, high never
+    priority: str = "normal"
+
+
+@dataclass
+class AlarmConf:
+    name: str
+    msg_name: str
+    sig_name: str
+    bus_name: Optional[str] = None
+    # Same syntax as LED rules; the text after ':' is the alarm label
+    rules: List[str] = field(default_factory=list)
+    hysteresis: float = 0.0
+    debounce_ms: float = 0.0
+
+
+@dataclass
+class DerivedConf:
+    name: str
+    expr: str                  # e.g. "Battery.Voltage * Battery.Current" or "mavg(BUS1.Wheels.FL, 10)"
+    units: str = ""
+
+
+@dataclass
+class TriggerConf:
+    """Capture trigger: a frame id (optionally masked), a payload pattern, or a signal crossing a threshold."""
+    name: str = ""
+    bus_name: Optional[str] = None
+    id: Optional[int] = None
+    id_mask: int = 0x1FFFFFFF
+    data: str = ""             # hex bytes compared from byte 0, e.g. "03 7F"
+    mask: str = ""             # hex mask for `data` (default all ones)
+    signal: str = ""           # Msg.Sig
+    op: str = ">"              # > >= < <= == (signal triggers fire when the condition becomes true)
+    value: float = 0.0
+
+
+@dataclass
+class CaptureConf:
+    capacity: int = 200000     # frames kept in the ring
+    width: int = 8             # payload bytes stored per frame (64 for CAN FD)
+    pre_s: float = 5.0
+    post_s: float = 5.0
+    dir: str = "captures"
+    rearm: bool = True
+    triggers: List[TriggerConf] = field(default_factory=list)
 
 
 @dataclass
@@ -44,3 +105,4 @@ class LayoutState:
     buses: List[BusConf]
     panels: List[PanelConf]
     dock_state_b64: str = ""   # Qt saveState serialized to base64
+    derived: List[DerivedConf] = field(default_factory=list)
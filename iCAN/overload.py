@@ -0,0 +1,57 @@
+from __future__ import annotations
+from typing import Callable, Optional
+from PySide6.QtCore import QObject, QTimer, Signal
+
+PRIORITIES = ["low", "normal", "high"]
+MAX_LEVEL = 3
+# Minimum seconds between renders of a panel at each effective shed level
+SHED_RENDER_INTERVAL_S = [0.0, 0.25, 1.0, 4.0]
+
+
+def shed_for(level: int, priority: str) -> int:
+    """Effective shed level of a panel: low panels shed first, normal one level later, high never."""
+    if priority == "high":
+        return 0
+    return max(0, level - (1 if priority == "normal" else 0))
+
+
+class OverloadController(QObject):
+    """Raises a global shed level (0..MAX_LEVEL) while the GUI thread cannot keep up.
+
+    Pressure is the event-loop lag (ms) and the number of received frames still
+    queued for the GUI thread. The level steps up by one per check while either
+    exceeds its limit and steps down only after `calm_checks` quiet checks in a row.
+    """
+    sig_level = Signal(int)
+
+    def __init__(self, parent: Optional[QObject], lag_ms: Callable[[], float], queue_depth: Callable[[], int],
+                 target_lag_ms: float = 50.0, queue_limit: int = 2000, interval_ms: int = 250, calm_checks: int = 8):
+        super().__init__(parent)
+        self.lag_ms = lag_ms
+        self.queue_depth = queue_depth
+        self.target_lag_ms = float(target_lag_ms)
+        self.queue_limit = int(queue_limit)
+        self.calm_checks = calm_checks
+        self.level = 0
+        self.last_lag = 0.0
+        self.last_depth = 0
+        self._calm = 0
+        self.timer = QTimer(self); self.timer.setInterval(interval_ms); self.timer.timeout.connect(self.check); self.timer.start()
+
+    def check(self):
+        lag = self.last_lag = float(self.lag_ms())
+        depth = self.last_depth = int(self.queue_depth())
+        level = self.level
+        if lag > self.target_lag_ms or depth > self.queue_limit:
+            self._calm = 0
+            level = min(MAX_LEVEL, level + 1)
+        elif lag < self.target_lag_ms / 3 and depth < self.queue_limit / 4:
+            self._calm += 1
+            if self._calm >= self.calm_checks:
+                self._calm = 0
+                level = max(0, level - 1)
+        else:
+            self._calm = 0
+        if level != self.level:
+            self.level = level
+            self.sig_level.emit(level)
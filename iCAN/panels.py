@@ -1,18 +1,41 @@
 from __future__ import annotations
 import time
 from typing import Dict, Any, List, Optional
-from PySide6.QtCore import Qt, Slot, QTimer
+from PySide6.QtCore import Qt, Slot, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from PySide6.QtGui import QGuiApplication, QBrush, QColor
 from PySide6.QtWidgets import (
     QWidget, QDockWidget, QVBoxLayout, QLabel, QSlider, QHBoxLayout,
-    QCheckBox, QPushButton, QMessageBox, QTreeWidget, QTreeWidgetItem, QMenu
+    QCheckBox, QPushButton, QMessageBox, QTreeWidget, QTreeWidgetItem, QMenu, QListWidget, QTableView, QHeaderView,
+    QLineEdit, QFileDialog, QAbstractItemView
 )
+import numpy as np
 import pyqtgraph as pg
 
 from .models import PanelConf
 from .bus import FrameBus
+from .storage import buffer_for_signal
+from .registry import Selection
+from .overload import SHED_RENDER_INTERVAL_S
+from .stats import summary, histogram, resample_uniform, welch_psd
+from .timing import QUANTILES
+from .capture import FrameRing, CaptureWriter
+from .trace import TraceFilter
 
+# Rough per-row cost used for memory accounting: a tree item with five text columns
+_BYTES_PER_TABLE_ROW = 1024
+
+# Rule sets registered from the `alarms` config section use this id prefix
+ALARM_PREFIX = "alarm:"
+
+# Item roles for the table models' data(), bound once: PySide resolves `Qt.DisplayRole`
+# on every access (several microseconds), and data() runs for every visible cell and role
+_DISPLAY = Qt.ItemDataRole.DisplayRole
+_SORT = Qt.ItemDataRole.UserRole
+_FOREGROUND = Qt.ItemDataRole.ForegroundRole
+_HORIZONTAL = Qt.Orientation.Horizontal
 
 class BasePanel(QDockWidget):
+    EXPORTABLE = False  # offers "Export History…" (see export_series)
 
     def __init__(self, conf: PanelConf, hub: FrameBus):
         super().__init__(conf.title)
@@ -21,38 +44,159 @@ class BasePanel(QDockWidget):
         self.setObjectName(conf.panel_id)
         self.setContextMenuPolicy(Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self._context_menu)
+        self._hub_conns: List[tuple] = []
+        self._suspended = False
+        # Whether the panel is actually on screen; renders are skipped while False
+        self._visible = False
+        self._dock_shown = True  # False while tabbed behind another dock
+        self.last_viewed = 0.0   # monotonic time the panel was last on screen
+        # Effective load-shedding level (0 = none), set by the main window's OverloadController
+        self._shed = 0
+        self._last_render = 0.0  # monotonic time of the last scheduled render
+        self.visibilityChanged.connect(self._on_dock_visibility)
+        self.topLevelChanged.connect(lambda _: self._update_visibility())
 
         try:
             self.setMinimumSize(160, 120)
         except Exception:
             pass
 
-    def bus_match(self, bus_name: str) -> bool:
-        return (self.conf.bus_name is None) or (bus_name == self.conf.bus_name)
+    def _connect(self, signal, slot):
+        """Connect a hub signal and remember it so shutdown() can undo it."""
+        signal.connect(slot)
+        self._hub_conns.append((signal, slot))
 
-    def msgsig_match(self, msg_name: str, sig_name: str) -> bool:
-        if not self.conf.use_dbc:
-            return False
-        if self.conf.msg_name and self.conf.msg_name != msg_name:
-            return False
-        if self.conf.sig_name and self.conf.sig_name != sig_name:
+    def _subscribe(self, pairs):
+        """Ask the hub to decode these (msg_name, sig_name) pairs for this panel."""
+        self.hub.subscribe(self, pairs)
+
+    def shutdown(self):
+        """Detach from the hub; called before the panel is destroyed."""
+        self.hub.unsubscribe(self)
+        for signal, slot in self._hub_conns:
+            try:
+                signal.disconnect(slot)
+            except Exception:
+                pass
+        self._hub_conns.clear()
+
+    def set_suspended(self, on: bool):
+        """Suspended panels belong to an inactive dashboard tab: keep collecting, stop rendering."""
+        self._suspended = bool(on)
+        self._update_visibility()
+
+    def _on_dock_visibility(self, shown: bool):
+        self._dock_shown = shown
+        self._update_visibility()
+
+    def _compute_visible(self) -> bool:
+        if self._suspended or not self._dock_shown or not self.isVisible():
             return False
+        try:
+            mw = self.parentWidget()
+            if mw is not None and mw.window().isMinimized():
+                return False
+            if self.isFloating():
+                if self.isMinimized():
+                    return False
+                if not any(sc.availableGeometry().intersects(self.frameGeometry()) for sc in QGuiApplication.screens()):
+                    return False
+        except Exception:
+            pass
         return True
 
+    @property
+    def on_screen(self) -> bool:
+        """Whether the panel is actually on screen (as of the last _update_visibility())."""
+        return self._visible
+
+    def _update_visibility(self):
+        """Re-evaluate on-screen state; hidden, tabbed-away, off-screen or minimized panels don't render."""
+        vis = self._compute_visible()
+        if vis != self._visible:
+            self._visible = vis
+            self.last_viewed = time.monotonic()
+            self._visibility_changed(vis)
+
+    def _visibility_changed(self, visible: bool):
+        pass
+
+    def set_shed(self, level: int):
+        """Apply a load-shedding level (0..3); the scheduler renders shed panels less often."""
+        if level != self._shed:
+            prev, self._shed = self._shed, level
+            self._shed_changed(prev, level)
+
+    def _shed_changed(self, prev: int, level: int):
+        pass
+
+    def render_due(self, now: float) -> bool:
+        """False while a shed panel's minimum render interval has not passed."""
+        return not self._shed or now - self._last_render >= SHED_RENDER_INTERVAL_S[min(self._shed, len(SHED_RENDER_INTERVAL_S) - 1)]
+
+    def mark_rendered(self, now: float):
+        """Called by the RenderScheduler after render(), with the tick's monotonic time."""
+        self._last_render = now
+
+    def needs_render(self) -> bool:
+        """Polled by the RenderScheduler each frame; panels that update in their slots return False."""
+        return False
+
+    def render(self):
+        pass
+
+    def scroll(self):
+        """Called by the RenderScheduler each tick the panel does not need a render; must stay cheap."""
+        pass
+
+    def moveEvent(self, ev):
+        super().moveEvent(ev)
+        if self.isFloating():
+            self._update_visibility()
+
+    def history_bytes(self) -> int:
+        """Approximate memory held by this panel's history, in bytes."""
+        return 0
+
+    def shrink_history(self) -> int:
+        """Halve the history's resolution to free memory; returns the bytes freed."""
+        return 0
+
+    def export_series(self) -> List[tuple]:
+        """Snapshot of history as [(name, times, values, time_base)]; times are relative to time_base."""
+        return []
+
+    def _selection(self) -> Selection:
+        """Records of this panel's configured signal (none unless use_dbc)."""
+        c = self.conf
+        return Selection(self.hub.registry, [(c.bus_name, c.msg_name or None, c.sig_name or None)] if c.use_dbc else [])
+
     def _context_menu(self, pos):
         m = QMenu(self)
         act_edit = m.addAction("Edit Panel…")
+        act_export = m.addAction("Export History…") if self.EXPORTABLE else None
+        extra = {m.addAction(label): fn for label, fn in self._menu_actions()}
         act_remove = m.addAction("Remove Panel")
         act = m.exec(self.mapToGlobal(pos))
         if not act:
             return
-        if act == act_edit:
+        if act in extra:
+            extra[act]()
+        elif act == act_edit:
             self._request_edit()
-        elif act == act_remove:
+        elif act_export is not None and act == act_export:
             try:
-                self.setParent(None)
+                mw = self.window()
+                if hasattr(mw, '_export_panels'):
+                    mw._export_panels([self])
             except Exception:
                 pass
+        elif act == act_remove:
+            self._request_remove()
+
+    def _menu_actions(self) -> List[tuple]:
+        """Extra (label, callback) context menu entries of a panel type."""
+        return []
 
     def _request_edit(self):
         try:
@@ -62,6 +206,20 @@ class BasePanel(QDockWidget):
         except Exception:
             pass
 
+    def _request_remove(self):
+        try:
+            mw = self.window()
+            if hasattr(mw, '_remove_panel'):
+                mw._remove_panel(self)
+                return
+        except Exception:
+            pass
+        self.shutdown()
+        try:
+            self.setParent(None)
+        except Exception:
+            pass
+
 
 class ValuePanel(BasePanel):
     def __init__(self, conf: PanelConf, hub: FrameBus):
@@ -71,13 +229,25 @@ class ValuePanel(BasePanel):
         self.unit_lbl = QLabel(conf.units); self.unit_lbl.setAlignment(Qt.AlignCenter)
         lay.addWidget(self.value_lbl); lay.addWidget(self.unit_lbl)
         self.setWidget(w)
-        hub.sig_signal.connect(self.on_signal)
+        self._sel = self._selection()
+        self._pending: Optional[float] = None  # newest value not yet shown while shed
+        self._connect(hub.sig_batch, self.on_batch)
+        if conf.use_dbc: self._subscribe([(conf.msg_name, conf.sig_name)])
+
+    @Slot(object)
+    def on_batch(self, batch):
+        # Only changed values matter for a readout; show the newest
+        v = batch['v'][self._sel.mask(batch['h']) & batch['chg']]
+        if not len(v): return
+        if self._shed: self._pending = float(v[-1])
+        else: self.value_lbl.setText(f"{v[-1]:.3f}")
 
-    @Slot(str, int, str, str, float, float)
-    def on_signal(self, bus_name: str, can_id: int, msg_name: str, sig_name: str, value: float, ts: float):
-        if not self.bus_match(bus_name): return
-        if not self.msgsig_match(msg_name, sig_name): return
-        self.value_lbl.setText(f"{value:.3f}")
+    def needs_render(self) -> bool:
+        return self._pending is not None
+
+    def render(self):
+        if self._pending is not None:
+            self.value_lbl.setText(f"{self._pending:.3f}"); self._pending = None
 
 
 
@@ -91,23 +261,54 @@ class GaugePanel(BasePanel):
         self.slider.setMinimum(0); self.slider.setMaximum(1000)
         lay.addWidget(self.readout); lay.addWidget(self.slider)
         self.setWidget(w)
-        hub.sig_signal.connect(self.on_signal)
+        self._sel = self._selection()
+        self._pending: Optional[float] = None
+        self._connect(hub.sig_batch, self.on_batch)
+        if conf.use_dbc: self._subscribe([(conf.msg_name, conf.sig_name)])
+
+    @Slot(object)
+    def on_batch(self, batch):
+        v = batch['v'][self._sel.mask(batch['h']) & batch['chg']]
+        if not len(v): return
+        if self._shed: self._pending = float(v[-1])
+        else: self._show(float(v[-1]))
+
+    def needs_render(self) -> bool:
+        return self._pending is not None
+
+    def render(self):
+        if self._pending is not None:
+            self._show(self._pending); self._pending = None
 
-    @Slot(str, int, str, str, float, float)
-    def on_signal(self, bus_name: str, can_id: int, msg_name: str, sig_name: str, value: float, ts: float):
-        if not self.bus_match(bus_name): return
-        if not self.msgsig_match(msg_name, sig_name): return
+    def _show(self, value: float):
         self.readout.setText(f"{value:.2f} {self.conf.units}")
         rng = max(1e-9, self.conf.max_val - self.conf.min_val)
         frac = (value - self.conf.min_val) / rng
         self.slider.setValue(int(max(0, min(1, frac)) * 1000))
 
-    # (global DBC decoding handled by FrameBus → hub.sig_signal)
-
 
 class PlotPanel(BasePanel):
+    EXPORTABLE = True
+
     def __init__(self, conf: PanelConf, hub: FrameBus):
         super().__init__(conf, hub)
+        # The pyqtgraph widget is built on first show (see _ensure_built); data is collected from the start
+        self.plot = None
+        self.curve = None
+        self.ts0 = time.monotonic()
+        self.buf = buffer_for_signal(hub, conf.msg_name, conf.sig_name)  # times relative to ts0
+        self._container = QWidget(); self._container.setMinimumSize(120, 100)
+        QVBoxLayout(self._container)
+        self.setWidget(self._container)
+        self._sel = self._selection()
+        self._connect(hub.sig_batch, self.on_batch)
+        if conf.use_dbc: self._subscribe([(conf.msg_name, conf.sig_name)])
+        self._dirty = False
+
+    def _ensure_built(self):
+        if self.plot is not None:
+            return
+        conf = self.conf
         self.plot = pg.PlotWidget()
         self.plot.showGrid(x=True, y=True)
         self.plot.setLabel('left', conf.sig_name or "value")
@@ -132,36 +333,87 @@ class PlotPanel(BasePanel):
             self.plot.setMinimumSize(120, 100)
         except Exception:
             pass
-        self.ts0 = time.monotonic()
-        self.x: List[float] = []
-        self.y: List[float] = []
-        w = QWidget(); lay = QVBoxLayout(w)
-        lay.addWidget(self.plot)
-        self.setWidget(w)
-        hub.sig_signal.connect(self.on_signal)
-        self.timer = QTimer(self); self.timer.setInterval(30); self.timer.timeout.connect(self.refresh); self.timer.start()
+        self._container.layout().addWidget(self.plot)
 
-    def refresh(self):
-        win = max(0.5, self.conf.plot_window_s)
+    def _trim(self, tnow: float):
+        self.buf.trim_before(tnow - max(0.5, self.conf.plot_window_s))
+
+    def needs_render(self) -> bool:
+        return self._visible and self._dirty
+
+    def render(self):
+        self._ensure_built()
         tnow = time.monotonic() - self.ts0
-        while self.x and (tnow - self.x[0]) > win:
-            self.x.pop(0); self.y.pop(0)
-        self.curve.setData(self.x, self.y)
+        self._trim(tnow)
+        self.curve.setData(*self.buf.arrays())
+        self._set_x(tnow)
+        self._dirty = False
+
+    def _set_x(self, tnow: float):
+        win = max(0.5, self.conf.plot_window_s)
         self.plot.setXRange(max(0, tnow - win), tnow, padding=0)
 
-    @Slot(str, int, str, str, float, float)
-    def on_signal(self, bus_name: str, can_id: int, msg_name: str, sig_name: str, value: float, ts: float):
-        if not self.bus_match(bus_name): return
-        if not self.msgsig_match(msg_name, sig_name): return
-        t = ts - self.ts0
-        self.x.append(t); self.y.append(value)
+    def scroll(self):
+        # The time axis keeps moving while no new samples arrive; the data is not re-uploaded
+        if self._visible and self.plot is not None and len(self.buf):
+            self._set_x(time.monotonic() - self.ts0)
+
+    def _visibility_changed(self, visible: bool):
+        # Catch up on everything collected while hidden in a single redraw. The plot
+        # widget itself is built in render() so the scheduler's budget spreads the cost.
+        if visible: self._dirty = True
+
+    def history_bytes(self) -> int:
+        return self.buf.nbytes
+
+    def shrink_history(self) -> int:
+        before = self.history_bytes()
+        self.buf.decimate()
+        self._dirty = True
+        return before - self.history_bytes()
 
-    # (global DBC decoding handled by FrameBus -> hub.sig_signal)
+    def export_series(self) -> List[tuple]:
+        name = f"{self.conf.msg_name or ''}:{self.conf.sig_name or self.conf.title}"
+        return [(name, self.buf.times(), self.buf.values().copy(), self.ts0)]
+
+    @Slot(object)
+    def on_batch(self, batch):
+        # Every record is a sample, including repeated payloads (chg False)
+        rec = batch[self._sel.mask(batch['h'])]
+        if self._shed >= 2: rec = rec[::1 << (self._shed - 1)]  # decimate ingestion under heavy load
+        if not len(rec): return
+        t = rec['t'] - self.ts0
+        self.buf.extend(t, rec['v'])
+        self._dirty = True
+        # While hidden render() does not run, so keep the window bounded here
+        if not self._visible and (t[-1] - self.buf.first_time()) > 2 * max(0.5, self.conf.plot_window_s):
+            self._trim(t[-1])
 
 
 class MultiPlotPanel(BasePanel):
+    EXPORTABLE = True
+
     def __init__(self, conf: PanelConf, hub: FrameBus):
         super().__init__(conf, hub)
+        self.plot = None  # built on first show, like PlotPanel
+        self.ts0 = time.monotonic()
+        self.series: Dict[str, Dict[str, Any]] = {}
+        for item in (conf.multi_signals or []):
+            key = self._key(item)
+            self.series[key] = {'curve': None, 'color': item.get('color') or None, 'buf': buffer_for_signal(hub, item.get('msg_name'), item.get('sig_name')),
+                                'bus': item.get('bus_name'), 'msg': item.get('msg_name'), 'sig': item.get('sig_name')}
+        self._container = QWidget(); self._container.setMinimumSize(120, 100)
+        QVBoxLayout(self._container)
+        self.setWidget(self._container)
+        self._order = list(self.series.values())
+        self._sel = Selection(hub.registry, [(d['bus'], d['msg'] or None, d['sig'] or None) for d in self._order])
+        self._connect(hub.sig_batch, self.on_batch)
+        self._subscribe([(d['msg'], d['sig']) for d in self.series.values()])
+        self._dirty = False
+
+    def _ensure_built(self):
+        if self.plot is not None:
+            return
         self.plot = pg.PlotWidget()
         self.plot.showGrid(x=True, y=True)
         self.plot.setLabel('left', 'value')
@@ -171,49 +423,676 @@ class MultiPlotPanel(BasePanel):
             self.plot.setClipToView(True)
         except Exception:
             pass
-        self.ts0 = time.monotonic()
-        self.series: Dict[str, Dict[str, Any]] = {}
-        for item in (conf.multi_signals or []):
-            key = self._key(item)
-            color = item.get('color') or None
-            pen = pg.mkPen(color, width=2) if color else {'width': 2}
-            name = f"{item.get('msg_name','')}:{item.get('sig_name','')}"
-            curve = self.plot.plot(pen=pen, name=name)
+        for d in self.series.values():
+            pen = pg.mkPen(d['color'], width=2) if d['color'] else {'width': 2}
+            curve = self.plot.plot(pen=pen, name=f"{d['msg'] or ''}:{d['sig'] or ''}")
             try:
                 curve.setDownsampling(auto=False)
             except Exception:
                 pass
-            self.series[key] = {'curve': curve, 'x': [], 'y': [], 'bus': item.get('bus_name'), 'msg': item.get('msg_name'), 'sig': item.get('sig_name')}
-        w = QWidget(); lay = QVBoxLayout(w)
-        lay.addWidget(self.plot)
-        self.setWidget(w)
-        hub.sig_signal.connect(self.on_signal)
-        self.timer = QTimer(self); self.timer.setInterval(30); self.timer.timeout.connect(self.refresh); self.timer.start()
+            d['curve'] = curve
+        self._container.layout().addWidget(self.plot)
 
     def _key(self, it: Dict[str, str]) -> str:
         return f"{it.get('bus_name') or '(any)'}::{it.get('msg_name')}::{it.get('sig_name')}"
 
-    def refresh(self):
-        win = max(0.5, self.conf.plot_window_s)
+    def _trim(self, d: Dict[str, Any], tnow: float):
+        d['buf'].trim_before(tnow - max(0.5, self.conf.plot_window_s))
+
+    def needs_render(self) -> bool:
+        return self._visible and self._dirty
+
+    def render(self):
+        self._ensure_built()
         tnow = time.monotonic() - self.ts0
         for k, d in self.series.items():
-            xs, ys = d['x'], d['y']
-            while xs and (tnow - xs[0]) > win:
-                xs.pop(0); ys.pop(0)
-            d['curve'].setData(xs, ys)
+            self._trim(d, tnow)
+            d['curve'].setData(*d['buf'].arrays())
+        self._set_x(tnow)
+        self._dirty = False
+
+    def _set_x(self, tnow: float):
+        win = max(0.5, self.conf.plot_window_s)
         self.plot.setXRange(max(0, tnow - win), tnow, padding=0)
 
-    @Slot(str, int, str, str, float, float)
-    def on_signal(self, bus_name: str, can_id: int, msg_name: str, sig_name: str, value: float, ts: float):
-        t = ts - self.ts0
+    def scroll(self):
+        if self._visible and self.plot is not None and any(len(d['buf']) for d in self.series.values()):
+            self._set_x(time.monotonic() - self.ts0)
+
+    def _visibility_changed(self, visible: bool):
+        if visible: self._dirty = True
+
+    def history_bytes(self) -> int:
+        return sum(d['buf'].nbytes for d in self.series.values())
+
+    def shrink_history(self) -> int:
+        before = self.history_bytes()
         for d in self.series.values():
-            if d['bus'] and d['bus'] != bus_name: continue
-            if d['msg'] and d['msg'] != msg_name: continue
-            if d['sig'] and d['sig'] != sig_name: continue
-            d['x'].append(t); d['y'].append(value)
+            d['buf'].decimate()
+        self._dirty = True
+        return before - self.history_bytes()
+
+    def export_series(self) -> List[tuple]:
+        return [(f"{d['msg']}:{d['sig']}", d['buf'].times(), d['buf'].values().copy(), self.ts0) for d in self.series.values()]
+
+    @Slot(object)
+    def on_batch(self, batch):
+        idx = self._sel.index(batch['h'])
+        hit = idx >= 0
+        if not hit.any(): return
+        idx = idx[hit]; rec = batch[hit]
+        if self._shed >= 2:
+            step = 1 << (self._shed - 1); idx = idx[::step]; rec = rec[::step]
+        for i in np.unique(idx).tolist():
+            d = self._order[i]; sel = idx == i
+            t = rec['t'][sel] - self.ts0
+            d['buf'].extend(t, rec['v'][sel])
+            if not self._visible and (t[-1] - d['buf'].first_time()) > 2 * max(0.5, self.conf.plot_window_s):
+                self._trim(d, t[-1])
+        self._dirty = True
+
+
+class StatsPanel(BasePanel):
+    """Histogram, Welch PSD and summary statistics of one signal over its history window.
+
+    Samples are collected on every batch; the NumPy work runs in render(), at most
+    `stats_rate_hz` times per second and only while the panel is on screen.
+    """
+    EXPORTABLE = True
+
+    def __init__(self, conf: PanelConf, hub: FrameBus):
+        super().__init__(conf, hub)
+        self.view = None  # built on first show, like PlotPanel
+        self.ts0 = time.monotonic()
+        self.buf = buffer_for_signal(hub, conf.msg_name, conf.sig_name)
+        self._container = QWidget(); self._container.setMinimumSize(160, 120)
+        lay = QVBoxLayout(self._container)
+        self.stats_lbl = QLabel("--"); self.stats_lbl.setStyleSheet("font: 11px Monospace;"); self.stats_lbl.setWordWrap(True)
+        lay.addWidget(self.stats_lbl)
+        self.setWidget(self._container)
+        self._sel = self._selection()
+        self._connect(hub.sig_batch, self.on_batch)
+        if conf.use_dbc: self._subscribe([(conf.msg_name, conf.sig_name)])
+        self._dirty = False
+        self._next_calc = 0.0
+
+    def _ensure_built(self):
+        if self.view is not None:
+            return
+        name = self.conf.sig_name or "value"
+        self.view = pg.GraphicsLayoutWidget()
+        self.hist_plot = self.view.addPlot(row=0, col=0, title="Histogram")
+        self.hist_plot.setLabel('bottom', name, units=self.conf.units or None)
+        brush = pg.mkBrush(self.conf.color) if self.conf.color else (80, 140, 220, 160)
+        self.hist_curve = self.hist_plot.plot(stepMode="center", fillLevel=0, brush=brush)
+        self.psd_plot = self.view.addPlot(row=1, col=0, title="PSD (Welch)")
+        self.psd_plot.setLabel('bottom', 'frequency', units='Hz')
+        self.psd_plot.setLogMode(y=True)
+        self.psd_plot.showGrid(x=True, y=True)
+        self.psd_curve = self.psd_plot.plot(pen=pg.mkPen(self.conf.color, width=1) if self.conf.color else {'width': 1})
+        self._container.layout().insertWidget(0, self.view, 1)
+
+    def needs_render(self) -> bool:
+        return self._visible and self._dirty and time.monotonic() >= self._next_calc
+
+    def render(self):
+        self._ensure_built()
+        self._next_calc = time.monotonic() + 1.0 / max(0.1, self.conf.stats_rate_hz)
+        self._dirty = False
+        t, v = self.buf.arrays()
+        if len(v) < 2:
+            return
+        st = summary(v)
+        edges, counts = histogram(v, self.conf.stats_bins)
+        self.hist_curve.setData(edges, counts)
+        u, fs = resample_uniform(t, v)
+        f, psd = welch_psd(u, fs, self.conf.fft_size)
+        peak = ""
+        if len(f) > 1:
+            self.psd_curve.setData(f[1:], np.maximum(psd[1:], 1e-30))
+            peak = f"   peak {f[1 + int(psd[1:].argmax())]:.2f} Hz"
+        self.stats_lbl.setText(f"n {len(v)}   fs~{fs:.1f} Hz   min {st['min']:.4g}   max {st['max']:.4g}   "
+                               f"mean {st['mean']:.4g}   std {st['std']:.4g}   rms {st['rms']:.4g}{peak}")
+
+    def _visibility_changed(self, visible: bool):
+        if visible: self._dirty = True
+
+    def history_bytes(self) -> int:
+        return self.buf.nbytes
+
+    def shrink_history(self) -> int:
+        before = self.history_bytes()
+        self.buf.decimate()
+        self._dirty = True
+        return before - self.history_bytes()
+
+    def export_series(self) -> List[tuple]:
+        name = f"{self.conf.msg_name or ''}:{self.conf.sig_name or self.conf.title}"
+        return [(name, self.buf.times(), self.buf.values().copy(), self.ts0)]
+
+    @Slot(object)
+    def on_batch(self, batch):
+        rec = batch[self._sel.mask(batch['h'])]
+        if not len(rec): return
+        t = rec['t'] - self.ts0
+        self.buf.extend(t, rec['v'])
+        # The statistics cover exactly the window, visible or not
+        self.buf.trim_before(t[-1] - max(0.5, self.conf.plot_window_s))
+        self._dirty = True
+
+
+class ByteMapPanel(BasePanel):
+    """Heatmap of raw payloads, drawn as one ImageItem: no DBC needed.
+
+    "changes": ID x byte, brightness = how often the byte changed lately (decays
+    with a 2 s half-life). "bytes": ID x byte, the latest byte values. "bits": the
+    bits of one ID (`heat_id`) over its last frames, newest at the bottom. Raw
+    frames arrive as sig_raw_batch arrays and are folded in with NumPy only.
+    """
+    HISTORY_ROWS = 600
+    MAX_IDS = 4096  # further ids are ignored
+    HALF_LIFE_S = 2.0
+    MODES = ["changes", "bytes", "bits"]
+
+    def __init__(self, conf: PanelConf, hub: FrameBus):
+        super().__init__(conf, hub)
+        self.mode = conf.heat_mode if conf.heat_mode in self.MODES else "changes"
+        self.plot = None  # built on first show
+        self._ids = np.zeros(0, dtype=np.uint32)         # sorted ids, one image row each
+        self._val = np.zeros((0, 64), dtype=np.uint8)     # latest payload per id
+        self._act = np.zeros((0, 64), dtype=np.float32)   # decaying change counts per byte
+        self._seen = np.zeros(0, dtype=bool)
+        self._width = 8                                   # longest payload seen
+        self._wf = np.zeros((self.HISTORY_ROWS, 64 * 8), dtype=np.uint8)
+        self._wf_n = 0
+        self._ticks_n = -1
+        self._t_decay = time.monotonic()
+        self._container = QWidget(); self._container.setMinimumSize(160, 120)
+        lay = QVBoxLayout(self._container)
+        self.info_lbl = QLabel(""); self.info_lbl.setStyleSheet("font: 11px Monospace;")
+        lay.addWidget(self.info_lbl)
+        self.setWidget(self._container)
+        self._dirty = False
+        self._connect(hub.sig_raw_batch, self.on_raw_batch)
+        hub.set_raw_batch(self, True)
+
+    def _ensure_built(self):
+        if self.plot is not None:
+            return
+        self.plot = pg.PlotWidget()
+        self.plot.invertY(True)
+        self.img = pg.ImageItem(axisOrder='row-major')
+        self.img.setColorMap(pg.colormap.get('inferno'))
+        self.plot.addItem(self.img)
+        if self.mode == "bits":
+            self.plot.setLabel('left', 'frames (newest at bottom)')
+            self.plot.setLabel('bottom', f"0x{self.conf.heat_id or 0:X} bit (MSB first)")
+        else:
+            self.plot.setLabel('bottom', 'byte')
+        self.plot.scene().sigMouseMoved.connect(self._on_hover)
+        self._container.layout().insertWidget(0, self.plot, 1)
+
+    def _add_ids(self, new: np.ndarray):
+        ids = np.union1d(self._ids, new).astype(np.uint32)
+        pos = np.searchsorted(ids, self._ids)
+        val = np.zeros((len(ids), 64), dtype=np.uint8); act = np.zeros((len(ids), 64), dtype=np.float32); seen = np.zeros(len(ids), dtype=bool)
+        val[pos] = self._val; act[pos] = self._act; seen[pos] = self._seen
+        self._ids, self._val, self._act, self._seen = ids, val, act, seen
+
+    @Slot(object)
+    def on_raw_batch(self, raw):
+        if self.conf.bus_name:
+            b = self.hub.bus_index(self.conf.bus_name)
+            if b is None: return
+            raw = raw[raw['bus'] == b]
+        if self.mode == "bits":
+            raw = raw[raw['id'] == (self.conf.heat_id or 0)]
+        if not len(raw): return
+        self._width = max(self._width, int(raw['dlc'].max()))
+        if self.mode == "bits":
+            bits = np.unpackbits(raw['data'][-self.HISTORY_ROWS:], axis=1)
+            i = self._wf_n % self.HISTORY_ROWS; k = min(len(bits), self.HISTORY_ROWS - i)
+            self._wf[i:i + k] = bits[:k]; self._wf[:len(bits) - k] = bits[k:]
+            self._wf_n += len(bits)
+            self._dirty = True
+            return
+        ids = raw['id']
+        new = np.setdiff1d(ids, self._ids, assume_unique=False)
+        if len(new) and len(self._ids) < self.MAX_IDS: self._add_ids(new[:self.MAX_IDS - len(self._ids)])
+        rows = np.searchsorted(self._ids, ids)
+        if len(self._ids) >= self.MAX_IDS:
+            known = self._ids[np.minimum(rows, len(self._ids) - 1)] == ids
+            if not known.all():
+                raw = raw[known]; rows = rows[known]
+                if not len(raw): return
+        # Group frames by id (stable keeps arrival order) and compare each payload with the previous one
+        order = np.argsort(rows, kind='stable')
+        r = rows[order]; d = raw['data'][order, :self._width]
+        first = np.ones(len(r), dtype=bool); first[1:] = r[1:] != r[:-1]
+        starts = np.flatnonzero(first)
+        prev = np.empty_like(d); prev[1:] = d[:-1]; prev[starts] = self._val[r[starts], :self._width]
+        ch = d != prev
+        ch[starts[~self._seen[r[starts]]]] = False  # an id's first frame is not a change
+        self._act[r[starts], :self._width] += np.add.reduceat(ch.astype(np.float32), starts, axis=0)
+        last = np.append(starts[1:] - 1, len(r) - 1)
+        self._val[r[last], :self._width] = d[last]
+        self._seen[r[starts]] = True
+        self._dirty = True
+
+    def needs_render(self) -> bool:
+        # Change activity keeps fading while nothing arrives
+        return self._visible and (self._dirty or (self.mode == "changes" and len(self._ids) > 0))
+
+    def render(self):
+        self._ensure_built()
+        now = time.monotonic()
+        self._act *= 0.5 ** ((now - self._t_decay) / self.HALF_LIFE_S)
+        self._t_decay = now
+        w = self._width
+        if self.mode == "bits":
+            n = min(self._wf_n, self.HISTORY_ROWS); i = self._wf_n % self.HISTORY_ROWS
+            img = self._wf[:n] if self._wf_n <= self.HISTORY_ROWS else np.concatenate((self._wf[i:], self._wf[:i]))
+            img, levels = img[:, :8 * w], (0, 1)
+        elif self.mode == "bytes":
+            img, levels = self._val[:, :w], (0, 255)
+        else:
+            img = np.log1p(self._act[:, :w]); levels = (0, max(1.0, float(img.max()) if img.size else 1.0))
+        if img.size:
+            self.img.setImage(img, autoLevels=False, levels=levels)
+        if self.mode != "bits" and self._ticks_n != len(self._ids):
+            # One label per ~32 rows so thousands of ids stay readable
+            self._ticks_n = len(self._ids)
+            step = max(1, -(-len(self._ids) // 32))
+            self.plot.getAxis('left').setTicks([[(i + 0.5, f"0x{int(c):03X}") for i, c in enumerate(self._ids.tolist()) if i % step == 0]])
+            self.plot.getAxis('bottom').setTicks([[(j + 0.5, str(j)) for j in range(w)]])
+        self._dirty = False
+
+    def _on_hover(self, pos):
+        try:
+            pt = self.plot.getViewBox().mapSceneToView(pos)
+        except Exception:
+            return
+        row, col = int(np.floor(pt.y())), int(np.floor(pt.x()))
+        if self.mode == "bits":
+            if 0 <= col < 8 * self._width:
+                self.info_lbl.setText(f"0x{self.conf.heat_id or 0:X} byte {col // 8} bit {7 - col % 8}")
+        elif 0 <= row < len(self._ids) and 0 <= col < self._width:
+            self.info_lbl.setText(f"0x{int(self._ids[row]):03X} byte {col} = 0x{int(self._val[row, col]):02X}   changes {self._act[row, col]:.1f}")
+
+    def history_bytes(self) -> int:
+        return self._val.nbytes + self._act.nbytes + self._wf.nbytes
+
+    def shutdown(self):
+        self.hub.set_raw_batch(self, False)
+        super().shutdown()
+
+
+class TimingModel(QAbstractTableModel):
+    """Rows of TimingStats snapshots; cells are formatted only when the view asks for them."""
+    COLUMNS = ["CAN ID", "Bus", "Message", "Frames", "Expected (ms)", "Min (ms)", "Mean (ms)", "Max (ms)"] + \
+              [f"P{p * 100:g} (ms)" for p in QUANTILES] + ["Jitter (ms)", "Late", "Missing", "Silent (s)"]
+
+    def __init__(self):
+        super().__init__()
+        self._keys: List[tuple] = []   # (bus, id) per row
+        self._names: List[str] = []
+        self._num = np.zeros((0, len(self.COLUMNS)))  # sort values per cell
+        self._bad = np.zeros(0, dtype=np.int8)        # 2 = missing frames or silent, 1 = late frames
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._keys)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == _DISPLAY and orientation == _HORIZONTAL:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        r, c = index.row(), index.column()
+        if role == _DISPLAY:
+            if c == 0: return f"0x{self._keys[r][1]:03X}"
+            if c == 1: return self._keys[r][0]
+            if c == 2: return self._names[r]
+            v = self._num[r, c]
+            if not np.isfinite(v) or (c == 4 and v <= 0): return ""
+            if c in (3, len(self.COLUMNS) - 3, len(self.COLUMNS) - 2): return str(int(v))
+            return f"{v:.1f}" if c == len(self.COLUMNS) - 1 else f"{v:.3f}"
+        if role == _SORT:
+            if c == 0: return self._keys[r][1]
+            if c == 1: return self._keys[r][0]
+            if c == 2: return self._names[r]
+            return float(self._num[r, c])
+        if role == _FOREGROUND and self._bad[r]:
+            return QBrush(QColor("#D03030") if self._bad[r] == 2 else QColor("#C08000"))
+        return None
+
+    def update(self, snaps: List[tuple], names: List[Dict[int, Any]]):
+        """Replace the contents with (bus, snapshot) pairs; names[i] maps ids of bus i to messages."""
+        keys, labels, blocks, bad = [], [], [], []
+        for (bus_name, snap), msgs in zip(snaps, names):
+            ids = snap['id'].tolist()
+            keys += [(bus_name, i) for i in ids]
+            labels += [msgs[i].name if i in msgs else "" for i in ids]
+            exp = snap['expected']
+            silent = (exp > 0) & (snap['age'] > 3 * exp)
+            bad.append(np.where((snap['missing'] > 0) | silent, 2, (snap['late'] > 0).astype(np.int8)))
+            blocks.append(np.column_stack([np.zeros((len(ids), 3)), snap['frames'], exp * 1e3, snap['min'] * 1e3, snap['mean'] * 1e3,
+                                           snap['max'] * 1e3, snap['q'] * 1e3, snap['std'] * 1e3, snap['late'], snap['missing'], snap['age']]))
+        num = np.vstack(blocks) if blocks else np.zeros((0, len(self.COLUMNS)))
+        bad = np.concatenate(bad) if bad else np.zeros(0, dtype=np.int8)
+        if keys == self._keys:
+            self._num, self._names, self._bad = num, labels, bad
+            if keys: self.dataChanged.emit(self.index(0, 0), self.index(len(keys) - 1, len(self.COLUMNS) - 1))
+            return
+        self.beginResetModel()
+        self._keys, self._names, self._num, self._bad = keys, labels, num, bad
+        self.endResetModel()
+
+
+class TimingPanel(BasePanel):
+    """Cycle time, jitter and late/missing frame counts per frame id, from hub.timing.
+
+    The statistics are kept by the reader threads (timing.TimingStats); this panel
+    only snapshots them `stats_rate_hz` times per second while on screen, so its
+    cost does not depend on the bus load. Rows turn red for ids with missing frames
+    or silent for more than three cycles, orange for late frames.
+    """
+
+    def __init__(self, conf: PanelConf, hub: FrameBus):
+        super().__init__(conf, hub)
+        self.model = TimingModel()
+        self.proxy = QSortFilterProxyModel(self); self.proxy.setSourceModel(self.model); self.proxy.setSortRole(Qt.UserRole)
+        self.view = QTableView()
+        self.view.setModel(self.proxy)
+        self.view.setSortingEnabled(True); self.view.sortByColumn(0, Qt.AscendingOrder)
+        self.view.setAlternatingRowColors(True)
+        self.view.verticalHeader().setVisible(False)
+        self.view.verticalHeader().setDefaultSectionSize(self.view.fontMetrics().height() + 4)
+        self.view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.info_lbl = QLabel(""); self.info_lbl.setStyleSheet("font: 11px Monospace;")
+        w = QWidget(); lay = QVBoxLayout(w)
+        lay.addWidget(self.view); lay.addWidget(self.info_lbl)
+        self.setWidget(w)
+        self._next_calc = 0.0
+
+    def _stats(self) -> List[tuple]:
+        return [(b, t) for b, t in self.hub.timing.items() if self.conf.bus_name in (None, b)]
+
+    def needs_render(self) -> bool:
+        return self._visible and time.monotonic() >= self._next_calc
+
+    def render(self):
+        now = time.monotonic()
+        self._next_calc = now + 1.0 / max(0.1, self.conf.stats_rate_hz)
+        stats = self._stats()
+        snaps = [(b, t.snapshot(now)) for b, t in stats]
+        self.model.update(snaps, [self.hub.msg_map(b) for b, _ in snaps])
+        frames = sum(int(s['frames'].sum()) for _, s in snaps)
+        late = sum(int(s['late'].sum()) for _, s in snaps)
+        missing = sum(int(s['missing'].sum()) for _, s in snaps)
+        dropped = sum(t.dropped for _, t in stats)
+        self.info_lbl.setText(f"{self.model.rowCount()} ids   {frames} frames   {late} late   {missing} missing"
+                              + (f"   {dropped} frames of ids over the limit" if dropped else ""))
+
+    def reset(self):
+        for _, t in self._stats(): t.reset()
+        self._next_calc = 0.0
+
+    def _menu_actions(self) -> List[tuple]:
+        def export():
+            mw = self.window()
+            if hasattr(mw, 'export_timing'): mw.export_timing()
+        return [("Export Timing (JSON)…", export), ("Reset Statistics", self.reset)]
+
+
+class TraceModel(QAbstractTableModel):
+    """Virtual rows over a FrameRing: the frames with sequence numbers `seq`, or only the last `tail` of them.
+
+    Only the rows the view paints are formatted. With a tail the row count stays
+    fixed once reached and advance() just repaints, so a running trace never makes
+    the view relayout a ring-sized row set; without one every frame is a row.
+    """
+    COLUMNS = ["Time (s)", "Bus", "ID", "Message", "DLC", "Data"]
+
+    def __init__(self, hub: FrameBus, t0: float):
+        super().__init__()
+        self.hub = hub
+        self.t0 = t0
+        self.ring: Optional[FrameRing] = None
+        self.seq = np.zeros(0, dtype=np.int64)
+        self.tail = 0
+        self._rows = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == _DISPLAY and orientation == _HORIZONTAL:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != _DISPLAY:
+            return None
+        ring = self.ring
+        n = int(self.seq[len(self.seq) - self._rows + index.row()])
+        if n < ring.n - ring.capacity:
+            return None  # overwritten since the last refresh
+        i, c = n % ring.capacity, index.column()
+        if c == 0: return f"{ring.ts[i] - self.t0:.6f}"
+        b = int(ring.bus[i])
+        bus_name = self.hub.bus_names[b] if b < len(self.hub.bus_names) else str(b)
+        if c == 1: return bus_name
+        cid = int(ring.ids[i])
+        if c == 2: return f"{cid:08X}" if cid > 0x7FF else f"{cid:03X}"
+        if c == 3:
+            m = self.hub.msg_map(bus_name).get(cid)
+            return m.name if m else ""
+        if c == 4: return str(int(ring.dlc[i]))
+        return ring.data[i, :ring.dlc[i]].tobytes().hex(' ').upper()
+
+    def _count(self) -> int:
+        return min(self.tail, len(self.seq)) if self.tail else len(self.seq)
+
+    def set_rows(self, ring: FrameRing, seq: np.ndarray, tail: int = 0):
+        self.beginResetModel()
+        self.ring, self.seq, self.tail = ring, seq, tail
+        self._rows = self._count()
+        self.endResetModel()
+
+    def advance(self, drop: int, new: np.ndarray):
+        """Forget the `drop` oldest sequence numbers and append `new` (tail mode)."""
+        self.seq = np.concatenate((self.seq[drop:], new))
+        rows = self._count()
+        if rows > self._rows:
+            self.beginInsertRows(QModelIndex(), self._rows, rows - 1); self._rows = rows; self.endInsertRows()
+        elif rows < self._rows:
+            self.beginRemoveRows(QModelIndex(), rows, self._rows - 1); self._rows = rows; self.endRemoveRows()
+        if rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(rows - 1, len(self.COLUMNS) - 1))
+
+
+class TracePanel(BasePanel):
+    """Chronological, candump-style trace of raw frames; no DBC needed.
+
+    Frames from sig_raw_batch go into a preallocated FrameRing of `trace_frames`.
+    The bus / id-range / payload filter runs with NumPy over each batch as it
+    arrives, and over the whole ring when the filter changes. While running, the
+    view shows the newest LIVE_ROWS matches, advanced at most once per render tick;
+    pause freezes a copy of the ring and shows every match in it, so the whole
+    buffer can be scrolled back while recording goes on underneath.
+    """
+    LIVE_ROWS = 2000
+    REFRESH_S = 1.0 / 30  # scrolling text needs no more; each refresh repaints every visible cell
+
+    def __init__(self, conf: PanelConf, hub: FrameBus):
+        super().__init__(conf, hub)
+        self.ring = FrameRing(conf.trace_frames, 64)
+        self.frozen: Optional[FrameRing] = None  # set while paused
+        self.model = TraceModel(hub, time.monotonic())
+        self.model.set_rows(self.ring, np.zeros(0, dtype=np.int64), self.LIVE_ROWS)
+        self.filter = TraceFilter()
+        self._bus_missing = False  # filtered bus has sent nothing yet
+        self._n_buses = 0
+        self._pending: List[np.ndarray] = []  # matching sequence numbers not yet in the model
+        self._pending_n = 0
+        self._refilter = False  # filter changed while paused
+        self._writer: Optional[CaptureWriter] = None
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.setWordWrap(False)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.view.setStyleSheet("font: 11px Monospace;")
+        vh = self.view.verticalHeader(); vh.setVisible(False)
+        vh.setSectionResizeMode(QHeaderView.Fixed); vh.setDefaultSectionSize(self.view.fontMetrics().height() + 4)
+        self.view.horizontalHeader().setStretchLastSection(True)
+        self.ids_le = QLineEdit(conf.trace_ids); self.ids_le.setPlaceholderText("IDs, e.g. 100-1FF, 7E8")
+        self.data_le = QLineEdit(conf.trace_data); self.data_le.setPlaceholderText("Data, e.g. 03 7F ?? 1x")
+        self.ids_le.editingFinished.connect(self._apply_filter); self.data_le.editingFinished.connect(self._apply_filter)
+        self.pause_btn = QPushButton("Pause"); self.pause_btn.setCheckable(True); self.pause_btn.toggled.connect(self.set_paused)
+        self.auto_chk = QCheckBox("Auto-scroll"); self.auto_chk.setChecked(True)
+        clear_btn = QPushButton("Clear"); clear_btn.clicked.connect(self.clear)
+        self.info_lbl = QLabel(""); self.info_lbl.setStyleSheet("font: 11px Monospace;")
+        bar = QHBoxLayout()
+        for wdg in (self.ids_le, self.data_le, self.pause_btn, self.auto_chk, clear_btn): bar.addWidget(wdg)
+        w = QWidget(); lay = QVBoxLayout(w)
+        lay.addLayout(bar); lay.addWidget(self.view, 1); lay.addWidget(self.info_lbl)
+        self.setWidget(w)
+        self._dirty = False
+        self._apply_filter()
+        self._connect(hub.sig_raw_batch, self.on_raw_batch)
+        hub.set_raw_batch(self, True)
+
+    def _apply_filter(self):
+        bus = None
+        self._n_buses = len(self.hub.bus_names)
+        self._bus_missing = self.conf.bus_name is not None and self.conf.bus_name not in self.hub.bus_names
+        if self.conf.bus_name is not None and not self._bus_missing:
+            bus = self.hub.bus_names.index(self.conf.bus_name)
+        try:
+            self.filter = TraceFilter.parse(bus, self.ids_le.text(), self.data_le.text())
+        except ValueError as e:
+            self.info_lbl.setText(f"Filter error: {e}"); return
+        self.conf.trace_ids, self.conf.trace_data = self.ids_le.text().strip(), self.data_le.text().strip()
+        self._refilter = self.frozen is not None
+        self._refresh_all(self.frozen or self.ring)
+
+    def _matching(self, ring: FrameRing) -> np.ndarray:
+        """Sequence numbers of the frames in `ring` that pass the filter."""
+        seqs = ring.seqs()
+        if self._bus_missing:
+            return seqs[:0]
+        if self.filter.passes_all:
+            return seqs
+        slots = seqs % ring.capacity
+        return seqs[self.filter.match(ring.bus[slots], ring.ids[slots], ring.dlc[slots], ring.data[slots, :self.filter.min_dlc])]
+
+    def _refresh_all(self, ring: FrameRing):
+        self._pending.clear(); self._pending_n = 0
+        self.model.set_rows(ring, self._matching(ring), 0 if ring is self.frozen else self.LIVE_ROWS)
+        self._dirty = True
+
+    @Slot(object)
+    def on_raw_batch(self, raw):
+        if self._bus_missing and len(self.hub.bus_names) != self._n_buses:
+            self._apply_filter()
+        n0 = self.ring.n
+        self.ring.push_batch(raw)
+        if self._bus_missing:
+            return
+        hit = np.flatnonzero(self.filter.match(raw['bus'], raw['id'], raw['dlc'], raw['data']))
+        if len(hit):
+            self._pending.append(n0 + hit); self._pending_n += len(hit)
+            if self._pending_n > 2 * self.ring.capacity:
+                keep = self._take_pending()
+                self._pending, self._pending_n = [keep], len(keep)
+        self._dirty = True
+
+    def _take_pending(self) -> np.ndarray:
+        """Pending sequence numbers still in the ring."""
+        new = np.concatenate(self._pending) if self._pending else np.zeros(0, dtype=np.int64)
+        self._pending.clear(); self._pending_n = 0
+        return new[np.searchsorted(new, self.ring.n - self.ring.capacity):]
+
+    def needs_render(self) -> bool:
+        return self._visible and self._dirty and time.monotonic() - self._last_render >= self.REFRESH_S
+
+    def render(self):
+        self._dirty = False
+        if self.frozen is None:
+            new = self._take_pending()
+            drop = int(np.searchsorted(self.model.seq, self.ring.n - self.ring.capacity))
+            if drop or len(new):
+                self.model.advance(drop, new)
+                if self.auto_chk.isChecked(): self.view.scrollToBottom()
+        frames = min(self.ring.n, self.ring.capacity)
+        shown = f"{len(self.model.seq)} of {min(self.frozen.n, self.frozen.capacity)} frames (paused, {frames} recorded)" if self.frozen is not None \
+            else f"{len(self.model.seq)} of {frames} frames (newest {self.model.rowCount()} shown; pause to scroll back)"
+        self.info_lbl.setText(shown)
+
+    def set_paused(self, on: bool):
+        if on and self.frozen is None:
+            self.render()
+            self.frozen = self.ring.frozen()
+            self.model.set_rows(self.frozen, self.model.seq)
+            self.view.scrollToBottom()
+        elif not on and self.frozen is not None:
+            self.frozen = None
+            if self._refilter:
+                self._refresh_all(self.ring)
+            else:
+                seq = np.concatenate((self.model.seq, self._take_pending()))
+                self.model.set_rows(self.ring, seq[np.searchsorted(seq, self.ring.n - self.ring.capacity):], self.LIVE_ROWS)
+            self._refilter = False
+            if self.auto_chk.isChecked(): self.view.scrollToBottom()
+        self.pause_btn.setText("Resume" if on else "Pause")
+        self._dirty = True
+
+    def clear(self):
+        self.pause_btn.setChecked(False)
+        self.ring.n = 0
+        self._refresh_all(self.ring)
+
+    def history_bytes(self) -> int:
+        return self.ring.nbytes + (self.frozen.nbytes if self.frozen is not None else 0) + self.model.seq.nbytes
+
+    def save_log(self):
+        """Write the frames the trace shows (filtered, paused view if paused) as a candump-style log."""
+        path, _ = QFileDialog.getSaveFileName(self, "Save Trace", "trace.log", "candump log (*.log);;All files (*)")
+        if not path:
+            return
+        ring = self.model.ring
+        seq = self.model.seq[self.model.seq >= ring.n - ring.capacity]
+        slots = seq % ring.capacity
+        frames = {'ts': ring.ts[slots], 'bus': ring.bus[slots], 'ids': ring.ids[slots], 'dlc': ring.dlc[slots], 'data': ring.data[slots]}
+        self._writer = CaptureWriter(frames, list(self.hub.bus_names), path, time.time() - time.monotonic(), f"trace, {len(seq)} frames")
+        self._writer.sig_done.connect(self._on_saved)
+        self._writer.start()
+
+    @Slot(str, str)
+    def _on_saved(self, path: str, err: str):
+        self._writer = None
+        self.info_lbl.setText(f"Save failed: {err}" if err else f"Saved {path}")
+
+    def _menu_actions(self) -> List[tuple]:
+        return [("Save Trace (candump log)…", self.save_log)]
+
+    def shutdown(self):
+        super().shutdown()
+        if self._writer is not None:
+            self._writer.wait(5000)
 
 
 class TablePanel(BasePanel):
+    # Rows are per frame id; beyond this the least recently seen quarter is dropped
+    MAX_ROWS = 4096
+
     def __init__(self, conf: PanelConf, hub: FrameBus):
         super().__init__(conf, hub)
         self.tree = QTreeWidget()
@@ -223,12 +1102,34 @@ class TablePanel(BasePanel):
         self.tree.setAlternatingRowColors(True)
         self.tree.setSortingEnabled(True)
         self.items_by_id: Dict[int, QTreeWidgetItem] = {}
-        self.last_ts: Dict[int, float] = {}
+        self.last_ts: Dict[int, float] = {}  # last frame per id; also ranks rows for _evict
+        self._cycle_from = 0.0  # cycle times only span frames after this (end of the last pause)
+        self._named: set = set()
+        self._named_dbc = -1  # hub.dbc_version the names were resolved for
+        self._expanded: Dict[int, str] = {}  # can_id -> message name of expanded rows
+        self._sel = Selection(hub.registry, [])
+        self._children: Dict[tuple, QTreeWidgetItem] = {}  # (can_id, signal) -> child row, shared by all buses
         w = QWidget(); lay = QVBoxLayout(w)
         lay.addWidget(self.tree)
         self.setWidget(w)
-        hub.sig_raw.connect(self.on_raw)
-        hub.sig_signal.connect(self.on_sig)
+        self._connect(hub.sig_raw, self.on_raw)
+        self._connect(hub.sig_batch, self.on_batch)
+        # Signals are decoded for a message only while its row is expanded
+        self.tree.itemExpanded.connect(lambda it: self._set_decode(it, True))
+        self.tree.itemCollapsed.connect(lambda it: self._set_decode(it, False))
+
+    def _set_decode(self, item: QTreeWidgetItem, on: bool):
+        can_id = item.data(0, Qt.UserRole)
+        if can_id is None:
+            return
+        can_id = int(can_id)
+        if on and item.text(1): self._expanded[can_id] = item.text(1)
+        else: self._expanded.pop(can_id, None)
+        self._sel = Selection(self.hub.registry, [(self.conf.bus_name, m, None) for m in self._expanded.values()])
+        self.hub.set_full_decode(self, can_id, on)
+
+    def history_bytes(self) -> int:
+        return len(self.items_by_id) * _BYTES_PER_TABLE_ROW
 
     def _bus_ok(self, bus_name: str) -> bool:
         return (self.conf.bus_name is None) or (bus_name == self.conf.bus_name)
@@ -236,50 +1137,75 @@ class TablePanel(BasePanel):
     def _fmt_id(self, can_id: int) -> str:
         return f"0x{can_id:03X}"
 
+    def _shed_changed(self, prev: int, level: int):
+        # Any shedding pauses the table; cycle times restart after the gap
+        if bool(prev) != bool(level):
+            self.setWindowTitle(self.conf.title + (" [paused]" if level else ""))
+            if not level: self._cycle_from = time.monotonic()
+
     @Slot(str, int, bytes, float)
     def on_raw(self, bus_name: str, can_id: int, data: bytes, ts: float):
-        if not self._bus_ok(bus_name):
+        if self._shed or not self._bus_ok(bus_name):
             return
         item = self.items_by_id.get(can_id)
         if item is None:
+            if len(self.items_by_id) >= self.MAX_ROWS:
+                self._evict(len(self.items_by_id) // 4)
             item = QTreeWidgetItem(self.tree)
             self.items_by_id[can_id] = item
+            item.setData(0, Qt.UserRole, can_id)
+            item.setText(0, self._fmt_id(can_id))
             item.setExpanded(False)
         prev = self.last_ts.get(can_id)
-        cyc_ms = (ts - prev) * 1000.0 if prev else 0.0
+        cyc_ms = (ts - prev) * 1000.0 if prev and prev >= self._cycle_from else 0.0
         self.last_ts[can_id] = ts
-        msg_name = ""
-        try:
-            if self.hub.dbc:
-                m = self.hub.dbc.get_message_by_frame_id(can_id)
-                if m:
-                    msg_name = m.name
-        except Exception:
-            pass
-        item.setText(0, self._fmt_id(can_id))
-        item.setText(1, msg_name)
+        if self._named_dbc != self.hub.dbc_version:
+            self._named_dbc = self.hub.dbc_version; self._named.clear()
+        if can_id not in self._named:
+            # Resolve the message name once per id (and again after a DBC reload)
+            self._named.add(can_id)
+            m = self.hub.msg_map(bus_name).get(can_id)
+            item.setText(1, m.name if m else "")
+            item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator if m else QTreeWidgetItem.DontShowIndicatorWhenChildless)
         item.setText(2, f"{cyc_ms:.1f}")
         item.setText(3, str(len(data)))
         item.setText(4, data.hex(' ').upper())
 
-    @Slot(str, int, str, str, float, float)
-    def on_sig(self, bus_name: str, can_id: int, msg_name: str, sig_name: str, value: float, ts: float):
-        if not self._bus_ok(bus_name):
+    def _evict(self, n: int):
+        """Drop the n least recently seen rows (random or scanning ids would grow the table forever)."""
+        stale = set(sorted(self.last_ts, key=self.last_ts.get)[:n])
+        for can_id in stale:
+            item = self.items_by_id.pop(can_id, None)
+            self.last_ts.pop(can_id, None); self._named.discard(can_id)
+            if self._expanded.pop(can_id, None) is not None:
+                self.hub.set_full_decode(self, can_id, False)
+            if item is not None:
+                self.tree.takeTopLevelItem(self.tree.indexOfTopLevelItem(item))
+        for key in [k for k in self._children if k[0] in stale]:
+            del self._children[key]
+        self._sel = Selection(self.hub.registry, [(self.conf.bus_name, m, None) for m in self._expanded.values()])
+
+    @Slot(object)
+    def on_batch(self, batch):
+        if self._shed or not self._expanded:
             return
-        item = self.items_by_id.get(can_id)
-        if item is None:
+        rec = batch[self._sel.mask(batch['h']) & batch['chg']]
+        if not len(rec):
             return
-        child = None
-        for i in range(item.childCount()):
-            it = item.child(i)
-            if it.text(1) == sig_name:
-                child = it
-                break
-        if child is None:
-            child = QTreeWidgetItem(item)
-            child.setText(1, sig_name)
-            item.addChild(child)
-        child.setText(4, f"{value}")
+        latest = dict(zip(rec['h'].tolist(), rec['v'].tolist()))
+        reg = self.hub.registry
+        can_ids = reg.can_ids()
+        for h, value in latest.items():
+            key = (int(can_ids[h]), reg.keys[h][2])
+            child = self._children.get(key)
+            if child is None:
+                item = self.items_by_id.get(key[0])
+                if item is None:
+                    continue
+                child = QTreeWidgetItem(item)
+                child.setText(1, key[1])
+                self._children[key] = child
+            child.setText(4, f"{value}")
 
 
 class LedPanel(BasePanel):
@@ -291,50 +1217,64 @@ class LedPanel(BasePanel):
         self.ind.setStyleSheet("border-radius: 24px; background:#666;")
         lay.addWidget(self.lbl); lay.addWidget(self.ind, alignment=Qt.AlignCenter)
         self.setWidget(w)
-        self.rules = self._parse_rules(conf.led_rules or [])
-        hub.sig_signal.connect(self.on_signal)
-
-    def _parse_rules(self, lines: List[str]):
-        rules = []
-        for ln in lines:
-            try:
-                if ln.startswith('=='):
-                    v = float(ln[2:].split(':', 1)[0].strip()); c = ln.split(':', 1)[1].strip(); rules.append(('eq', v, c)); continue
-                if ln.startswith('>='):
-                    v = float(ln[2:].split(':', 1)[0].strip()); c = ln.split(':', 1)[1].strip(); rules.append(('ge', v, c)); continue
-                if ln.startswith('<='):
-                    v = float(ln[2:].split(':', 1)[0].strip()); c = ln.split(':', 1)[1].strip(); rules.append(('le', v, c)); continue
-                if ln.startswith('>'):
-                    v = float(ln[1:].split(':', 1)[0].strip()); c = ln.split(':', 1)[1].strip(); rules.append(('gt', v, c)); continue
-                if ln.startswith('<'):
-                    v = float(ln[1:].split(':', 1)[0].strip()); c = ln.split(':', 1)[1].strip(); rules.append(('lt', v, c)); continue
-                if '-' in ln and ':' in ln:
-                    rng, c = ln.split(':', 1); a, b = rng.split('-', 1); rules.append(('range', float(a.strip()), float(b.strip()), c.strip())); continue
-            except Exception:
-                continue
-        return rules
+        # Rules are evaluated centrally by hub.rules; we only react to state transitions
+        if conf.use_dbc and conf.msg_name and conf.sig_name:
+            hub.rules.add_rule_set(conf.panel_id, conf.bus_name, conf.msg_name, conf.sig_name, conf.led_rules or [],
+                                   hysteresis=conf.rule_hysteresis, debounce_ms=conf.rule_debounce_ms)
+        self._connect(hub.rules.sig_transition, self.on_transition)
 
-    def _color_for(self, value: float) -> Optional[str]:
-        for r in self.rules:
-            try:
-                if r[0] == 'eq' and value == r[1]: return r[2]
-                if r[0] == 'ge' and value >= r[1]: return r[2]
-                if r[0] == 'le' and value <= r[1]: return r[2]
-                if r[0] == 'gt' and value > r[1]: return r[2]
-                if r[0] == 'lt' and value < r[1]: return r[2]
-                if r[0] == 'range' and r[1] <= value <= r[2]: return r[3]
-            except Exception:
-                continue
-        return None
+    def shutdown(self):
+        self.hub.rules.remove_rule_set(self.conf.panel_id)
+        super().shutdown()
 
-    @Slot(str, int, str, str, float, float)
-    def on_signal(self, bus_name: str, can_id: int, msg_name: str, sig_name: str, value: float, ts: float):
-        if not self.bus_match(bus_name): return
-        if not self.msgsig_match(msg_name, sig_name): return
-        col = self._color_for(value)
-        if col:
-            self.ind.setStyleSheet(f"border-radius: 24px; background:{col};")
+    @Slot(str, int, str, float, float)
+    def on_transition(self, set_id: str, state: int, label: str, value: float, ts: float):
+        if set_id != self.conf.panel_id: return
+        if state >= 0 and label:
+            self.ind.setStyleSheet(f"border-radius: 24px; background:{label};")
         else:
             self.ind.setStyleSheet("border-radius: 24px; background:#666;")
 
-    # (global DBC decoding handled by FrameBus -> hub.sig_signal)
\ No newline at end of file
+
+class AlarmPanel(BasePanel):
+    """Active alarms (one row per alarm rule set) and a bounded transition history."""
+    MAX_HISTORY = 500
+
+    def __init__(self, conf: PanelConf, hub: FrameBus):
+        super().__init__(conf, hub)
+        self.tree = QTreeWidget()
+        self.tree.setColumnCount(4)
+        self.tree.setHeaderLabels(["Alarm", "State", "Value", "Since (s)"])
+        self.tree.setUniformRowHeights(True)
+        self.history = QListWidget()
+        self.history.setUniformItemSizes(True)
+        self.items: Dict[str, QTreeWidgetItem] = {}
+        self.ts0 = time.monotonic()
+        w = QWidget(); lay = QVBoxLayout(w)
+        lay.addWidget(self.tree, 2); lay.addWidget(QLabel("History")); lay.addWidget(self.history, 1)
+        self.setWidget(w)
+        for rs in hub.rules.rule_sets(ALARM_PREFIX):
+            self._row(rs.set_id)
+        self._connect(hub.rules.sig_transition, self.on_transition)
+
+    def _row(self, set_id: str) -> QTreeWidgetItem:
+        item = self.items.get(set_id)
+        if item is None:
+            item = QTreeWidgetItem(self.tree)
+            item.setText(0, set_id[len(ALARM_PREFIX):]); item.setText(1, "OK")
+            self.items[set_id] = item
+        return item
+
+    @Slot(str, int, str, float, float)
+    def on_transition(self, set_id: str, state: int, label: str, value: float, ts: float):
+        if not set_id.startswith(ALARM_PREFIX): return
+        item = self._row(set_id)
+        active = state >= 0
+        item.setText(1, label if active else "OK")
+        item.setText(2, f"{value:.3f}")
+        item.setText(3, f"{ts - self.ts0:.1f}")
+        brush = QBrush(QColor("#FFB0B0")) if active else QBrush()
+        for c in range(4): item.setBackground(c, brush)
+        self.history.insertItem(0, f"{ts - self.ts0:9.2f}s  {set_id[len(ALARM_PREFIX):]}: {label if active else 'cleared'} ({value:.3f})")
+        while self.history.count() > self.MAX_HISTORY:
+            self.history.takeItem(self.history.count() - 1)
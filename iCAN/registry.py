@@ -0,0 +1,89 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+# One decoded update: signal handle, value, reception time, and whether the value
+# differs from the previous update of that handle (False for repeated payloads)
+RECORD_DTYPE = np.dtype([('h', '<i4'), ('v', '<f8'), ('t', '<f8'), ('chg', '?')])
+
+Key = Tuple[str, str, str]  # (bus, message, signal)
+Selector = Tuple[Optional[str], Optional[str], Optional[str]]  # None matches any bus / message / signal
+
+
+class SignalRegistry:
+    """Dense integer handles for (bus, message, signal) triples.
+
+    Handles are assigned when a DBC is loaded or a bus starts (and on first sight
+    of anything else), and never reused. Consumers resolve names to handles once,
+    at configuration time, into lookup tables indexed by handle (see lut()); the
+    `version` counter tells them when those tables must be rebuilt.
+    """
+
+    def __init__(self):
+        self._h: Dict[Key, int] = {}
+        self.keys: List[Key] = []
+        self._can_ids: List[int] = []
+        self._can_arr: Optional[np.ndarray] = None
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def handle(self, bus: str, msg: str, sig: str, can_id: int = -1) -> int:
+        key = (bus, msg, sig)
+        h = self._h.get(key)
+        if h is None:
+            h = self._h[key] = len(self.keys)
+            self.keys.append(key); self._can_ids.append(int(can_id))
+            self._can_arr = None
+            self.version += 1
+        return h
+
+    def register_bus(self, bus: str, dbc) -> None:
+        """Assign handles to every DBC signal on `bus` (contiguous per bus)."""
+        for m in (dbc.messages if dbc else []):
+            for s in m.signals:
+                self.handle(bus, m.name, s.name, m.frame_id)
+
+    def buses(self) -> List[str]:
+        return list(dict.fromkeys(k[0] for k in self.keys))
+
+    def can_ids(self) -> np.ndarray:
+        """Frame id per handle (-1 for signals not carried by a frame)."""
+        if self._can_arr is None:
+            self._can_arr = np.asarray(self._can_ids, dtype=np.int64)
+        return self._can_arr
+
+    def index_lut(self, selectors: Sequence[Selector]) -> np.ndarray:
+        """int16 array over all handles: index of the first matching selector, -1 if none."""
+        lut = np.full(len(self.keys), -1, dtype=np.int16)
+        for h, (bus, msg, sig) in enumerate(self.keys):
+            for i, (b, m, s) in enumerate(selectors):
+                if (b is None or b == bus) and (m is None or m == msg) and (s is None or s == sig):
+                    lut[h] = i; break
+        return lut
+
+    def lut(self, selectors: Sequence[Selector]) -> np.ndarray:
+        """bool array over all handles: True where some selector matches."""
+        return self.index_lut(selectors) >= 0
+
+
+class Selection:
+    """A consumer's view of the registry: selectors compiled to a lookup table, rebuilt when handles are added."""
+    __slots__ = ("registry", "selectors", "_lut", "_ver")
+
+    def __init__(self, registry: SignalRegistry, selectors: Sequence[Selector]):
+        self.registry = registry
+        self.selectors = list(selectors)
+        self._lut = np.zeros(0, dtype=np.int16)
+        self._ver = -1
+
+    def index(self, handles: np.ndarray) -> np.ndarray:
+        """Selector index per record handle (-1 where unselected)."""
+        if self._ver != self.registry.version:
+            self._lut = self.registry.index_lut(self.selectors) if self.selectors else np.full(len(self.registry), -1, dtype=np.int16)
+            self._ver = self.registry.version
+        return self._lut[handles]
+
+    def mask(self, handles: np.ndarray) -> np.ndarray:
+        return self.index(handles) >= 0
@@ -0,0 +1,115 @@
+from __future__ import annotations
+import time
+from typing import Dict, List, Optional
+from PySide6.QtCore import QObject, QTimer, Qt
+from PySide6.QtGui import QGuiApplication
+
+
+class RenderScheduler(QObject):
+    """Single display-rate timer that redraws dirty, visible panels within a per-tick time budget.
+
+    Panels expose ``needs_render()`` and ``render()``, plus a cheap ``scroll()`` that
+    runs on ticks where nothing needs redrawing. When a tick runs out of budget the
+    remaining panels are served first on the next tick, so heavy dashboards degrade to a
+    lower per-panel rate instead of backing up the event loop. Panels shed by the
+    OverloadController are additionally held to their ``render_due()`` interval.
+    """
+
+    def __init__(self, parent: Optional[QObject] = None, fps: float = 0.0, budget_ms: float = 0.0):
+        super().__init__(parent)
+        if fps <= 0:
+            try:
+                fps = float(QGuiApplication.primaryScreen().refreshRate()) or 60.0
+            except Exception:
+                fps = 60.0
+        self.interval_ms = max(5, int(1000.0 / fps))
+        # Leave the rest of the frame to input handling and signal delivery
+        self.budget_s = (budget_ms if budget_ms > 0 else self.interval_ms * 0.5) / 1000.0
+        self._panels: List = []
+        self._cursor = 0
+        self._cost: Dict[str, float] = {}     # panel_id -> EMA render time (s)
+        self._renders: Dict[str, int] = {}    # panel_id -> renders in current stats window
+        self._rates: Dict[str, float] = {}    # panel_id -> renders/s over last window
+        self._ticks = 0
+        self._overruns = 0
+        self.fps = 0.0
+        self.overrun_pct = 0.0
+        self._win_t0 = time.perf_counter()
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(self.interval_ms)
+        self.timer.timeout.connect(self._tick)
+        self.timer.start()
+
+    def register(self, panel):
+        if panel not in self._panels:
+            self._panels.append(panel)
+
+    def unregister(self, panel):
+        try:
+            i = self._panels.index(panel)
+        except ValueError:
+            return
+        self._panels.pop(i)
+        if i < self._cursor:
+            self._cursor -= 1
+        pid = getattr(getattr(panel, 'conf', None), 'panel_id', None)
+        for d in (self._cost, self._renders, self._rates):
+            d.pop(pid, None)
+
+    def _tick(self):
+        n = len(self._panels)
+        t0 = time.perf_counter()
+        now = time.monotonic()
+        deadline = t0 + self.budget_s
+        self._ticks += 1
+        if n:
+            start = self._cursor % n
+            rendered = 0
+            for k in range(n):
+                i = (start + k) % n
+                p = self._panels[i]
+                try:
+                    if not p.render_due(now):
+                        continue
+                    if not p.needs_render():
+                        p.scroll()  # e.g. a plot's time axis; no data upload
+                        continue
+                except Exception:
+                    continue
+                if rendered and time.perf_counter() >= deadline:
+                    # Out of budget: resume from this panel next tick
+                    self._cursor = i
+                    self._overruns += 1
+                    break
+                ts = time.perf_counter()
+                try:
+                    p.render()
+                except Exception:
+                    import traceback; traceback.print_exc()
+                dt = time.perf_counter() - ts
+                p.mark_rendered(now)
+                pid = p.conf.panel_id
+                prev = self._cost.get(pid)
+                self._cost[pid] = dt if prev is None else prev * 0.9 + dt * 0.1
+                self._renders[pid] = self._renders.get(pid, 0) + 1
+                rendered += 1
+            else:
+                self._cursor = (start + 1) % n
+        elapsed = t0 - self._win_t0
+        if elapsed >= 1.0:
+            self.fps = self._ticks / elapsed
+            self.overrun_pct = 100.0 * self._overruns / max(1, self._ticks)
+            self._rates = {pid: c / elapsed for pid, c in self._renders.items()}
+            self._ticks = 0; self._overruns = 0; self._renders = {}
+            self._win_t0 = t0
+
+    def panel_costs(self) -> List[tuple]:
+        """(panel_id, title, avg render ms, renders/s) sorted by cost, heaviest first."""
+        out = []
+        for p in self._panels:
+            pid = p.conf.panel_id
+            if pid in self._cost:
+                out.append((pid, p.conf.title, self._cost[pid] * 1000.0, self._rates.get(pid, 0.0)))
+        out.sort(key=lambda r: r[2], reverse=True)
+        return out
@@ -0,0 +1,201 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from PySide6.QtCore import QObject, Signal
+
+from .registry import SignalRegistry
+
+
+def parse_rules(lines: List[str]) -> List[tuple]:
+    """Parse text rules (``==42:#0F0``, ``>=80:red``, ``10-20:label``) into (op, value(s), label) tuples."""
+    rules = []
+    for ln in lines:
+        try:
+            if ln.startswith('=='):
+                v = float(ln[2:].split(':', 1)[0].strip()); c = ln.split(':', 1)[1].strip(); rules.append(('eq', v, c)); continue
+            if ln.startswith('>='):
+                v = float(ln[2:].split(':', 1)[0].strip()); c = ln.split(':', 1)[1].strip(); rules.append(('ge', v, c)); continue
+            if ln.startswith('<='):
+                v = float(ln[2:].split(':', 1)[0].strip()); c = ln.split(':', 1)[1].strip(); rules.append(('le', v, c)); continue
+            if ln.startswith('>'):
+                v = float(ln[1:].split(':', 1)[0].strip()); c = ln.split(':', 1)[1].strip(); rules.append(('gt', v, c)); continue
+            if ln.startswith('<'):
+                v = float(ln[1:].split(':', 1)[0].strip()); c = ln.split(':', 1)[1].strip(); rules.append(('lt', v, c)); continue
+            if '-' in ln and ':' in ln:
+                rng, c = ln.split(':', 1); a, b = rng.split('-', 1); rules.append(('range', float(a.strip()), float(b.strip()), c.strip())); continue
+        except Exception:
+            continue
+    return rules
+
+
+class RuleSet:
+    """Rules for one signal compiled into threshold tables (one row per rule, first match wins)."""
+
+    def __init__(self, set_id: str, bus_name: Optional[str], rules: List[tuple], hysteresis: float = 0.0, debounce_ms: float = 0.0):
+        self.set_id = set_id
+        self.bus_name = bus_name
+        self.hysteresis = max(0.0, float(hysteresis))
+        self.debounce_s = max(0.0, float(debounce_ms)) / 1000.0
+        inf = np.inf
+        lo, hi, lo_inc, hi_inc, labels = [], [], [], [], []
+        for r in rules:
+            op = r[0]
+            if op == 'eq': row = (r[1], r[1], True, True)
+            elif op == 'ge': row = (r[1], inf, True, False)
+            elif op == 'gt': row = (r[1], inf, False, False)
+            elif op == 'le': row = (-inf, r[1], False, True)
+            elif op == 'lt': row = (-inf, r[1], False, False)
+            elif op == 'range': row = (min(r[1], r[2]), max(r[1], r[2]), True, True)
+            else: continue
+            lo.append(row[0]); hi.append(row[1]); lo_inc.append(row[2]); hi_inc.append(row[3]); labels.append(r[-1])
+        self.labels = labels
+        self.lo = np.asarray(lo, dtype=float); self.hi = np.asarray(hi, dtype=float)
+        self.lo_inc = np.asarray(lo_inc, dtype=bool); self.hi_inc = np.asarray(hi_inc, dtype=bool)
+        # Entry bands are shrunk by the hysteresis, exit bands widened by it. Bands too
+        # narrow to shrink (e.g. ==) are entered on their exact bounds.
+        h = self.hysteresis
+        narrow = (self.hi - self.lo) <= 2 * h
+        self.lo_in = np.where(narrow, self.lo, self.lo + h); self.hi_in = np.where(narrow, self.hi, self.hi - h)
+        self.lo_out = self.lo - h; self.hi_out = self.hi + h
+        self.state = -1
+        self.pending: Optional[Tuple[int, float]] = None  # (target state, since ts) while debouncing
+
+    def _inside(self, v: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        vv = v[:, None]
+        return (((vv > lo) | (self.lo_inc & (vv == lo))) & ((vv < hi) | (self.hi_inc & (vv == hi))))
+
+    @staticmethod
+    def _first(m: np.ndarray) -> np.ndarray:
+        """Index of the first matching rule per sample, -1 if none."""
+        if m.shape[1] == 0:
+            return np.full(m.shape[0], -1, dtype=int)
+        return np.where(m.any(axis=1), m.argmax(axis=1), -1)
+
+    def evaluate(self, v: np.ndarray, ts: np.ndarray) -> List[Tuple[int, float, float]]:
+        """Run a batch of samples through the state machine; return (state, value, ts) per transition."""
+        out: List[Tuple[int, float, float]] = []
+        n = len(v)
+        if not n or not self.labels:
+            return out
+        raw = self._first(self._inside(v, self.lo, self.hi))
+        entry = self._first(self._inside(v, self.lo_in, self.hi_in))
+        wide = self._inside(v, self.lo_out, self.hi_out)
+        i = 0
+        while i < n:
+            s = self.state
+            # Per-sample target state given the current state (== s where no transition is due)
+            if s < 0:
+                tgt = entry[i:]
+            else:
+                promote = (entry[i:] >= 0) & (entry[i:] < s)
+                leave = ~wide[i:, s]
+                tgt = np.where(promote, entry[i:], np.where(leave, raw[i:], s))
+            moving = np.flatnonzero(tgt != s)
+            if not len(moving):
+                self.pending = None
+                break
+            j = int(moving[0]); t = int(tgt[j])
+            since = float(ts[i + j])
+            if self.pending and self.pending[0] == t and j == 0:
+                since = self.pending[1]
+            # The candidate must hold for debounce_s before the transition is committed
+            broken = np.flatnonzero(tgt[j:] != t)
+            k = j + int(broken[0]) if len(broken) else len(tgt)
+            held = np.flatnonzero(ts[i + j:i + k] - since >= self.debounce_s)
+            if len(held):
+                m = i + j + int(held[0])
+                self.state = t; self.pending = None
+                out.append((t, float(v[m]), float(ts[m])))
+                i = m + 1
+            elif k == len(tgt):
+                self.pending = (t, since)
+                break
+            else:
+                self.pending = None
+                i += k
+        return out
+
+
+class RuleEngine(QObject):
+    """Threshold/alarm rules for all signals, evaluated in batches with NumPy.
+
+    FrameBus hands every flushed record batch to feed_batch(); records of signals
+    with rules are picked out through a handle lookup table and sig_transition is
+    emitted only when a rule set changes state (state -1 means no rule matches).
+    """
+    sig_transition = Signal(str, int, str, float, float)  # set_id, state, label, value, ts
+    sig_changed = Signal()  # rule sets added or removed
+
+    def __init__(self, parent: Optional[QObject] = None, registry: Optional[SignalRegistry] = None):
+        super().__init__(parent)
+        self.registry = registry if registry is not None else SignalRegistry()
+        self._sets: Dict[str, RuleSet] = {}
+        self._by_sig: Dict[Tuple[str, str], List[RuleSet]] = {}
+        self._keys: Dict[str, Tuple[str, str]] = {}
+        # handle -> rule sets, and a bool table over handles; rebuilt when sets or handles change
+        self._by_handle: Dict[int, List[RuleSet]] = {}
+        self._lut = np.zeros(0, dtype=bool)
+        self._lut_ver = -1
+
+    def add_rule_set(self, set_id: str, bus_name: Optional[str], msg_name: str, sig_name: str, lines: List[str], hysteresis: float = 0.0, debounce_ms: float = 0.0) -> RuleSet:
+        self.remove_rule_set(set_id)
+        rs = RuleSet(set_id, bus_name, parse_rules(lines), hysteresis, debounce_ms)
+        self._sets[set_id] = rs
+        self._keys[set_id] = (msg_name, sig_name)
+        self._by_sig.setdefault((msg_name, sig_name), []).append(rs)
+        self._lut_ver = -1
+        self.sig_changed.emit()
+        return rs
+
+    def remove_rule_set(self, set_id: str):
+        rs = self._sets.pop(set_id, None)
+        if rs is None:
+            return
+        key = self._keys.pop(set_id)
+        lst = self._by_sig.get(key, [])
+        if rs in lst: lst.remove(rs)
+        if not lst:
+            self._by_sig.pop(key, None)
+        self._lut_ver = -1
+        self.sig_changed.emit()
+
+    def rule_sets(self, prefix: str = "") -> List[RuleSet]:
+        return [rs for sid, rs in self._sets.items() if sid.startswith(prefix)]
+
+    def signals(self) -> List[Tuple[str, str]]:
+        """(msg, sig) pairs that have at least one rule set."""
+        return list(self._by_sig.keys())
+
+    def signal_of(self, set_id: str) -> Optional[Tuple[str, str]]:
+        return self._keys.get(set_id)
+
+    def _sync(self):
+        reg = self.registry
+        if self._lut_ver == reg.version:
+            return
+        self._by_handle = {}
+        for h, (bus, msg, sig) in enumerate(reg.keys):
+            sets = [rs for rs in self._by_sig.get((msg, sig), []) if not rs.bus_name or rs.bus_name == bus]
+            if sets: self._by_handle[h] = sets
+        self._lut = np.zeros(len(reg), dtype=bool)
+        self._lut[list(self._by_handle)] = True
+        self._lut_ver = reg.version
+
+    def feed_batch(self, batch: np.ndarray):
+        """Evaluate the records (RECORD_DTYPE) of signals that have rules."""
+        if not self._sets or not len(batch):
+            return
+        self._sync()
+        sub = batch[self._lut[batch['h']]]
+        if not len(sub):
+            return
+        hs = sub['h']
+        for h in np.unique(hs).tolist():
+            sel = hs == h
+            self.evaluate_batch(self._by_handle[h], sub['v'][sel], sub['t'][sel])
+
+    def evaluate_batch(self, sets: List[RuleSet], values: np.ndarray, ts: np.ndarray):
+        for rs in sets:
+            for state, val, t in rs.evaluate(values, ts):
+                label = rs.labels[state] if state >= 0 else ""
+                self.sig_transition.emit(rs.set_id, state, label, val, t)
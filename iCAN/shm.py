@@ -0,0 +1,90 @@
+from __future__ import annotations
+import os
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+import numpy as np
+
+from .shm_reader import MAGIC, VERSION, HEADER, SLOT_DTYPE, attach, layout
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    return True
+
+
+def _remove_stale(name: str):
+    """Unlink segment `name` if it is an iCAN table whose publisher has exited; raise otherwise."""
+    old = attach(name)
+    try:
+        hdr = HEADER.unpack_from(old.buf, 0) if old.size >= HEADER.size else None
+    finally:
+        old.close()
+    if hdr is None or hdr[0] != MAGIC or hdr[1] != VERSION:
+        raise FileExistsError(f"shared memory '{name}' exists and is not an iCAN table (version {VERSION}); "
+                              f"pick another `shm: name` or remove it (/dev/shm/{name})")
+    pid = hdr[5]
+    if pid == os.getpid() or _alive(pid):
+        raise FileExistsError(f"shared memory '{name}' is in use by iCAN process {pid}; pick another `shm: name`")
+    old = shared_memory.SharedMemory(name=name); old.close(); old.unlink()
+
+
+class ShmPublisher:
+    """Writes the latest value of selected signals into a fixed-layout shared-memory table.
+
+    Signals are named ``Msg.Sig`` (``DERIVED.name`` for derived signals) and get one
+    slot each, in configuration order. FrameBus calls update() for every decoded
+    message; each slot write is bracketed by seqlock increments (odd while writing)
+    so readers (see shm_reader.py) never see a torn value/timestamp pair.
+    """
+
+    def __init__(self, name: str, signals: List[str]):
+        self.name = name
+        self.signals = list(dict.fromkeys(s for s in signals if '.' in s))
+        blob, data_off, size = layout(self.signals)
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Only a table left over by a crashed iCAN is replaced; anything else stays untouched
+            _remove_stale(name)
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        buf = self._shm.buf
+        buf[HEADER.size:HEADER.size + len(blob)] = blob
+        self.table = np.ndarray((len(self.signals),), dtype=SLOT_DTYPE, buffer=buf, offset=data_off)
+        self.table[:] = 0
+        self._seq, self._val, self._ts = self.table["seq"], self.table["value"], self.table["ts"]
+        self.table["value"] = np.nan
+        # Header last: readers only accept the segment once the magic is present
+        HEADER.pack_into(buf, 0, MAGIC, VERSION, len(self.signals), len(blob), data_off, os.getpid())
+        self._slots: Dict[str, List[Tuple[str, int]]] = {}  # msg -> [(sig, slot)]
+        for i, ref in enumerate(self.signals):
+            msg, sig = ref.split('.', 1)
+            self._slots.setdefault(msg, []).append((sig, i))
+
+    def pairs(self) -> List[Tuple[str, str]]:
+        """(msg, sig) pairs to subscribe to on the FrameBus."""
+        return [tuple(ref.split('.', 1)) for ref in self.signals]
+
+    def update(self, msg_name: str, values: Dict[str, float], ts: float):
+        slots = self._slots.get(msg_name)
+        if not slots:
+            return
+        seq, val, tss = self._seq, self._val, self._ts
+        for sig, i in slots:
+            v = values.get(sig)
+            if v is None:
+                continue
+            seq[i] += 1          # odd: write in progress
+            val[i] = v; tss[i] = ts
+            seq[i] += 1          # even: slot consistent
+
+    def close(self):
+        self.table = self._seq = self._val = self._ts = None
+        try:
+            self._shm.close(); self._shm.unlink()
+        except Exception:
+            pass
@@ -0,0 +1,115 @@
+"""Read iCAN's shared-memory latest-value table from another process.
+
+Depends only on NumPy and the standard library, so test sequencers and logging
+scripts can use it without Qt or a CAN adapter::
+
+    from iCAN.shm_reader import ShmReader
+    with ShmReader("ican_latest") as r:
+        rpm = r.handle("Engine.Rpm")
+        value, ts, seq = rpm.read()
+
+Values are read straight from the mapped segment (no copies, no IPC round trip).
+Each slot is guarded by a sequence counter (seqlock): it is odd while iCAN is
+writing the slot, and a read is retried if the counter changed underneath it.
+``ts`` is iCAN's time.monotonic() at reception (comparable across processes on
+the same machine); ``seq`` // 2 is the number of updates of that slot so far.
+"""
+from __future__ import annotations
+import json, struct, sys, time
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+import numpy as np
+
+MAGIC = b"ICANSHM1"
+VERSION = 2
+# magic, version, slot count, names JSON length, offset of the slot table, publisher PID
+HEADER = struct.Struct("<8sIIIII")
+SLOT_DTYPE = np.dtype([("seq", "<u8"), ("value", "<f8"), ("ts", "<f8"), ("_pad", "<u8")])  # 32 bytes
+ALIGN = 64
+
+
+def layout(names: List[str]) -> Tuple[bytes, int, int]:
+    """(names JSON, slot table offset, total size) for a table of these signal names."""
+    blob = json.dumps(names).encode("utf-8")
+    data_off = -(-(HEADER.size + len(blob)) // ALIGN) * ALIGN
+    return blob, data_off, data_off + len(names) * SLOT_DTYPE.itemsize
+
+
+def attach(name: str) -> shared_memory.SharedMemory:
+    """Open an existing segment without taking ownership of it."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        # Before 3.13 attaching registers the segment for unlink at exit; undo that
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    except Exception:
+        pass
+    return shm
+
+
+class SignalHandle:
+    """One slot of the table; read() returns (value, ts, seq)."""
+    __slots__ = ("name", "_seq", "_val", "_ts", "_i")
+
+    def __init__(self, name: str, table: np.ndarray, i: int):
+        self.name = name
+        self._seq, self._val, self._ts, self._i = table["seq"], table["value"], table["ts"], i
+
+    def read(self, retries: int = 1000) -> Tuple[float, float, int]:
+        seq, val, ts, i = self._seq, self._val, self._ts, self._i
+        for _ in range(retries):
+            s1 = int(seq[i])
+            if s1 & 1:
+                continue
+            v = float(val[i]); t = float(ts[i])
+            if int(seq[i]) == s1:
+                return v, t, s1
+        raise TimeoutError(f"{self.name}: slot kept changing while being read")
+
+
+class ShmReader:
+    """Attach to a published table and look signals up by ``Msg.Sig`` name."""
+
+    def __init__(self, name: str = "ican_latest"):
+        self._shm = attach(name)
+        buf = self._shm.buf
+        magic, version, n, names_len, data_off, _pid = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self._shm.close()
+            raise ValueError(f"{name}: not an iCAN latest-value table (version {version})")
+        self._names: List[str] = json.loads(bytes(buf[HEADER.size:HEADER.size + names_len]).decode("utf-8"))
+        self._index = {n_: i for i, n_ in enumerate(self._names)}
+        self.table = np.ndarray((n,), dtype=SLOT_DTYPE, buffer=buf, offset=data_off)
+
+    def names(self) -> List[str]:
+        return list(self._names)
+
+    def handle(self, name: str) -> SignalHandle:
+        try:
+            return SignalHandle(name, self.table, self._index[name])
+        except KeyError:
+            raise KeyError(f"{name} is not published") from None
+
+    def read(self, name: str) -> Tuple[float, float, int]:
+        return self.handle(name).read()
+
+    def age(self, name: str) -> Optional[float]:
+        """Seconds since the signal was last updated, None if it never was."""
+        v, ts, seq = self.read(name)
+        return time.monotonic() - ts if seq else None
+
+    def close(self):
+        # Views into the buffer must be gone before the mapping can be closed
+        self.table = None
+        try:
+            self._shm.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
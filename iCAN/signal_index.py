@@ -0,0 +1,117 @@
+from __future__ import annotations
+import re
+from bisect import bisect_right
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class IndexEntry(NamedTuple):
+    msg_name: str
+    sig_name: str
+    frame_id: int
+    unit: str
+    comment: str
+
+    @property
+    def ref(self) -> str:
+        return f"{self.msg_name}.{self.sig_name}"
+
+
+class SignalIndex:
+    """Search index over DBC messages and signals, built once per DBC load.
+
+    All entries' searchable text (names, unit, comment, frame id) is concatenated
+    into one lowercase blob so the first query term is located with a single regex
+    scan; remaining terms are checked on the candidates only.
+    """
+
+    def __init__(self):
+        self._dbc_entries: List[IndexEntry] = []
+        self._virtual: Dict[str, List[IndexEntry]] = {}
+        self.entries: List[IndexEntry] = []
+        self._by_ref: Dict[Tuple[str, str], IndexEntry] = {}
+        self._sigs_by_msg: Dict[str, List[str]] = {}
+        self._blob = ""
+        self._starts: List[int] = []
+
+    def build(self, *dbcs) -> None:
+        """Index the signals of these databases (a message name found in several is listed once)."""
+        entries: List[IndexEntry] = []
+        seen = set()
+        for dbc in dbcs:
+            for m in (dbc.messages if dbc else []):
+                for s in m.signals:
+                    if (m.name, s.name) in seen: continue
+                    seen.add((m.name, s.name))
+                    comment = s.comment if isinstance(s.comment, str) else ""
+                    entries.append(IndexEntry(m.name, s.name, int(m.frame_id), s.unit or "", comment or ""))
+        self._dbc_entries = entries
+        self._rebuild()
+
+    def set_virtual(self, msg_name: str, signals: List[Tuple[str, str]]) -> None:
+        """Add (or replace) a non-DBC message, e.g. derived signals as (name, unit) pairs."""
+        if signals:
+            self._virtual[msg_name] = [IndexEntry(msg_name, n, -1, u or "", "") for n, u in signals]
+        else:
+            self._virtual.pop(msg_name, None)
+        self._rebuild()
+
+    def _rebuild(self):
+        self.entries = self._dbc_entries + [e for lst in self._virtual.values() for e in lst]
+        self._by_ref = {(e.msg_name, e.sig_name): e for e in self.entries}
+        self._sigs_by_msg = {}
+        for e in self.entries:
+            self._sigs_by_msg.setdefault(e.msg_name, []).append(e.sig_name)
+        parts, starts, pos = [], [], 0
+        for e in self.entries:
+            text = f"{e.msg_name}.{e.sig_name} {e.unit} {e.comment} 0x{e.frame_id:x}".lower() if e.frame_id >= 0 else f"{e.msg_name}.{e.sig_name} {e.unit}".lower()
+            text = text.replace("\n", " ")
+            starts.append(pos); parts.append(text); pos += len(text) + 1
+        self._blob = "\n".join(parts)
+        self._starts = starts
+
+    def __bool__(self) -> bool:
+        return bool(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def messages(self) -> List[str]:
+        return list(self._sigs_by_msg.keys())
+
+    def signals_of(self, msg_name: str) -> List[str]:
+        return list(self._sigs_by_msg.get(msg_name, []))
+
+    def lookup(self, msg_name: str, sig_name: str) -> Optional[IndexEntry]:
+        return self._by_ref.get((msg_name, sig_name))
+
+    def search(self, query: str, limit: int = 200) -> List[IndexEntry]:
+        """Entries matching every whitespace-separated term (case-insensitive), best matches first."""
+        terms = query.lower().split()
+        if not terms:
+            return self.entries[:limit]
+        first, rest = terms[0], terms[1:]
+        hits: List[int] = []
+        last = -1
+        for m in re.finditer(re.escape(first), self._blob):
+            i = bisect_right(self._starts, m.start()) - 1
+            if i == last:
+                continue
+            last = i
+            if rest:
+                hay = self._blob[self._starts[i]:self._starts[i + 1] - 1] if i + 1 < len(self._starts) else self._blob[self._starts[i]:]
+                if not all(t in hay for t in rest):
+                    continue
+            hits.append(i)
+            if len(hits) >= limit * 4:
+                break
+        ql = query.strip().lower()
+
+        def rank(i: int):
+            e = self.entries[i]
+            sig, ref = e.sig_name.lower(), e.ref.lower()
+            if ref == ql or sig == ql: return 0
+            if sig.startswith(first) or ref.startswith(first): return 1
+            if first in ref: return 2
+            return 3
+        hits.sort(key=rank)
+        return [self.entries[i] for i in hits[:limit]]
@@ -0,0 +1,249 @@
+"""Headless endurance test: virtual-bus traffic plus panel churn, with memory tracking.
+
+    python -m iCAN.soak --minutes 60 --max-rss-growth-mb 64
+
+Runs the real main window on the offscreen Qt platform. A traffic thread sends
+frames for every message of a DBC (a synthetic one unless --dbc is given), plus
+a scan over random extended ids, on a python-can virtual bus. Meanwhile panels
+are added, edited, removed and moved between dashboard tabs. Every --sample-s
+seconds all dashboards are cleared, so whatever memory is still held is
+retained state rather than live panel history, and RSS and tracemalloc are
+sampled. Growth is measured from the first sample after the warm-up; the exit
+status is 1 when it exceeds the thresholds, and the allocation sites that grew
+most are printed.
+"""
+from __future__ import annotations
+import os, sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse, gc, random, resource, tempfile, threading, time, tracemalloc
+from typing import List, Optional
+import can
+from PySide6.QtCore import QCoreApplication, QEvent, QObject, QTimer
+from PySide6.QtWidgets import QApplication
+
+from .models import BusConf, PanelConf
+
+CHANNEL = "ican_soak"
+PANEL_TYPES = ["value", "gauge", "plot", "multiplot", "stats", "bytemap", "table", "led", "alarm"]
+
+
+def rss_mb() -> float:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except Exception:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def synthetic_dbc(n_messages: int) -> str:
+    """DBC text with n messages of four 16-bit little-endian signals each."""
+    lines = ['VERSION ""', "", "NS_ :", "", "BS_:", "", "BU_: SOAK", ""]
+    for i in range(n_messages):
+        lines.append(f"BO_ {0x100 + i} Msg{i}: 8 SOAK")
+        for k in range(4):
+            lines.append(f' SG_ S{k} : {16 * k}|16@1+ (0.1,0) [0|6553.5] "" Vector__XXX')
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+class Traffic(threading.Thread):
+    """Sends every id at a shared rate; a quarter of the frames carry new payloads."""
+
+    def __init__(self, ids: List[int], rate: float, scan_rate: float, seed: int):
+        super().__init__(name="SoakTraffic", daemon=True)
+        self.ids, self.rate, self.scan_rate = ids, rate, scan_rate
+        self.rng = random.Random(seed)
+        self.running = True
+        self.sent = 0
+
+    def run(self):
+        bus = can.Bus(interface="virtual", channel=CHANNEL)
+        payloads = {i: bytes(8) for i in self.ids}
+        t_next = time.monotonic(); carry = 0.0; scan_carry = 0.0; k = 0
+        try:
+            while self.running:
+                carry += self.rate * 0.01; scan_carry += self.scan_rate * 0.01
+                for _ in range(int(carry)):
+                    cid = self.ids[k % len(self.ids)]; k += 1
+                    if self.rng.random() < 0.25:
+                        payloads[cid] = self.rng.getrandbits(64).to_bytes(8, "little")
+                    bus.send(can.Message(arbitration_id=cid, data=payloads[cid], is_extended_id=False))
+                for _ in range(int(scan_carry)):
+                    # Ever-new ids: the table and byte map must stay bounded
+                    bus.send(can.Message(arbitration_id=0x18000000 | self.rng.getrandbits(20), data=bytes(8), is_extended_id=True))
+                self.sent += int(carry) + int(scan_carry)
+                carry -= int(carry); scan_carry -= int(scan_carry)
+                t_next += 0.01
+                time.sleep(max(0.0, t_next - time.monotonic()))
+        finally:
+            bus.shutdown()
+
+
+class Soak(QObject):
+    def __init__(self, w, args, signals: List[tuple]):
+        super().__init__()
+        self.w, self.args, self.signals = w, args, signals
+        self.rng = random.Random(args.seed)
+        self.t0 = time.monotonic()
+        self.n = 0
+        self.actions = 0
+        self.base = None          # (rss MB, traced MB, snapshot) after warm-up
+        self.samples: List[tuple] = []
+        self.failed = False
+        self.churn = QTimer(self); self.churn.setInterval(int(args.churn_s * 1000)); self.churn.timeout.connect(self.step); self.churn.start()
+        self.sampler = QTimer(self); self.sampler.setInterval(int(args.sample_s * 1000)); self.sampler.timeout.connect(self.sample); self.sampler.start()
+        QTimer.singleShot(int(args.minutes * 60000), self.finish)
+
+    # -- churn --
+    def _conf(self, t: str) -> PanelConf:
+        self.n += 1
+        msg, sig = self.rng.choice(self.signals)
+        conf = PanelConf(panel_id=f"soak_{self.n}", panel_type=t, title=f"{t} {self.n}", msg_name=msg, sig_name=sig,
+                         use_dbc=t not in ("table", "bytemap", "alarm"), priority=self.rng.choice(["low", "normal", "high"]))
+        if t == "multiplot":
+            conf.multi_signals = [{'bus_name': None, 'msg_name': m, 'sig_name': s, 'color': None} for m, s in self.rng.sample(self.signals, 3)]
+        if t == "led":
+            conf.led_rules = [">3000:#FF0000", "0-3000:#00FF00"]
+        if t == "bytemap":
+            conf.heat_mode = self.rng.choice(["changes", "bytes", "bits"]); conf.heat_id = 0x100
+        return conf
+
+    def step(self):
+        w = self.w
+        panels = w._current_panels()
+        r = self.rng.random()
+        self.actions += 1
+        if r < 0.35 or not panels:
+            if len(panels) >= self.args.max_panels: w._remove_panel(self.rng.choice(panels))
+            w._add_panel_from_conf(self._conf(self.rng.choice(PANEL_TYPES)))
+        elif r < 0.55:
+            self.edit(self.rng.choice(panels))
+        elif r < 0.75:
+            w._remove_panel(self.rng.choice(panels))
+        elif r < 0.92:
+            bar = w.tabbar
+            if bar.count() < 4 and self.rng.random() < 0.5: w._add_tab()
+            else: bar.setCurrentIndex(self.rng.randrange(bar.count()))
+        elif w.tabbar.count() > 1:
+            w._on_tab_close(self.rng.randrange(w.tabbar.count()))
+
+    def edit(self, panel):
+        """What Edit Panel… does, minus the modal exec()."""
+        from .dialogs import PanelConfigDialog, MultiPlotConfigDialog
+        w, conf = self.w, panel.conf
+        if conf.panel_type == 'multiplot': dlg = MultiPlotConfigDialog(w, w.bus_objs, w.hub.any_dbc(), existing=conf, index=w.hub.index)
+        else: dlg = PanelConfigDialog(w, w.bus_objs, w.hub.any_dbc(), conf.panel_type, existing=conf, index=w.hub.index)
+        new_conf = dlg.get_panel_conf(conf.panel_id)
+        dlg.deleteLater()
+        if new_conf:
+            new_conf.title = f"{conf.title}*"[:40]
+            w._replace_panel(panel, new_conf)
+
+    # -- measurement --
+    def settle(self):
+        """Close every dashboard and let Qt delete the panels."""
+        w = self.w
+        while w.tabbar.count() > 1:
+            w._on_tab_close(w.tabbar.count() - 1)
+        w._on_tab_changed(w.tabbar.currentIndex())
+        w._clear_dashboard(w._current_tab_key)
+        for _ in range(3):
+            QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+            QCoreApplication.processEvents()
+        gc.collect()
+
+    def sample(self):
+        self.settle()
+        t = (time.monotonic() - self.t0) / 60.0
+        rss = rss_mb()
+        traced = tracemalloc.get_traced_memory()[0] / 2**20 if tracemalloc.is_tracing() else 0.0
+        objs = len(self.w.findChildren(QObject))
+        self.samples.append((t, rss, traced, objs, self.actions))
+        line = f"[Soak] {t:7.1f} min  RSS {rss:8.1f} MB  traced {traced:7.1f} MB  QObjects {objs:6d}  actions {self.actions}"
+        if self.base is None and t * 60.0 >= self.args.warmup_s:
+            self.base = (rss, traced, tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None, objs)
+            line += "  (baseline)"
+        elif self.base is not None:
+            line += f"  growth RSS {rss - self.base[0]:+.1f} MB, traced {traced - self.base[1]:+.1f} MB, QObjects {objs - self.base[3]:+d}"
+        print(line, flush=True)
+        if self.args.csv:
+            with open(self.args.csv, "a") as f:
+                if len(self.samples) == 1: f.write("minutes,rss_mb,traced_mb,qobjects,actions\n")
+                f.write(",".join(f"{x:.3f}" if isinstance(x, float) else str(x) for x in self.samples[-1]) + "\n")
+
+    def finish(self):
+        self.churn.stop(); self.sampler.stop()
+        self.sample()
+        if self.base is None:
+            print("[Soak] Run ended before the warm-up; nothing to compare"); self.failed = True
+        else:
+            _, rss, traced, objs, _ = self.samples[-1]
+            d_rss, d_py = rss - self.base[0], traced - self.base[1]
+            if self.base[2] is not None:
+                print("[Soak] Largest allocation growth since baseline:")
+                for st in tracemalloc.take_snapshot().compare_to(self.base[2], "lineno")[:15]:
+                    print(f"    {st}")
+            ok_rss, ok_py = d_rss <= self.args.max_rss_growth_mb, d_py <= self.args.max_py_growth_mb
+            print(f"[Soak] RSS growth {d_rss:+.1f} MB (limit {self.args.max_rss_growth_mb:g}) {'ok' if ok_rss else 'FAIL'}; "
+                  f"traced growth {d_py:+.1f} MB (limit {self.args.max_py_growth_mb:g}) {'ok' if ok_py else 'FAIL'}; "
+                  f"QObjects {objs - self.base[3]:+d}")
+            self.failed = not (ok_rss and ok_py)
+        QApplication.instance().exit(1 if self.failed else 0)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m iCAN.soak", description=__doc__.split("\n\n")[0])
+    ap.add_argument("--minutes", type=float, default=10.0, help="run time (default 10)")
+    ap.add_argument("--warmup-s", type=float, default=60.0, help="growth is measured from the first sample after this (default 60)")
+    ap.add_argument("--sample-s", type=float, default=30.0, help="memory sample interval (default 30)")
+    ap.add_argument("--churn-s", type=float, default=0.5, help="seconds between panel actions (default 0.5)")
+    ap.add_argument("--rate", type=float, default=2000.0, help="DBC frames per second (default 2000)")
+    ap.add_argument("--scan-rate", type=float, default=50.0, help="frames per second with ever-new extended ids (default 50)")
+    ap.add_argument("--messages", type=int, default=40, help="messages in the synthetic DBC (default 40)")
+    ap.add_argument("--dbc", help="use this DBC instead of a synthetic one")
+    ap.add_argument("--max-panels", type=int, default=12)
+    ap.add_argument("--max-rss-growth-mb", type=float, default=64.0)
+    ap.add_argument("--max-py-growth-mb", type=float, default=16.0)
+    ap.add_argument("--no-tracemalloc", action="store_true", help="RSS only (tracemalloc slows Python down)")
+    ap.add_argument("--csv", help="append samples to this CSV file")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="ican_soak_")
+    dbc_path = args.dbc
+    if not dbc_path:
+        dbc_path = os.path.join(tmp, "soak.dbc")
+        with open(dbc_path, "w") as f: f.write(synthetic_dbc(args.messages))
+    cfg = os.path.join(tmp, "config.yaml")
+    with open(cfg, "w") as f:
+        # Stall reports would drown the log: tracemalloc alone makes some slots that slow
+        f.write(f"ui: {{autostart: false, stall_threshold_ms: 2000}}\ndb: {{path: {dbc_path!r}}}\n")
+    os.environ["PCAN_DESKTOP_CONFIG"] = cfg  # never the user's config.yaml (autostart, real adapters)
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    from .main_window import Main
+    w = Main(); w.show()
+    if not w.hub.dbc:
+        print(f"[Soak] Could not load {dbc_path}"); return 2
+    signals = [(m.name, s.name) for m in w.hub.dbc.messages for s in m.signals]
+    w._start_bus(BusConf(enabled=True, interface="virtual", channel=CHANNEL, name="BUS1"))
+    traffic = Traffic([m.frame_id for m in w.hub.dbc.messages], args.rate, args.scan_rate, args.seed)
+    traffic.start()
+    soak = Soak(w, args, signals)
+    print(f"[Soak] {args.minutes:g} min, {args.rate:g} + {args.scan_rate:g} frames/s, {len(signals)} signals, "
+          f"tracemalloc {'off' if args.no_tracemalloc else 'on'}", flush=True)
+    code = app.exec()
+    traffic.running = False; traffic.join(2.0)
+    w.close()
+    print(f"[Soak] {traffic.sent} frames sent; {'FAILED' if soak.failed else 'passed'}")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
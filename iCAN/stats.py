@@ -0,0 +1,53 @@
+from __future__ import annotations
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+
+def summary(v: np.ndarray) -> Dict[str, float]:
+    """min/max/mean/std/rms of a window of samples."""
+    if not len(v):
+        return {}
+    mean = float(v.mean())
+    return {'n': float(len(v)), 'min': float(v.min()), 'max': float(v.max()), 'mean': mean,
+            'std': float(v.std()), 'rms': float(np.sqrt(np.dot(v, v) / len(v)))}
+
+
+def histogram(v: np.ndarray, bins: int, lo: Optional[float] = None, hi: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(edges, counts); the range defaults to the data range."""
+    lo = float(v.min()) if lo is None else lo
+    hi = float(v.max()) if hi is None else hi
+    if hi <= lo:
+        hi = lo + 1.0
+    counts, edges = np.histogram(v, bins=max(1, int(bins)), range=(lo, hi))
+    return edges, counts
+
+
+def resample_uniform(t: np.ndarray, v: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Linear resampling of irregularly received samples onto their mean rate; returns (values, fs)."""
+    n = len(t)
+    span = float(t[-1] - t[0]) if n > 1 else 0.0
+    if span <= 0:
+        return v, 0.0
+    fs = (n - 1) / span
+    grid = t[0] + np.arange(n) / fs
+    return np.interp(grid, t, v), fs
+
+
+def welch_psd(v: np.ndarray, fs: float, nperseg: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+    """One-sided power spectral density by Welch's method (Hann window, 50 % overlap, mean detrend).
+
+    All segments go through a single rfft call on a strided view, so the cost is
+    O(n log nperseg) with no Python loop over segments. Returns (freqs, psd).
+    """
+    n = len(v)
+    nperseg = int(min(nperseg, n))
+    if nperseg < 8 or fs <= 0:
+        return np.zeros(0), np.zeros(0)
+    step = nperseg // 2
+    segs = np.lib.stride_tricks.sliding_window_view(v, nperseg)[::step]
+    win = np.hanning(nperseg)
+    x = (segs - segs.mean(axis=1, keepdims=True)) * win
+    spec = np.abs(np.fft.rfft(x, axis=1)) ** 2
+    psd = spec.mean(axis=0) / (fs * np.dot(win, win))
+    psd[1:-1 if nperseg % 2 == 0 else None] *= 2.0
+    return np.fft.rfftfreq(nperseg, 1.0 / fs), psd
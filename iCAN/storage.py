@@ -0,0 +1,182 @@
+from __future__ import annotations
+from typing import List, Optional, Tuple
+import numpy as np
+
+# uint32 microsecond offsets overflow after ~71.6 min; start a new segment well before that
+_SEGMENT_SPAN_S = 3600.0
+
+
+class _Segment:
+    __slots__ = ("base", "t", "v", "head", "n")
+
+    def __init__(self, base: float, t_dtype, v_dtype, capacity: int):
+        self.base = base
+        self.t = np.empty(capacity, dtype=t_dtype)
+        self.v = np.empty(capacity, dtype=v_dtype)
+        self.head = 0   # first live sample (trimmed samples are dropped lazily)
+        self.n = 0      # one past the last live sample
+
+
+class SampleBuffer:
+    """Time/value history backed by preallocated NumPy arrays.
+
+    Default mode stores float64 times and values (16 bytes/sample). Compact mode stores
+    times as uint32 microsecond offsets from a per-segment base and values as float32,
+    or as int32 raw values when the DBC scale/offset is given (8 bytes/sample). Samples
+    are expected in time order; readers get float64 arrays from times()/values().
+    Records of several bus threads can arrive slightly out of order, so a compact
+    sample older than its segment's base is stored at the base instead.
+    """
+
+    def __init__(self, compact: bool = False, scale: Optional[float] = None, offset: float = 0.0, capacity: int = 1024):
+        self.compact = compact
+        self.scale = scale if (compact and scale) else None
+        self.offset = float(offset or 0.0)
+        self._t_dtype = np.uint32 if compact else np.float64
+        self._v_dtype = (np.int32 if self.scale else np.float32) if compact else np.float64
+        self._capacity = max(16, int(capacity))
+        self._segs: List[_Segment] = []
+
+    # -- writing --
+    def _tail(self, t: float) -> _Segment:
+        seg = self._segs[-1] if self._segs else None
+        if seg is None or (self.compact and t - seg.base >= _SEGMENT_SPAN_S):
+            seg = _Segment(t, self._t_dtype, self._v_dtype, self._capacity)
+            self._segs.append(seg)
+        return seg
+
+    def _reserve(self, seg: _Segment, k: int):
+        if seg.n + k <= len(seg.t):
+            return
+        live = seg.n - seg.head
+        if seg.head and live + k <= len(seg.t) // 2:
+            # Mostly trimmed: slide live samples down instead of growing
+            seg.t[:live] = seg.t[seg.head:seg.n]; seg.v[:live] = seg.v[seg.head:seg.n]
+        else:
+            cap = max(len(seg.t) * 2, live + k)
+            t = np.empty(cap, dtype=seg.t.dtype); v = np.empty(cap, dtype=seg.v.dtype)
+            t[:live] = seg.t[seg.head:seg.n]; v[:live] = seg.v[seg.head:seg.n]
+            seg.t, seg.v = t, v
+        seg.head, seg.n = 0, live
+
+    def _enc_t(self, seg: _Segment, t):
+        return np.maximum(np.round((np.asarray(t) - seg.base) * 1e6), 0.0) if self.compact else np.asarray(t) - seg.base
+
+    def _enc_v(self, v):
+        return np.round((np.asarray(v) - self.offset) / self.scale) if self.scale else v
+
+    def append(self, t: float, v: float):
+        seg = self._tail(t)
+        if seg.n == len(seg.t):
+            self._reserve(seg, 1)
+        i = seg.n
+        if self.compact:
+            d = t - seg.base
+            seg.t[i] = int(d * 1e6 + 0.5) if d > 0.0 else 0
+            seg.v[i] = round((v - self.offset) / self.scale) if self.scale else v
+        else:
+            seg.t[i] = t - seg.base; seg.v[i] = v
+        seg.n = i + 1
+
+    def extend(self, ts: np.ndarray, vs: np.ndarray):
+        """Append a batch of samples (times mostly ascending)."""
+        ts = np.asarray(ts, dtype=np.float64); vs = np.asarray(vs, dtype=np.float64)
+        while len(ts):
+            seg = self._tail(float(ts[0]))
+            k = len(ts)
+            if self.compact:
+                # Up to the first sample past the segment's span; do not rely on sorted times
+                over = ts >= seg.base + _SEGMENT_SPAN_S
+                if over.any(): k = int(over.argmax())
+            self._reserve(seg, k)
+            seg.t[seg.n:seg.n + k] = self._enc_t(seg, ts[:k]); seg.v[seg.n:seg.n + k] = self._enc_v(vs[:k])
+            seg.n += k
+            ts, vs = ts[k:], vs[k:]
+
+    # -- trimming --
+    def trim_before(self, tmin: float):
+        """Drop samples older than tmin."""
+        while self._segs:
+            seg = self._segs[0]
+            key = (tmin - seg.base) * (1e6 if self.compact else 1.0)
+            if key <= 0:
+                return
+            if self.compact:
+                key = min(key, 4294967295.0)
+            i = seg.head + int(np.searchsorted(seg.t[seg.head:seg.n], key, side='left'))
+            if i < seg.n or len(self._segs) == 1:
+                seg.head = min(i, seg.n)
+                return
+            self._segs.pop(0)
+
+    def decimate(self):
+        """Drop every other sample, keeping the newest one (halves memory)."""
+        for seg in self._segs:
+            live = seg.n - seg.head
+            if live < 4:
+                continue
+            keep = slice(seg.head + (live - 1) % 2, seg.n, 2)
+            # Copy into right-sized arrays so the memory is actually released
+            cap = max(self._capacity, live)
+            t = np.empty(cap, dtype=seg.t.dtype); v = np.empty(cap, dtype=seg.v.dtype)
+            kept = seg.t[keep]; m = len(kept)
+            t[:m] = kept; v[:m] = seg.v[keep]
+            seg.t, seg.v = t, v
+            seg.head, seg.n = 0, m
+
+    def clear(self):
+        self._segs = []
+
+    # -- reading --
+    def __len__(self) -> int:
+        return sum(s.n - s.head for s in self._segs)
+
+    def times(self) -> np.ndarray:
+        parts = [s.t[s.head:s.n] * (1e-6 if self.compact else 1.0) + s.base for s in self._segs if s.n > s.head]
+        return np.concatenate(parts) if len(parts) > 1 else (parts[0] if parts else np.zeros(0))
+
+    def values(self) -> np.ndarray:
+        parts = [s.v[s.head:s.n] for s in self._segs if s.n > s.head]
+        v = np.concatenate(parts) if len(parts) > 1 else (parts[0] if parts else np.zeros(0))
+        if self.scale:
+            return v * self.scale + self.offset
+        return v.astype(np.float64, copy=False)
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.times(), self.values()
+
+    def first_time(self) -> Optional[float]:
+        for s in self._segs:
+            if s.n > s.head:
+                return float(s.t[s.head]) * (1e-6 if self.compact else 1.0) + s.base
+        return None
+
+    def last_time(self) -> Optional[float]:
+        for s in reversed(self._segs):
+            if s.n > s.head:
+                return float(s.t[s.n - 1]) * (1e-6 if self.compact else 1.0) + s.base
+        return None
+
+    @property
+    def bytes_per_sample(self) -> int:
+        return np.dtype(self._t_dtype).itemsize + np.dtype(self._v_dtype).itemsize
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated by the backing arrays."""
+        return sum(s.t.nbytes + s.v.nbytes for s in self._segs)
+
+
+def buffer_for_signal(hub, msg_name: Optional[str], sig_name: Optional[str]) -> SampleBuffer:
+    """SampleBuffer in the hub's configured storage mode; integer DBC signals keep raw values in compact mode."""
+    compact = bool(getattr(hub, 'compact_history', False))
+    if not compact:
+        return SampleBuffer()
+    scale, offset = None, 0.0
+    try:
+        sig = hub.find_message(msg_name).get_signal_by_name(sig_name)
+        if not getattr(sig, 'is_float', False) and sig.length <= 31 and sig.scale:
+            scale, offset = float(sig.scale), float(sig.offset)
+    except Exception:
+        pass
+    return SampleBuffer(compact=True, scale=scale, offset=offset)
@@ -0,0 +1,174 @@
+from __future__ import annotations
+import json, math, threading, time
+from array import array
+from typing import Any, Dict, Optional
+import numpy as np
+
+# Cycle times go into log-spaced buckets (a DDSketch-style quantile sketch): any
+# quantile read back is within REL_ERR of the true value between DT_MIN_S and DT_MAX_S
+REL_ERR = 0.01
+GAMMA = (1.0 + REL_ERR) / (1.0 - REL_ERR)
+DT_MIN_S = 50e-6
+DT_MAX_S = 100.0
+N_BUCKETS = int(math.ceil(math.log(DT_MAX_S / DT_MIN_S) / math.log(GAMMA))) + 1
+_INV_LOG_GAMMA = 1.0 / math.log(GAMMA)
+_INV_DT_MIN = 1.0 / DT_MIN_S
+# Bucket b holds [DT_MIN_S * GAMMA**b, DT_MIN_S * GAMMA**(b + 1)); this is the value it reads back as
+_BUCKET_VALUE = DT_MIN_S * 2.0 * GAMMA / (GAMMA + 1.0) * GAMMA ** np.arange(N_BUCKETS)
+QUANTILES = (0.01, 0.5, 0.9, 0.99)
+
+
+class TimingStats:
+    """Cycle-time statistics per frame id of one bus, fed by its BusReader thread.
+
+    push() is O(1) and allocation-free: every id owns a slot in preallocated typed
+    arrays (count, last timestamp, min/max/sum/sum of squares of the period, late
+    and missing counts) and a row of N_BUCKETS sketch counters. The arrays double
+    when full, up to `max_ids`; frames of further ids only count in `dropped`.
+
+    With an expected period from the DBC (`cycle_time`, see set_expected()) a
+    period of at least 1.5 cycles counts round(period / cycle) - 1 missing frames,
+    and a shorter one above (1 + tolerance) cycles counts as late.
+
+    snapshot() copies everything out under the lock and derives means, standard
+    deviations and QUANTILES with NumPy, so the GUI never touches single frames.
+    """
+
+    def __init__(self, tolerance: float = 0.2, max_ids: int = 4096, capacity: int = 256):
+        self.lock = threading.Lock()
+        self.tolerance = float(tolerance)
+        self.max_ids = max(1, int(max_ids))
+        self._cycle: Dict[int, float] = {}  # id -> expected period (s)
+        self._init(min(capacity, self.max_ids))
+
+    def _init(self, capacity: int):
+        self._slot: Dict[int, int] = {}
+        self.k = 0         # slots in use
+        self.dropped = 0   # frames of ids beyond max_ids
+        self.cap = 0
+        self.ids = array('I'); self.cnt = array('q'); self.last = array('d'); self.seen = array('d')
+        self.dmin = array('d'); self.dmax = array('d'); self.dsum = array('d'); self.dsq = array('d')
+        self.exp = array('d'); self.late = array('q'); self.miss = array('q'); self.hist = array('I')
+        self._grow(capacity)
+
+    def _grow(self, capacity: int):
+        n = capacity - self.cap
+        for a, fill in ((self.ids, 0), (self.cnt, 0), (self.last, -1.0), (self.seen, 0.0), (self.dmin, math.inf),
+                        (self.dmax, 0.0), (self.dsum, 0.0), (self.dsq, 0.0), (self.exp, 0.0), (self.late, 0), (self.miss, 0)):
+            a.extend(array(a.typecode, [fill]) * n)
+        self.hist.frombytes(bytes(self.hist.itemsize * N_BUCKETS * n))
+        self.cap = capacity
+
+    def _new_slot(self, can_id: int) -> int:
+        if self.k == self.cap:
+            if self.cap >= self.max_ids:
+                return -1
+            self._grow(min(2 * self.cap, self.max_ids))
+        s = self._slot[can_id] = self.k
+        self.k += 1
+        self.ids[s] = can_id
+        self.exp[s] = self._cycle.get(can_id, 0.0)
+        return s
+
+    def push(self, can_id: int, t: float, seen: float):
+        """Account one frame; `t` is the (hardware) frame timestamp, `seen` the monotonic arrival time."""
+        with self.lock:
+            s = self._slot.get(can_id)
+            if s is None:
+                s = self._new_slot(can_id)
+                if s < 0:
+                    self.dropped += 1; return
+            self.cnt[s] += 1
+            self.seen[s] = seen
+            last = self.last
+            dt = t - last[s]
+            first = last[s] < 0.0
+            last[s] = t
+            if first or dt <= 0.0:
+                return  # first frame, or the timestamp clock restarted
+            if dt < self.dmin[s]: self.dmin[s] = dt
+            if dt > self.dmax[s]: self.dmax[s] = dt
+            self.dsum[s] += dt; self.dsq[s] += dt * dt
+            b = int(math.log(dt * _INV_DT_MIN) * _INV_LOG_GAMMA) if dt > DT_MIN_S else 0
+            self.hist[s * N_BUCKETS + (b if b < N_BUCKETS else N_BUCKETS - 1)] += 1
+            e = self.exp[s]
+            if e > 0.0:
+                r = dt / e
+                if r >= 1.5: self.miss[s] += int(r + 0.5) - 1
+                elif r > 1.0 + self.tolerance: self.late[s] += 1
+
+    def set_expected(self, cycles: Dict[int, float]):
+        """Expected period in seconds per id (from the DBC); ids not listed are not checked."""
+        with self.lock:
+            self._cycle = dict(cycles)
+            for can_id, s in self._slot.items():
+                self.exp[s] = self._cycle.get(can_id, 0.0)
+
+    def restart(self):
+        """Forget the last timestamps, so the gap of a bus restart is not taken for missing frames."""
+        with self.lock:
+            for s in range(self.k): self.last[s] = -1.0
+
+    def reset(self):
+        """Drop all statistics; expected periods are kept."""
+        with self.lock:
+            self._init(min(max(256, self.k), self.max_ids))
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Per-id arrays, sorted by id; periods in seconds, NaN where no period was seen yet."""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            k = self.k
+            cols = {name: np.frombuffer(a, dtype=a.typecode, count=k).copy() for name, a in (
+                ('id', self.ids), ('frames', self.cnt), ('seen', self.seen), ('min', self.dmin), ('max', self.dmax),
+                ('sum', self.dsum), ('sumsq', self.dsq), ('expected', self.exp), ('late', self.late), ('missing', self.miss))}
+            hist = np.frombuffer(self.hist, dtype=self.hist.typecode, count=k * N_BUCKETS).reshape(k, N_BUCKETS).copy()
+        age = now - cols.pop('seen')
+        cum = hist.cumsum(axis=1, dtype=np.int64)
+        n = cum[:, -1]
+        valid = n > 0
+        nf = np.where(valid, n, 1).astype(np.float64)
+        mean = cols.pop('sum') / nf
+        std = np.sqrt(np.maximum(cols.pop('sumsq') / nf - mean * mean, 0.0))
+        q = np.empty((k, len(QUANTILES)))
+        for j, p in enumerate(QUANTILES):
+            rank = np.maximum(1, np.ceil(p * n))
+            q[:, j] = _BUCKET_VALUE[(cum >= rank[:, None]).argmax(axis=1)]
+        q = np.clip(q, cols['min'][:, None], cols['max'][:, None])
+        out = dict(cols, intervals=n, mean=mean, std=std, q=q, age=age)
+        for key in ('min', 'max', 'mean', 'std'):
+            out[key] = np.where(valid, out[key], np.nan)
+        out['q'][~valid] = np.nan
+        order = np.argsort(out['id'], kind='stable')
+        return {key: v[order] for key, v in out.items()}
+
+
+def report(hub, now: Optional[float] = None) -> Dict[str, Any]:
+    """JSON-ready summary of every bus in hub.timing (times in ms, None where unknown)."""
+    now = time.monotonic() if now is None else now
+
+    def ms(x: float):
+        return None if not math.isfinite(x) else round(x * 1000.0, 4)
+
+    buses = {}
+    for bus_name, stats in hub.timing.items():
+        snap = stats.snapshot(now)
+        msgs = hub.msg_map(bus_name)
+        rows = []
+        for i, can_id in enumerate(snap['id'].tolist()):
+            m = msgs.get(can_id)
+            row = {'id': can_id, 'id_hex': f"0x{can_id:X}", 'message': m.name if m else None,
+                   'frames': int(snap['frames'][i]), 'expected_ms': ms(snap['expected'][i]) if snap['expected'][i] > 0 else None,
+                   'min_ms': ms(snap['min'][i]), 'mean_ms': ms(snap['mean'][i]), 'max_ms': ms(snap['max'][i]), 'std_ms': ms(snap['std'][i])}
+            for p, v in zip(QUANTILES, snap['q'][i].tolist()):
+                row[f"p{p * 100:g}_ms"] = ms(v)
+            row.update(late=int(snap['late'][i]), missing=int(snap['missing'][i]), silent_s=round(float(snap['age'][i]), 3))
+            rows.append(row)
+        buses[bus_name] = {'dropped_frames': stats.dropped, 'ids': rows}
+    return {'created': time.strftime("%Y-%m-%dT%H:%M:%S"), 'tolerance': getattr(hub, 'timing_tolerance', None),
+            'sketch_rel_err': REL_ERR, 'buses': buses}
+
+
+def write_report(hub, path: str):
+    with open(path, "w") as f:
+        json.dump(report(hub), f, indent=1)
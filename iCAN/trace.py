@@ -0,0 +1,77 @@
+from __future__ import annotations
+import re
+from typing import List, Optional, Tuple
+import numpy as np
+
+
+def parse_ids(text: str) -> List[Tuple[int, int]]:
+    """Hex id ranges from e.g. "100-1FF, 0x7E8"; raises ValueError on bad input."""
+    out = []
+    for tok in re.split(r"[,\s]+", text.strip()):
+        if not tok:
+            continue
+        lo, _, hi = tok.partition("-")
+        lo = int(lo, 16); hi = int(hi, 16) if hi else lo
+        out.append((min(lo, hi), max(lo, hi)))
+    return out
+
+
+def parse_data(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(pattern, mask) from hex payload bytes compared from byte 0; `?` or `x` is a wildcard nibble.
+
+    "03 7F ?? 1x" matches payloads starting with 03 7F, any byte, then 10..1F.
+    """
+    s = re.sub(r"[\s:]", "", text).lower()
+    bad = set(s) - set("0123456789abcdef?x")
+    if bad:
+        raise ValueError(f"not a hex digit or wildcard: {''.join(sorted(bad))}")
+    if len(s) % 2:
+        raise ValueError("payload pattern needs two hex digits per byte")
+    if len(s) > 128:
+        raise ValueError("payload pattern is longer than 64 bytes")
+    pat = np.zeros(len(s) // 2, dtype=np.uint8); mask = np.zeros(len(s) // 2, dtype=np.uint8)
+    for i in range(0, len(s), 2):
+        for shift, c in ((4, s[i]), (0, s[i + 1])):
+            if c in "?x":
+                continue
+            pat[i // 2] |= int(c, 16) << shift; mask[i // 2] |= 0xF << shift
+    return pat, mask
+
+
+class TraceFilter:
+    """Bus, id-range and payload-mask filter evaluated over whole frame columns at once."""
+
+    def __init__(self, bus: Optional[int] = None, ids: Optional[List[Tuple[int, int]]] = None,
+                 pat: Optional[np.ndarray] = None, mask: Optional[np.ndarray] = None):
+        self.bus = bus
+        self.ids = list(ids or [])
+        self.pat = pat if pat is not None else np.zeros(0, dtype=np.uint8)
+        self.mask = mask if mask is not None else np.zeros(0, dtype=np.uint8)
+        nz = np.flatnonzero(self.mask)
+        self.min_dlc = int(nz[-1]) + 1 if len(nz) else 0  # shorter payloads cannot match
+
+    @classmethod
+    def parse(cls, bus: Optional[int], ids: str, data: str) -> "TraceFilter":
+        pat, mask = parse_data(data) if data.strip() else (None, None)
+        return cls(bus, parse_ids(ids), pat, mask)
+
+    @property
+    def passes_all(self) -> bool:
+        return self.bus is None and not self.ids and not self.min_dlc
+
+    def match(self, bus: np.ndarray, ids: np.ndarray, dlc: np.ndarray, data: np.ndarray) -> np.ndarray:
+        """bool per frame; `data` is (n, width) with width >= the pattern length or the payload cannot match."""
+        m = np.ones(len(ids), dtype=bool)
+        if self.bus is not None:
+            m &= bus == self.bus
+        if self.ids:
+            hit = np.zeros(len(ids), dtype=bool)
+            for lo, hi in self.ids:
+                hit |= (ids >= lo) & (ids <= hi)
+            m &= hit
+        if self.min_dlc:
+            k = self.min_dlc
+            if data.shape[1] < k:
+                return np.zeros(len(ids), dtype=bool)
+            m &= (dlc >= k) & ((data[:, :k] & self.mask[:k]) == self.pat[:k]).all(axis=1)
+        return m
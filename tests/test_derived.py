@@ -0,0 +1,40 @@
+import numpy as np
+
+from iCAN.derived import DerivedEngine, DERIVED_BUS, DERIVED_MSG
+from iCAN.registry import RECORD_DTYPE, SignalRegistry
+
+
+def records(reg, frames):
+    """RECORD_DTYPE batch from [(bus, msg, {sig: value}, ts)], one frame after another."""
+    rows = [(reg.handle(bus, msg, sig), v, ts, True) for bus, msg, vals, ts in frames for sig, v in vals.items()]
+    return np.array(rows, dtype=RECORD_DTYPE)
+
+
+def as_lists(out):
+    return [(name, t.tolist(), v.tolist()) for name, t, v in out]
+
+
+def test_bus_scoped_input_ignores_other_buses():
+    reg = SignalRegistry(); eng = DerivedEngine(reg)
+    eng.define([("fl", "mavg(BUS1.W.FL, 3)", "")])
+    batch = records(reg, [("BUS1", "W", {"FL": 3.0}, 1.0), ("BUS2", "W", {"FL": 100.0}, 2.0),
+                          ("BUS2", "W", {"FL": 100.0}, 3.0), ("BUS1", "W", {"FL": 6.0}, 4.0)])
+    assert as_lists(eng.feed_batch(batch)) == [("fl", [1.0, 4.0], [3.0, 4.5])]
+
+
+def test_unscoped_input_follows_every_bus():
+    reg = SignalRegistry(); eng = DerivedEngine(reg)
+    eng.define([("fl", "W.FL * 2", ""), ("fl4", "fl * 2", "")])
+    out = eng.feed_batch(records(reg, [("BUS1", "W", {"FL": 1.0}, 1.0), ("BUS2", "W", {"FL": 3.0}, 2.0)]))
+    assert as_lists(out) == [("fl", [1.0, 2.0], [2.0, 6.0]), ("fl4", [1.0, 2.0], [4.0, 12.0])]
+
+
+def test_inputs_held_across_frames_and_batches():
+    reg = SignalRegistry(); eng = DerivedEngine(reg)
+    eng.define([("p", "B.U * B.I", ""), ("q", "p + X.K", "")])
+    reg.handle(DERIVED_BUS, DERIVED_MSG, "p")  # FrameBus registers derived outputs; they are not inputs
+    out = eng.feed_batch(records(reg, [("C", "B", {"U": 2.0}, 1.0), ("C", "B", {"I": 3.0}, 1.0), ("C", "X", {"K": 1.0}, 1.0)]))
+    # U and I share a frame; K arrives in a later frame at the same time
+    assert as_lists(out) == [("p", [1.0], [6.0]), ("q", [1.0], [7.0])]
+    out = eng.feed_batch(records(reg, [("C", "B", {"U": 4.0}, 2.0), ("C", "X", {"K": 10.0}, 3.0)]))
+    assert as_lists(out) == [("p", [2.0], [12.0]), ("q", [2.0, 3.0], [13.0, 22.0])]
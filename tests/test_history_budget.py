@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+from iCAN.main_window import Main
+
+
+class FakePanel:
+    def __init__(self, nbytes, visible, last_viewed):
+        self.nbytes = nbytes
+        self.on_screen = visible
+        self.last_viewed = last_viewed
+        self.shrinks = 0
+
+    def history_bytes(self):
+        return self.nbytes
+
+    def shrink_history(self):
+        freed = self.nbytes // 2
+        self.nbytes -= freed
+        self.shrinks += 1
+        return freed
+
+
+def enforce(panels, budget_mb):
+    win = SimpleNamespace(_all_panels=lambda: panels, _history_budget_mb=budget_mb)
+    return Main._enforce_history_budget(win)
+
+
+def test_hidden_panels_are_halved_repeatedly_before_visible_ones():
+    mb = 1024 * 1024
+    hidden = [FakePanel(40 * mb, False, 1.0), FakePanel(40 * mb, False, 2.0)]
+    visible = [FakePanel(10 * mb, True, 3.0)]
+    # 90 MB against 25 MB: hidden panels must shrink to 7.5 MB in total, which takes several passes
+    usage = enforce(hidden + visible, 25)
+    assert sum(usage.values()) <= 25 * mb
+    assert all(p.shrinks >= 2 for p in hidden)
+    assert visible[0].shrinks == 0 and usage[visible[0]] == 10 * mb
+
+
+def test_visible_panels_shrink_once_hidden_ones_are_exhausted():
+    mb = 1024 * 1024
+    hidden = FakePanel(0, False, 1.0)
+    visible = FakePanel(8 * mb, True, 2.0)
+    usage = enforce([hidden, visible], 5)
+    assert visible.shrinks == 1 and usage[visible] == 4 * mb
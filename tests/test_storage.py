@@ -0,0 +1,28 @@
+import numpy as np
+
+from iCAN.storage import SampleBuffer
+
+
+def test_compact_append_earlier_than_segment_base():
+    buf = SampleBuffer(compact=True)
+    buf.append(100.0, 1.0)
+    buf.append(99.9, 2.0)
+    assert np.allclose(buf.times(), [100.0, 100.0])
+    assert np.allclose(buf.values(), [1.0, 2.0])
+
+
+def test_compact_extend_out_of_order_batch():
+    buf = SampleBuffer(compact=True)
+    buf.append(100.0, 0.0)
+    buf.extend([99.0, 100.5, 100.25], [1.0, 2.0, 3.0])
+    assert np.allclose(buf.times(), [100.0, 100.0, 100.5, 100.25])
+    assert buf.last_time() < 101.0
+    buf.trim_before(100.4)
+    assert buf.first_time() >= 100.0 and buf.last_time() < 101.0
+
+
+def test_compact_extend_splits_unsorted_batch_at_span():
+    buf = SampleBuffer(compact=True)
+    buf.extend([0.0, 5000.0, 10.0], [1.0, 2.0, 3.0])
+    assert np.allclose(buf.times(), [0.0, 5000.0, 5000.0])
+    assert len(buf._segs) == 2